@@ -0,0 +1,147 @@
+"""A corpus of recorded mid-battle snapshots used by the benchmark suites
+
+A snapshot describes a `Battle` from the bot's point-of-view, so it can be used to
+benchmark everything from `prepare_battles` down to the engine.
+Snapshots are stored as JSON files in `benchmarks/corpus/`"""
+import os
+import json
+import importlib
+from collections import defaultdict
+
+import constants
+from showdown.battle import Battler
+from showdown.battle import LastUsedMove
+from showdown.battle import Pokemon
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def pokemon_to_snapshot(pkmn):
+    return {
+        'name': pkmn.name,
+        'level': pkmn.level,
+        'hp': round(pkmn.hp / pkmn.max_hp, 4) if pkmn.max_hp else 0,
+        'stats': dict(pkmn.stats),
+        'nature': pkmn.nature,
+        'evs': ','.join(str(e) for e in pkmn.evs),
+        'status': pkmn.status,
+        'ability': pkmn.ability,
+        'item': pkmn.item,
+        'types': list(pkmn.types),
+        'moves': [m.name for m in pkmn.moves],
+        'disabled_moves': [m.name for m in pkmn.moves if m.disabled],
+        'boosts': {k: v for k, v in pkmn.boosts.items() if v},
+        'volatile_statuses': list(pkmn.volatile_statuses),
+        'can_have_choice_item': pkmn.can_have_choice_item
+    }
+
+
+def pokemon_from_snapshot(pkmn_snapshot):
+    pkmn = Pokemon(pkmn_snapshot['name'], pkmn_snapshot.get('level', 100))
+    if 'nature' in pkmn_snapshot:
+        pkmn.set_spread(pkmn_snapshot['nature'], pkmn_snapshot['evs'])
+    if 'stats' in pkmn_snapshot:
+        pkmn.stats = dict(pkmn_snapshot['stats'])
+    if 'types' in pkmn_snapshot:
+        pkmn.types = list(pkmn_snapshot['types'])
+
+    pkmn.hp = round(pkmn.max_hp * pkmn_snapshot.get('hp', 1))
+    pkmn.status = pkmn_snapshot.get('status')
+    pkmn.ability = pkmn_snapshot.get('ability')
+    pkmn.item = pkmn_snapshot.get('item', constants.UNKNOWN_ITEM)
+    pkmn.can_have_choice_item = pkmn_snapshot.get('can_have_choice_item', True)
+
+    for move_name in pkmn_snapshot.get('moves', []):
+        new_move = pkmn.add_move(move_name)
+        if new_move is not None and move_name in pkmn_snapshot.get('disabled_moves', []):
+            new_move.disabled = True
+
+    for stat, amount in pkmn_snapshot.get('boosts', {}).items():
+        pkmn.boosts[stat] = amount
+    pkmn.volatile_statuses = list(pkmn_snapshot.get('volatile_statuses', []))
+
+    return pkmn
+
+
+def battler_to_snapshot(battler):
+    return {
+        'name': battler.name,
+        'active': pokemon_to_snapshot(battler.active),
+        'reserve': [pokemon_to_snapshot(p) for p in battler.reserve],
+        'side_conditions': {k: v for k, v in battler.side_conditions.items() if v},
+        'wish': list(battler.wish),
+        'trapped': battler.trapped,
+        'last_used_move': list(battler.last_used_move)
+    }
+
+
+def battler_from_snapshot(battler_snapshot):
+    battler = Battler()
+    battler.name = battler_snapshot['name']
+    battler.active = pokemon_from_snapshot(battler_snapshot['active'])
+    battler.reserve = [pokemon_from_snapshot(p) for p in battler_snapshot['reserve']]
+    battler.side_conditions = defaultdict(lambda: 0, battler_snapshot.get('side_conditions', {}))
+    battler.wish = tuple(battler_snapshot.get('wish', (0, 0)))
+    battler.trapped = battler_snapshot.get('trapped', False)
+    battler.last_used_move = LastUsedMove(*battler_snapshot.get('last_used_move', ('', '', 0)))
+
+    # the index is used when formatting a switch decision
+    battler.active.index = 1
+    for index, pkmn in enumerate(battler.reserve):
+        pkmn.index = index + 2
+
+    return battler
+
+
+def battle_to_snapshot(battle, name, pokemon_mode, pokemon_sets=None):
+    """Records a battle in a format that can be saved in the corpus
+       `pokemon_sets` should contain the usage-stats of the opponent's pokemon for standard battles"""
+    return {
+        'name': name,
+        'pokemon_mode': pokemon_mode,
+        'battle_type': battle.battle_type,
+        'turn': battle.turn,
+        'weather': battle.weather,
+        'field': battle.field,
+        'trick_room': battle.trick_room,
+        'force_switch': battle.force_switch,
+        'user': battler_to_snapshot(battle.user),
+        'opponent': battler_to_snapshot(battle.opponent),
+        'pokemon_sets': pokemon_sets or {}
+    }
+
+
+def battle_from_snapshot(snapshot, battle_bot_module='safest'):
+    battle_module = importlib.import_module('showdown.battle_bots.{}.main'.format(battle_bot_module))
+    battle = battle_module.BattleBot(snapshot['name'])
+    battle.battle_type = snapshot['battle_type']
+    battle.generation = snapshot['pokemon_mode'][:4]
+    battle.turn = snapshot.get('turn', 1)
+    battle.weather = snapshot.get('weather')
+    battle.field = snapshot.get('field')
+    battle.trick_room = snapshot.get('trick_room', False)
+    battle.force_switch = snapshot.get('force_switch', False)
+    battle.user = battler_from_snapshot(snapshot['user'])
+    battle.opponent = battler_from_snapshot(snapshot['opponent'])
+    battle.started = True
+    battle.rqid = 1
+    return battle
+
+
+def generation_of(snapshot):
+    return snapshot['pokemon_mode'][:4]
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    snapshots = []
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if file_name.endswith('.json'):
+            with open(os.path.join(corpus_dir, file_name), 'r') as f:
+                snapshots.append(json.load(f))
+    return snapshots
+
+
+def save_snapshot(snapshot, corpus_dir=CORPUS_DIR):
+    with open(os.path.join(corpus_dir, '{}.json'.format(snapshot['name'])), 'w') as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
@@ -0,0 +1,206 @@
+"""Replays battles recorded with `RECORD_MESSAGES` through the bot without a server
+
+    python -m benchmarks.replay recording.jsonl [--bot safest] [--output replay.json]
+
+Every recorded battle is run through `pokemon_battle`, so the start functions,
+`battle_modifier` and the bot's `find_best_move` all see the same messages that they
+saw live. Each decision the bot makes is timed and compared against the decision
+that was sent during the recorded battle"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import config
+from showdown.run_battle import pokemon_battle
+from showdown.websocket_client import MessageRecorder
+from showdown.websocket_client import PSWebsocketClient
+
+
+DECISION_PREFIXES = ('/choose', '/switch', '/team')
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+def load_recording(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def battle_tag_of(message):
+    first_line = message.split('\n')[0]
+    if first_line.startswith('>battle-'):
+        return first_line[1:].strip()
+    return None
+
+
+def pokemon_mode_of(battle_tag, default):
+    """The format in a battle-tag such as 'battle-gen8randombattle-1', so recordings of battles in several formats replay"""
+    parts = battle_tag.split('-')
+    return parts[1] if len(parts) >= 3 else default
+
+
+def split_battles(records):
+    """Returns the meta-record and a dictionary of battle-tag -> the records that belong to that battle"""
+    meta = next((r['message'] for r in records if r['direction'] == MessageRecorder.META), {})
+    battles = dict()
+    for record in records:
+        if record['direction'] == MessageRecorder.IN:
+            tag = battle_tag_of(record['message'])
+        elif record['direction'] == MessageRecorder.OUT:
+            tag = record['message'].split('|')[0] or None
+        else:
+            continue
+
+        if tag is not None and tag.startswith('battle-'):
+            battles.setdefault(tag, []).append(record)
+
+    return meta, battles
+
+
+def is_decision(message):
+    return message.split('|')[1].startswith(DECISION_PREFIXES)
+
+
+class Decision:
+    __slots__ = ('turn', 'recorded', 'replayed', 'latency')
+
+    def __init__(self, turn, recorded, replayed, latency):
+        self.turn = turn
+        self.recorded = recorded
+        self.replayed = replayed
+        self.latency = latency
+
+    @property
+    def changed(self):
+        return self.recorded != self.replayed
+
+    def to_dict(self):
+        return {
+            'turn': self.turn,
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'changed': self.changed,
+            'latency': self.latency
+        }
+
+
+class ReplayWebsocketClient(PSWebsocketClient):
+    """Serves recorded messages to `receive_message` and records the decisions passed to `send_message`
+
+    The latency of a decision is the time between the message that
+    prompted it being received and the decision being sent"""
+
+    def __init__(self, records):
+        self.incoming = [r['message'] for r in records if r['direction'] == MessageRecorder.IN]
+        self.recorded_decisions = [
+            r['message'] for r in records if r['direction'] == MessageRecorder.OUT and is_decision(r['message'])
+        ]
+        self.decisions = []
+        self.turn = 0
+        self.last_receive_time = time.perf_counter()
+
+    async def receive_message(self):
+        if not self.incoming:
+            raise ReplayFinished()
+
+        message = self.incoming.pop(0)
+        for line in message.split('\n'):
+            if line.startswith('|turn|'):
+                self.turn = int(line.split('|')[2])
+
+        self.last_receive_time = time.perf_counter()
+        return message
+
+    async def send_message(self, room, message_list):
+        message = room + "|" + "|".join(message_list)
+        self.last_message = message
+        if not is_decision(message):
+            return
+
+        latency = time.perf_counter() - self.last_receive_time
+        index = len(self.decisions)
+        recorded = self.recorded_decisions[index] if index < len(self.recorded_decisions) else None
+        self.decisions.append(Decision(self.turn, recorded, message, latency))
+
+    async def leave_battle(self, battle_tag, save_replay=False):
+        # nothing is left to be read once the battle is over
+        pass
+
+
+async def replay_battle(records, pokemon_mode):
+    """Runs a single recorded battle through `pokemon_battle` and returns (winner, decisions)
+       The winner is None if the recording ends before the battle does"""
+    client = ReplayWebsocketClient(records)
+    try:
+        winner = await pokemon_battle(client, pokemon_mode)
+    except ReplayFinished:
+        winner = None
+    return winner, client.decisions
+
+
+def summarize_battle(battle_tag, winner, decisions):
+    latencies = [d.latency for d in decisions]
+    return {
+        'battle_tag': battle_tag,
+        'winner': winner,
+        'decisions': len(decisions),
+        'changed': sum(d.changed for d in decisions),
+        'latency_mean': statistics.mean(latencies) if latencies else 0.0,
+        'latency_median': statistics.median(latencies) if latencies else 0.0,
+        'latency_max': max(latencies) if latencies else 0.0,
+        'turns': [d.to_dict() for d in decisions]
+    }
+
+
+def replay(path, battle_bot_module=None):
+    records = load_recording(path)
+    meta, battles = split_battles(records)
+
+    pokemon_mode = meta.get('pokemon_mode', config.pokemon_mode)
+    config.battle_bot_module = battle_bot_module or meta.get('battle_bot', 'safest')
+    config.save_replay = False
+
+    results = []
+    for battle_tag, battle_records in battles.items():
+        battle_pokemon_mode = pokemon_mode_of(battle_tag, pokemon_mode)
+        winner, decisions = asyncio.get_event_loop().run_until_complete(replay_battle(battle_records, battle_pokemon_mode))
+        results.append(summarize_battle(battle_tag, winner, decisions))
+
+    return {
+        'recording': path,
+        'pokemon_mode': pokemon_mode,
+        'battle_bot': config.battle_bot_module,
+        'battles': results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded battles through a bot and time each decision")
+    parser.add_argument('recording', help="a file written by setting the RECORD_MESSAGES environment variable")
+    parser.add_argument('--bot', help="the battle bot to replay with. Defaults to the bot used in the recording")
+    parser.add_argument('--output', help="write the full per-turn report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = replay(args.recording, battle_bot_module=args.bot)
+    for battle in report['battles']:
+        print("{}: {} decisions, {} changed, latency mean={:.3f}s median={:.3f}s max={:.3f}s".format(
+            battle['battle_tag'],
+            battle['decisions'],
+            battle['changed'],
+            battle['latency_mean'],
+            battle['latency_median'],
+            battle['latency_max']
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
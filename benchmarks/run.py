@@ -0,0 +1,138 @@
+"""Runs the benchmark suites against the corpus and writes the timings as JSON
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare before.json after.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from collections import defaultdict
+
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
+
+from .corpus import load_corpus
+from .corpus import CORPUS_DIR
+from . import suites
+
+
+def measure(func, calls, repeat):
+    """Returns the per-call time of `func` for each of `repeat` rounds of `calls` calls"""
+    func()  # warm-up: fills lazily-built caches so they are not counted against the first round
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append((time.perf_counter() - start) / calls)
+    return timings
+
+
+def summarize(suite, case, calls, timings):
+    return {
+        'suite': suite,
+        'case': case,
+        'calls': calls,
+        'repeat': len(timings),
+        'min': min(timings),
+        'mean': statistics.mean(timings),
+        'median': statistics.median(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0
+    }
+
+
+def run_snapshots(snapshots, depths, bots, calls, repeat):
+    results = []
+    for snapshot in snapshots:
+        battle = suites.load_battle(snapshot)
+        cases = [
+            ('state', suites.state_suite(battle), calls),
+            ('engine', suites.engine_suite(battle), calls),
+            # searches and bots are orders of magnitude slower than everything else
+            ('search', suites.search_suite(battle, depths), 1),
+            ('bot', suites.bot_suite(snapshot, bots), 1),
+        ]
+        for suite_name, suite, suite_calls in cases:
+            for case_name, func in suite.items():
+                timings = measure(func, suite_calls, repeat)
+                results.append(summarize('{}/{}'.format(snapshot['name'], suite_name), case_name, suite_calls, timings))
+
+    return results
+
+
+def run(corpus_dir=CORPUS_DIR, depths=suites.DEFAULT_DEPTHS, bots=suites.DEFAULT_BOTS, calls=10, repeat=5, only=None):
+    by_mode = defaultdict(list)
+    for snapshot in load_corpus(corpus_dir):
+        if only is None or any(o in snapshot['name'] for o in only):
+            by_mode[snapshot['pokemon_mode']].append(snapshot)
+
+    results = []
+    for pokemon_mode, snapshots in sorted(by_mode.items()):
+        with use_ruleset(get_ruleset(pokemon_mode)):
+            results += run_snapshots(snapshots, depths, bots, calls, repeat)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'depths': list(depths),
+            'bots': list(bots),
+            'calls': calls,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def compare(before, after):
+    """Pairs up cases found in both result files and returns (suite, case, before, after, ratio) using the minimums"""
+    before_lookup = {(r['suite'], r['case']): r['min'] for r in before['results']}
+    comparison = []
+    for r in after['results']:
+        key = (r['suite'], r['case'])
+        if key in before_lookup:
+            comparison.append((r['suite'], r['case'], before_lookup[key], r['min'], before_lookup[key] / r['min']))
+    return comparison
+
+
+def print_results(results):
+    for r in results['results']:
+        print("{:<40} {:<32} min={:>10.3f}ms median={:>10.3f}ms".format(r['suite'], r['case'], r['min'] * 1000, r['median'] * 1000))
+
+
+def print_comparison(comparison):
+    for suite, case, before, after, speedup in comparison:
+        print("{:<40} {:<32} {:>10.3f}ms -> {:>10.3f}ms  {:.2f}x".format(suite, case, before * 1000, after * 1000, speedup))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine and bots against the state corpus")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--depths', type=int, nargs='+', default=list(suites.DEFAULT_DEPTHS))
+    parser.add_argument('--bots', nargs='*', default=list(suites.DEFAULT_BOTS))
+    parser.add_argument('--calls', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help="only run snapshots whose name contains one of these strings")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        print_comparison(compare(before, after))
+        return
+
+    results = run(depths=args.depths, bots=args.bots, calls=args.calls, repeat=args.repeat, only=args.only)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
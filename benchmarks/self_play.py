@@ -0,0 +1,344 @@
+"""Plays bots against each other using the engine as the battle simulator
+
+    python -m benchmarks.self_play --bots safest most_damage --games 100 --workers 4
+
+Each turn both bots are given a `Battle` describing only what they could have seen in a
+real battle, their decisions are turned into state-instructions by the engine and
+one of the possible outcomes is sampled by its percentage.
+Only random-battle formats are supported because the teams are generated from the random-battle sets"""
+import io
+import sys
+import time
+import random
+import argparse
+import importlib
+import statistics
+import concurrent.futures
+from copy import copy
+from collections import defaultdict
+from contextlib import redirect_stdout
+
+import constants
+import data
+from data import pokedex
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
+from data.ruleset import current_ruleset
+from showdown.battle import Pokemon
+from showdown.battle import LastUsedMove
+from showdown.engine.objects import Side
+from showdown.engine.objects import State
+from showdown.engine.objects import StateMutator
+from showdown.engine.objects import Pokemon as TransposePokemon
+from showdown.engine.find_state_instructions import get_all_state_instructions
+
+
+MAX_TURNS = 500
+TEAM_SIZE = 6
+
+BOOST_ATTRIBUTES = {
+    constants.ATTACK: 'attack_boost',
+    constants.DEFENSE: 'defense_boost',
+    constants.SPECIAL_ATTACK: 'special_attack_boost',
+    constants.SPECIAL_DEFENSE: 'special_defense_boost',
+    constants.SPEED: 'speed_boost',
+    constants.ACCURACY: 'accuracy_boost',
+    constants.EVASION: 'evasion_boost',
+}
+
+
+def weighted_choice(rng, options):
+    """`options` is a list of (value, weight) pairs"""
+    values, weights = zip(*options)
+    return rng.choices(values, weights=weights)[0]
+
+
+def random_battle_level(pkmn_name):
+    # random battles give stronger pokemon a lower level; approximate that with the base-stat total
+    base_stat_total = sum(pokedex[pkmn_name][constants.BASESTATS].values())
+    return max(72, min(90, round(100 - (base_stat_total - 300) / 15)))
+
+
+def generate_team(rng):
+    team = []
+    for pkmn_name in rng.sample(sorted(data.random_battle_sets), TEAM_SIZE):
+        sets = data.random_battle_sets[pkmn_name]
+        pkmn = Pokemon(pkmn_name, random_battle_level(pkmn_name))
+        pkmn.ability = weighted_choice(rng, sets['abilities'])
+        pkmn.item = weighted_choice(rng, sets['items']) if sets['items'] else None
+        for move_name in weighted_choice(rng, list(sets['sets'].items())).split('|'):
+            pkmn.add_move(move_name)
+        team.append(TransposePokemon.from_state_pokemon_dict(pkmn.to_dict()))
+    return team
+
+
+def create_side(team):
+    return Side(team[0], {p.id: p for p in team[1:]}, (0, 0), defaultdict(lambda: 0))
+
+
+class Observations:
+    """What one side has seen of the other side's team"""
+
+    def __init__(self):
+        self.revealed = []
+        self.moves = defaultdict(list)
+        self.last_used_move = LastUsedMove('', '', 0)
+
+    def see(self, pkmn):
+        if pkmn.id not in self.revealed:
+            self.revealed.append(pkmn.id)
+
+    def see_move(self, pkmn, move_name):
+        if move_name not in self.moves[pkmn.id]:
+            self.moves[pkmn.id].append(move_name)
+
+
+def battle_pokemon_from_transpose(pkmn, known=True, revealed_moves=()):
+    battle_pkmn = Pokemon(pkmn.id, pkmn.level)
+    battle_pkmn.hp = round(battle_pkmn.max_hp * pkmn.hp / pkmn.maxhp)
+    battle_pkmn.types = list(pkmn.types)
+    battle_pkmn.status = pkmn.status
+    battle_pkmn.volatile_statuses = list(pkmn.volatile_status)
+    for stat, attribute in BOOST_ATTRIBUTES.items():
+        battle_pkmn.boosts[stat] = getattr(pkmn, attribute)
+
+    if known:
+        battle_pkmn.hp = pkmn.hp
+        battle_pkmn.max_hp = pkmn.maxhp
+        battle_pkmn.ability = pkmn.ability
+        battle_pkmn.item = pkmn.item
+        battle_pkmn.stats = {
+            constants.ATTACK: pkmn.attack,
+            constants.DEFENSE: pkmn.defense,
+            constants.SPECIAL_ATTACK: pkmn.special_attack,
+            constants.SPECIAL_DEFENSE: pkmn.special_defense,
+            constants.SPEED: pkmn.speed,
+        }
+        for m in pkmn.moves:
+            move = battle_pkmn.add_move(m[constants.ID])
+            if move is not None:
+                move.disabled = m[constants.DISABLED]
+                move.current_pp = m[constants.CURRENT_PP]
+    else:
+        for move_name in revealed_moves:
+            battle_pkmn.add_move(move_name)
+
+    return battle_pkmn
+
+
+def legal_options(state, last_used_move):
+    """The options for the 'self' side of `state` including the choice-item lock and PP that the engine does not track"""
+    user_options, _ = state.get_all_options()
+    active = state.self.active
+    out_of_pp = {m[constants.ID] for m in active.moves if m[constants.CURRENT_PP] <= 0}
+    user_options = [o for o in user_options if o not in out_of_pp] or [constants.DO_NOTHING_MOVE]
+    if (
+        active.item in constants.CHOICE_ITEMS and
+        last_used_move.pokemon_name == active.id and
+        last_used_move.move in user_options
+    ):
+        user_options = [o for o in user_options if o == last_used_move.move or o.startswith(constants.SWITCH_STRING + " ")]
+    return user_options
+
+
+def create_view(battle_module, state, own_observations, other_observations, options, turn):
+    """Creates the `Battle` that the 'self' side of `state` would see
+       `other_observations` is what the other side has seen of the 'self' side and vice-versa"""
+    battle = battle_module.BattleBot('self-play')
+    battle.battle_type = constants.RANDOM_BATTLE
+    battle.generation = current_ruleset().generation
+    battle.turn = turn
+    battle.rqid = turn
+    battle.started = True
+    battle.weather = state.weather
+    battle.field = state.field
+    battle.trick_room = state.trick_room
+    battle.force_switch = state.self.active.hp <= 0
+    battle.wait = False
+
+    user = battle.user
+    user.name = constants.SELF
+    user.active = battle_pokemon_from_transpose(state.self.active)
+    user.active.index = 1
+    user.reserve = [battle_pokemon_from_transpose(p) for p in state.self.reserve.values()]
+    for index, pkmn in enumerate(user.reserve):
+        pkmn.index = index + 2
+    for m in user.active.moves:
+        m.disabled = m.name not in options
+    user.side_conditions = copy(state.self.side_conditions)
+    user.wish = copy(state.self.wish)
+    user.trapped = state.self.trapped(state.opponent.active)
+    user.last_used_move = other_observations.last_used_move
+
+    opponent = battle.opponent
+    opponent.name = constants.OPPONENT
+    opponent.active = battle_pokemon_from_transpose(
+        state.opponent.active,
+        known=False,
+        revealed_moves=own_observations.moves[state.opponent.active.id]
+    )
+    opponent.reserve = [
+        battle_pokemon_from_transpose(p, known=False, revealed_moves=own_observations.moves[p.id])
+        for p in state.opponent.reserve.values() if p.id in own_observations.revealed
+    ]
+    opponent.side_conditions = copy(state.opponent.side_conditions)
+    opponent.wish = copy(state.opponent.wish)
+    opponent.last_used_move = own_observations.last_used_move
+
+    return battle
+
+
+def parse_decision(battle, decision):
+    """Turns the output of `format_decision` back into one of the engine's options"""
+    message = decision[0]
+    if message.startswith('/switch'):
+        index = int(message.split()[-1])
+        pkmn = next(p for p in battle.user.reserve if p.index == index)
+        return "{} {}".format(constants.SWITCH_STRING, pkmn.name)
+    return message.split()[2]
+
+
+def use_pp(pkmn, move_name):
+    for m in pkmn.moves:
+        if m[constants.ID] == move_name:
+            m[constants.CURRENT_PP] -= 1
+            return
+
+
+def flipped(state):
+    return State(state.opponent, state.self, state.weather, state.field, state.trick_room)
+
+
+class GameResult:
+    __slots__ = ('winner', 'turns', 'decision_times')
+
+    def __init__(self, winner, turns, decision_times):
+        self.winner = winner
+        self.turns = turns
+        self.decision_times = decision_times
+
+
+def play_game(bots, seed):
+    """Plays one game between `bots` which is a pair of battle-bot module names
+       Returns a GameResult where the winner is the index of the winning bot, or None for a draw"""
+    rng = random.Random(seed)
+    random.seed(seed)
+
+    battle_modules = [importlib.import_module('showdown.battle_bots.{}.main'.format(b)) for b in bots]
+    state = State(create_side(generate_team(rng)), create_side(generate_team(rng)), None, None, False)
+    mutator = StateMutator(state)
+
+    # observations[i] is what bot `i` has seen of the other side
+    observations = [Observations(), Observations()]
+    observations[0].see(state.opponent.active)
+    observations[1].see(state.self.active)
+
+    decision_times = [[], []]
+    for turn in range(1, MAX_TURNS + 1):
+        perspectives = [state, flipped(state)]
+        decisions = []
+        for i, perspective in enumerate(perspectives):
+            options = legal_options(perspective, observations[1 - i].last_used_move)
+            if options == [constants.DO_NOTHING_MOVE] or len(options) == 1:
+                decisions.append(options[0])
+                continue
+
+            battle = create_view(battle_modules[i], perspective, observations[i], observations[1 - i], options, turn)
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                decision = parse_decision(battle, battle.find_best_move())
+            decision_times[i].append(time.perf_counter() - start)
+            decisions.append(decision if decision in options else options[0])
+
+        actives = (state.self.active, state.opponent.active)
+        all_instructions = get_all_state_instructions(mutator, decisions[0], decisions[1])
+        chosen = weighted_choice(rng, [(i, i.percentage) for i in all_instructions])
+        mutator.apply(chosen.instructions)
+
+        for i in range(2):
+            if decisions[i] != constants.DO_NOTHING_MOVE:
+                observations[1 - i].last_used_move = LastUsedMove(actives[i].id, decisions[i], turn)
+                if not decisions[i].startswith(constants.SWITCH_STRING + " "):
+                    use_pp(actives[i], decisions[i])
+                    observations[1 - i].see_move(actives[i], decisions[i])
+        observations[0].see(state.opponent.active)
+        observations[1].see(state.self.active)
+
+        finished = state.battle_is_finished()
+        if finished:
+            return GameResult(0 if finished == 1 else 1, turn, decision_times)
+
+    return GameResult(None, MAX_TURNS, decision_times)
+
+
+def _play_game_in_worker(pokemon_mode, bots, seed, swap):
+    with use_ruleset(get_ruleset(pokemon_mode)):
+        if swap:
+            result = play_game(tuple(reversed(bots)), seed)
+            if result.winner is not None:
+                result.winner = 1 - result.winner
+            result.decision_times.reverse()
+            return result
+        return play_game(bots, seed)
+
+
+def run(bots, games, pokemon_mode=constants.DEFAULT_MODE, workers=None, seed=0):
+    if 'random' not in pokemon_mode:
+        raise ValueError("Self-play only supports random battles, got: {}".format(pokemon_mode))
+
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # every pair of games uses the same teams with the bots on opposite sides
+        futures = [pool.submit(_play_game_in_worker, pokemon_mode, tuple(bots), seed + i // 2, i % 2 == 1) for i in range(games)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    return summarize(bots, results, elapsed)
+
+
+def summarize(bots, results, elapsed):
+    wins = [0, 0]
+    for r in results:
+        if r.winner is not None:
+            wins[r.winner] += 1
+
+    summary = {
+        'games': len(results),
+        'seconds': elapsed,
+        'games_per_second': len(results) / elapsed if elapsed else 0.0,
+        'draws': len(results) - sum(wins),
+        'average_turns': statistics.mean(r.turns for r in results) if results else 0.0,
+        'bots': []
+    }
+    for i, bot in enumerate(bots):
+        times = [t for r in results for t in r.decision_times[i]]
+        summary['bots'].append({
+            'bot': bot,
+            'wins': wins[i],
+            'win_rate': wins[i] / len(results) if results else 0.0,
+            'mean_decision_time': statistics.mean(times) if times else 0.0
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play battle-bots against each other without a server")
+    parser.add_argument('--bots', nargs=2, default=['safest', 'most_damage'])
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--workers', type=int, help="defaults to the number of CPUs")
+    parser.add_argument('--pokemon-mode', default=constants.DEFAULT_MODE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    summary = run(args.bots, args.games, pokemon_mode=args.pokemon_mode, workers=args.workers, seed=args.seed)
+    print("{} games in {:.1f}s ({:.2f} games/s), {} draws, {:.1f} turns on average".format(
+        summary['games'], summary['seconds'], summary['games_per_second'], summary['draws'], summary['average_turns']
+    ))
+    for bot in summary['bots']:
+        print("{:<20} wins={:<5} win-rate={:.3f} mean-decision-time={:.3f}s".format(
+            bot['bot'], bot['wins'], bot['win_rate'], bot['mean_decision_time']
+        ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Benchmark suites run against every snapshot in the corpus
+
+Each suite is a function taking a `Battle` and returning a dictionary of
+case-name -> zero-argument callable. The callables are what get timed."""
+import io
+import itertools
+from copy import deepcopy
+from contextlib import redirect_stdout
+
+import constants
+import config
+from data.ruleset import get_ruleset
+from showdown.engine.objects import StateMutator
+from showdown.engine.evaluate import evaluate
+from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.find_state_instructions import get_all_state_instructions
+from showdown.engine.select_best_move import get_payoff_matrix
+
+from .corpus import battle_from_snapshot
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_DEPTHS = (1, 2, 3)
+
+# nash_equilibrium needs gambit - it is skipped when `config.gambit_exe_path` is not set
+DEFAULT_BOTS = ('safest', 'most_damage', 'expectiminimax', 'monte_carlo_tree_search', 'nash_equilibrium')
+
+
+def load_battle(snapshot, battle_bot_module='safest'):
+    """Should be called while the snapshot's ruleset is being used
+       The ruleset of a standard battle is given the sets recorded in the snapshot instead of downloading them"""
+    if snapshot['battle_type'] == constants.STANDARD_BATTLE:
+        get_ruleset(snapshot['pokemon_mode']).load_pokemon_sets(snapshot['pokemon_sets'])
+    return battle_from_snapshot(snapshot, battle_bot_module=battle_bot_module)
+
+
+def _first_battle_mutator(battle):
+    prepared = battle.prepare_battles(join_moves_together=True)[0]
+    return StateMutator(prepared.create_state()), prepared.get_all_options()
+
+
+def state_suite(battle):
+    prepared = battle.prepare_battles(join_moves_together=True)[0]
+    return {
+        'create_state': battle.create_state,
+        'create_state_prepared': prepared.create_state,
+        'prepare_battles': lambda: battle.prepare_battles(join_moves_together=True),
+        'deepcopy': lambda: deepcopy(battle),
+    }
+
+
+def engine_suite(battle):
+    mutator, (user_options, opponent_options) = _first_battle_mutator(battle)
+    move_pairs = list(itertools.product(user_options, opponent_options))
+
+    all_instructions = []
+    for user_move, opponent_move in move_pairs:
+        all_instructions += [i.instructions for i in get_all_state_instructions(mutator, user_move, opponent_move)]
+
+    def state_instructions():
+        for user_move, opponent_move in move_pairs:
+            get_all_state_instructions(mutator, user_move, opponent_move)
+
+    def apply_reverse():
+        for instructions in all_instructions:
+            mutator.apply(instructions)
+            mutator.reverse(instructions)
+
+    user_moves = [m for m in user_options if constants.SWITCH_STRING not in m]
+    defending_move = next((m for m in opponent_options if constants.SWITCH_STRING not in m), constants.DO_NOTHING_MOVE)
+
+    def damage():
+        for move in user_moves:
+            calculate_damage(mutator.state, constants.SELF, move, defending_move)
+
+    return {
+        'get_all_state_instructions': state_instructions,
+        'apply_reverse': apply_reverse,
+        'evaluate': lambda: evaluate(mutator.state),
+        'calculate_damage': damage,
+    }
+
+
+def search_suite(battle, depths=DEFAULT_DEPTHS):
+    mutator, (user_options, opponent_options) = _first_battle_mutator(battle)
+    return {
+        'payoff_matrix_depth_{}'.format(depth): (
+            lambda d=depth: get_payoff_matrix(mutator, user_options, opponent_options, depth=d, prune=True)
+        )
+        for depth in depths
+    }
+
+
+def bot_suite(snapshot, bots=DEFAULT_BOTS):
+    cases = dict()
+    for bot in bots:
+        if bot == 'nash_equilibrium' and not config.gambit_exe_path:
+            logger.warning("Skipping the {} bot for {}: config.gambit_exe_path is not set".format(bot, snapshot['name']))
+            continue
+
+        battle = load_battle(snapshot, battle_bot_module=bot)
+
+        def find_best_move(b=battle):
+            # bots print their decision; keep the benchmark output readable
+            with redirect_stdout(io.StringIO()):
+                return deepcopy(b).find_best_move()
+
+        cases['find_best_move_{}'.format(bot)] = find_best_move
+    return cases
@@ -8,7 +8,10 @@ password = None
 bot_mode = None
 team_name = None
 pokemon_mode = None
+# every format battles are played in, in turn. `pokemon_mode` is the first of them
+pokemon_modes = None
 run_count = None
+max_concurrent_battles = 1
 user_to_challenge = None
 gambit_exe_path = ""
 greeting_message = 'hf'
@@ -18,8 +21,22 @@ use_relative_weights = False
 damage_calc_type = 'average'
 search_depth = 2
 
+# at most this many guesses of the opponent's active pokemon's set are searched, picked by their usage. `None` has no limit
+prepare_battles_budget = None
+# 'top' searches the most likely guesses, 'sample' picks them at random weighted by how likely they are
+prepare_battles_sampling = 'top'
+
 save_replay = False
 
+# when set, every websocket message is appended to this file so battles can be replayed offline
+record_messages_path = None
+
+# parsed usage-stats are kept here between runs. `None` uses `data/smogon_stats`
+smogon_stats_cache_dir = None
+
+# only this many of the most likely spreads/items/moves/abilities are kept for each pokemon. `None` keeps all of them
+smogon_stats_top_k = None
+
 
 class CustomFormatter(logging.Formatter):
     def format(self, record):
@@ -230,6 +230,12 @@ POKEMON_CANNOT_HAVE_ITEMS_REMOVED = {
     'giratinaorigin',
 }
 
+# the engine calculates these pokemon's stats again from their nature and evs when they change forme
+STATS_RECALCULATED_FROM_SPREAD = {
+    'aegislash',
+    'aegislashblade',
+}
+
 # Hazards
 STEALTH_ROCK = 'stealthrock'
 SPIKES = 'spikes'
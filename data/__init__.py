@@ -1,19 +1,27 @@
 import os
 import json
 
+from data.ruleset import CurrentRulesetMapping
+
 PWD = os.path.dirname(os.path.abspath(__file__))
 
+# the current-generation data as it is stored on disk
+# rulesets for previous generations are built from these without modifying them
 move_json_location = os.path.join(PWD, 'moves.json')
 with open(move_json_location) as f:
-    all_move_json = json.load(f)
+    base_move_json = json.load(f)
 
 pkmn_json_location = os.path.join(PWD, 'pokedex.json')
 with open(pkmn_json_location, 'r') as f:
-    pokedex = json.loads(f.read())
+    base_pokedex = json.loads(f.read())
 
 random_battle_set_location = os.path.join(PWD, 'random_battle_sets.json')
 with open(random_battle_set_location, 'r') as f:
-    random_battle_sets = json.load(f)
+    base_random_battle_sets = json.load(f)
 
 
-pokemon_sets = dict()
+# these read from the ruleset of the current context - see `data.ruleset`
+all_move_json = CurrentRulesetMapping('move_json')
+pokedex = CurrentRulesetMapping('pokedex')
+random_battle_sets = CurrentRulesetMapping('random_battle_sets')
+pokemon_sets = CurrentRulesetMapping('pokemon_sets')
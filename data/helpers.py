@@ -1,9 +1,12 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
 import constants
 
 import data
 from data import pokedex
-from data.parse_smogon_stats import get_smogon_stats_file_name
-from data.parse_smogon_stats import get_pokemon_information
+from data.ruleset import current_ruleset
+from data.smogon_stats_cache import get_usage_stats
 
 from data.parse_smogon_stats import MOVES_STRING
 from data.parse_smogon_stats import SPREADS_STRING
@@ -39,35 +42,22 @@ def get_pokemon_sets(pkmn):
     try:
         return data.pokemon_sets[pkmn]
     except KeyError:
-        possible_names = [p for p in data.pokemon_sets if pkmn.startswith(p)]
-        if not possible_names:
+        new_name = current_ruleset().pokemon_sets_index.first_prefix_of(pkmn)
+        if new_name is None:
             raise KeyError
         else:
-            new_name = possible_names[0]
             logger.debug("{} not in the sets lookup, using {} instead".format(pkmn, new_name))
             return data.pokemon_sets[new_name]
 
 
 def get_all_possible_moves_for_random_battle(pkmn_name, known_moves):
     try:
-        sets = data.random_battle_sets[pkmn_name]
+        sets = current_ruleset().random_battle_index[pkmn_name]
     except KeyError:
         logger.warning("{} not in the random-battle sets lookup".format(pkmn_name))
         return []
 
-    new_moves = list()
-    for key in sets[constants.SETS]:
-        this_set_moves = key.split('|')
-        if all(m in this_set_moves for m in known_moves):
-            for m in filter(lambda x: x not in new_moves + known_moves, this_set_moves):
-                new_moves.append(m)
-
-    if not new_moves:
-        for m, _ in sets[constants.MOVES]:
-            if m not in known_moves:
-                new_moves.append(m)
-
-    return new_moves
+    return list(sets.possible_moves(known_moves))
 
 
 def get_most_likely_ability_for_random_battle(pkmn_name):
@@ -165,25 +155,22 @@ def get_most_likely_spread(pkmn_name):
 
 def get_standard_battle_sets(battle_mode):
     if any(battle_mode.endswith(s) for s in constants.SMOGON_HAS_STATS_PAGE_SUFFIXES):
-        smogon_stats_file_name = get_smogon_stats_file_name(battle_mode)
-        logger.debug("Making HTTP request to {} for usage stats".format(smogon_stats_file_name))
-        smogon_usage_data = get_pokemon_information(smogon_stats_file_name)
-    else:
-        # use ALL data for a mode like battle-factory
-        logger.debug("Making HTTP request for ALL usage stats\nplease wait...")
-        ubers_data = get_pokemon_information(get_smogon_stats_file_name("gen8ubers"))
-        ou_data = get_pokemon_information(get_smogon_stats_file_name("gen8ou"))
-        uu_data = get_pokemon_information(get_smogon_stats_file_name("gen8uu"))
-        ru_data = get_pokemon_information(get_smogon_stats_file_name("gen8ru"))
-        nu_data = get_pokemon_information(get_smogon_stats_file_name("gen8nu"))
-        pu_data = get_pokemon_information(get_smogon_stats_file_name("gen8pu"))
-        lc_data = get_pokemon_information(get_smogon_stats_file_name("gen8lc"))
-
-        smogon_usage_data = lc_data
-        for pkmn_data in [pu_data, nu_data, ru_data, uu_data, ou_data, ubers_data]:
-            for pkmn_name in pkmn_data:
-                if pkmn_name not in smogon_usage_data:
-                    smogon_usage_data[pkmn_name] = pkmn_data[pkmn_name]
+        return get_usage_stats(battle_mode)
+
+    # use ALL data for a mode like battle-factory
+    logger.debug("Loading ALL usage stats\nplease wait...")
+    tiers = ["gen8lc", "gen8pu", "gen8nu", "gen8ru", "gen8uu", "gen8ou", "gen8ubers"]
+    # each thread is given a copy of this context so the stats are parsed using this battle's ruleset
+    contexts = [contextvars.copy_context() for _ in tiers]
+    with ThreadPoolExecutor(max_workers=len(tiers)) as pool:
+        tier_data = list(pool.map(lambda context, tier: context.run(get_usage_stats, tier), contexts, tiers))
+
+    # the cached stats are shared so they are combined into a new dictionary
+    smogon_usage_data = dict()
+    for pkmn_data in tier_data:
+        for pkmn_name in pkmn_data:
+            if pkmn_name not in smogon_usage_data:
+                smogon_usage_data[pkmn_name] = pkmn_data[pkmn_name]
 
     return smogon_usage_data
 
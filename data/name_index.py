@@ -0,0 +1,31 @@
+"""The names of a mapping indexed by their prefixes
+
+A pokemon that is not in the pokedex or the sets under its own name, e.g. a forme or cosmetic
+variant like 'pikachuoriginal', is looked up by the first name that it starts with. Instead of
+checking every name, only the prefixes of the name being looked up are checked"""
+
+
+class PrefixIndex:
+    __slots__ = ('positions', 'lengths')
+
+    def __init__(self, names):
+        # {name: its position in `names`}
+        self.positions = dict()
+        for name in names:
+            self.positions.setdefault(name, len(self.positions))
+
+        # the lengths of the names, shortest first
+        self.lengths = sorted({len(name) for name in self.positions})
+
+    def first_prefix_of(self, name):
+        """The first of the names in their original order that `name` starts with, or None"""
+        best = None
+        best_position = len(self.positions)
+        for length in self.lengths:
+            if length > len(name):
+                break
+            position = self.positions.get(name[:length], best_position)
+            if position < best_position:
+                best = name[:length]
+                best_position = position
+        return best
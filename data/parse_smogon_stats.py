@@ -1,23 +1,35 @@
 import ntpath
-import re
 from datetime import datetime
 from dateutil import relativedelta
 
 import requests
 
 import constants
+from data.ruleset import current_ruleset
 from showdown.engine.helpers import normalize_name
 
-NEW_PKMN_INDICATOR = """ +----------------------------------------+ \\n +----------------------------------------+"""
-
-SECTION_END_STRING = "----------"
+SECTION_BORDER_START = "+"
+SECTION_LINE_START = "|"
 OTHER_STRING = "other"
 MOVES_STRING = "moves"
 ITEM_STRING = "items"
 SPREADS_STRING = "spreads"
 ABILITY_STRING = "abilities"
 
-PERCENTAGES_REGEX = '(\d+\.\d+%)'
+PARSED_SECTIONS = (SPREADS_STRING, ITEM_STRING, MOVES_STRING, ABILITY_STRING)
+
+
+def get_smogon_stats_month(month_delta=1):
+    """Returns the 'YYYY-MM' that Smogon publishes the stats of `month_delta` months ago under"""
+    previous_month = datetime.now() - relativedelta.relativedelta(months=month_delta)
+    return "{}-{:02d}".format(previous_month.year, previous_month.month)
+
+
+def get_smogon_stats_game_mode(game_mode):
+    # blitz comes and goes - use the non-blitz version
+    if game_mode.endswith('blitz'):
+        game_mode = game_mode[:-5]
+    return game_mode
 
 
 def get_smogon_stats_file_name(game_mode, month_delta=1):
@@ -25,80 +37,92 @@ def get_smogon_stats_file_name(game_mode, month_delta=1):
     Gets the smogon stats url based on the game mode
     Uses the previous-month's statistics
     """
+    return get_smogon_stats_url(game_mode, get_smogon_stats_month(month_delta))
 
-    # blitz comes and goes - use the non-blitz version
-    if game_mode.endswith('blitz'):
-        game_mode = game_mode[:-5]
 
+def get_smogon_stats_url(game_mode, month):
     # always use the `-0` file - the higher ladder is for noobs
-    smogon_url = "https://www.smogon.com/stats/{}-{}/moveset/{}-0.txt"
-
-    previous_month = datetime.now() - relativedelta.relativedelta(months=month_delta)
-    year = previous_month.year
-    month = "{:02d}".format(previous_month.month)
-
-    return smogon_url.format(year, month, game_mode)
+    smogon_url = "https://www.smogon.com/stats/{}/moveset/{}-0.txt"
+    return smogon_url.format(month, get_smogon_stats_game_mode(game_mode))
 
 
-def get_pokemon_information(smogon_stats_url):
+def get_pokemon_information(smogon_stats_url, top_k=None):
     """Parses a Smogon stats document, such as: 'https://www.smogon.com/stats/2019-02/moveset/gen7ou-1825.txt'
        Returns a dictionary containing the most likely spreads, items, and moves for each pokemon in order of likelihood
     """
-    r = requests.get(smogon_stats_url)
+    r = requests.get(smogon_stats_url, stream=True)
     if r.status_code == 404:
-        r = requests.get(get_smogon_stats_file_name(ntpath.basename(smogon_stats_url.replace('-0.txt', '')), month_delta=2))
-
-    split_string = str(r.content).split(NEW_PKMN_INDICATOR)
-
-    pokemon_information = dict()
-    for pokemon_data in split_string:
-        segments = pokemon_data.split('|')
-        it = iter(segments)
-        pokemon_name = normalize_name(segments[1])
-        pokemon_information[pokemon_name] = dict()
-        pokemon_information[pokemon_name][SPREADS_STRING] = list()
-        pokemon_information[pokemon_name][ITEM_STRING] = list()
-        pokemon_information[pokemon_name][MOVES_STRING] = list()
-        pokemon_information[pokemon_name][ABILITY_STRING] = list()
-        for segment in it:
-            if normalize_name(segment) == SPREADS_STRING:
-                while SECTION_END_STRING not in segment:
-                    segment = next(it)
-                    if ':' in segment:
-                        split_segment = segment.split()
-                        spread = split_segment[0]
-                        nature = normalize_name(spread.split(':')[0])
-                        evs = spread.split(':')[1].replace('/', ',')
-                        percentage = float(re.search(PERCENTAGES_REGEX, segment).group()[:-1])
-                        pokemon_information[pokemon_name][SPREADS_STRING].append((nature, evs, percentage))
-
-            elif normalize_name(segment) == ITEM_STRING:
-                while SECTION_END_STRING not in segment:
-                    segment = next(it)
-                    if '%' in segment:
-                        item = normalize_name(re.sub(PERCENTAGES_REGEX, '', segment).strip())
-                        percentage = float(re.search(PERCENTAGES_REGEX, segment).group()[:-1])
-                        if item != OTHER_STRING:
-                            pokemon_information[pokemon_name][ITEM_STRING].append((item, percentage))
-
-            elif normalize_name(segment) == MOVES_STRING:
-                while SECTION_END_STRING not in segment:
-                    segment = next(it)
-                    if '%' in segment:
-                        move = normalize_name(re.sub(PERCENTAGES_REGEX, '', segment).strip())
-                        percentage = float(re.search(PERCENTAGES_REGEX, segment).group()[:-1])
-                        if move != OTHER_STRING:
-                            if constants.HIDDEN_POWER in move:
-                                move = "{}{}".format(move, constants.HIDDEN_POWER_ACTIVE_MOVE_BASE_DAMAGE_STRING)
-                            pokemon_information[pokemon_name][MOVES_STRING].append((move, percentage))
-
-            elif normalize_name(segment) == ABILITY_STRING:
-                while SECTION_END_STRING not in segment:
-                    segment = next(it)
-                    if '%' in segment:
-                        ability = normalize_name(re.sub(PERCENTAGES_REGEX, '', segment).strip())
-                        percentage = float(re.search(PERCENTAGES_REGEX, segment).group()[:-1])
-                        if ability != OTHER_STRING:
-                            pokemon_information[pokemon_name][ABILITY_STRING].append((ability, percentage))
-
-    return pokemon_information
+        r = requests.get(get_smogon_stats_file_name(ntpath.basename(smogon_stats_url.replace('-0.txt', '')), month_delta=2), stream=True)
+
+    return dict(iter_pokemon_information(r.iter_lines(decode_unicode=True), top_k=top_k))
+
+
+def parse_entry(section, line):
+    """Parses a line such as `Leftovers 54.123%` from one of the `PARSED_SECTIONS`
+       Returns None for the `Other` entry"""
+    name, _, percentage = line.rpartition(' ')
+    if not percentage.endswith('%'):
+        return None
+    percentage = float(percentage[:-1])
+
+    if section == SPREADS_STRING:
+        if ':' not in name:
+            return None
+        nature, _, evs = name.partition(':')
+        return normalize_name(nature), evs.strip().replace('/', ','), percentage
+
+    name = normalize_name(name)
+    if name == OTHER_STRING:
+        return None
+    if section == MOVES_STRING and constants.HIDDEN_POWER in name:
+        name = "{}{}".format(name, current_ruleset().hidden_power_active_move_base_damage_string)
+    return name, percentage
+
+
+def iter_pokemon_information(lines, top_k=None):
+    """Parses the lines of a Smogon stats document one at a time and yields (pokemon_name, information) for each pokemon
+       Lines can be bytes or str, so an open file or a streamed response can be given without reading all of it
+       `top_k` keeps only the most likely entries of each section. Smogon lists every section in order of likelihood"""
+    pokemon_name = None
+    information = None
+    section = None
+    last_line_was_border = False
+    next_line_is_name = True
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'ignore')
+        line = line.strip()
+
+        if line.startswith(SECTION_BORDER_START):
+            # two borders in a row separate one pokemon from the next
+            next_line_is_name = next_line_is_name or last_line_was_border
+            last_line_was_border = True
+            section = None
+            continue
+
+        if not line.startswith(SECTION_LINE_START):
+            continue
+        line = line.strip(SECTION_LINE_START).strip()
+
+        if next_line_is_name:
+            if pokemon_name is not None:
+                yield pokemon_name, information
+            pokemon_name = normalize_name(line)
+            information = {s: list() for s in PARSED_SECTIONS}
+            next_line_is_name = False
+        elif last_line_was_border:
+            section = normalize_name(line)
+        elif section in information and (top_k is None or len(information[section]) < top_k):
+            entry = parse_entry(section, line)
+            if entry is not None:
+                information[section].append(entry)
+
+        last_line_was_border = False
+
+    if pokemon_name is not None:
+        yield pokemon_name, information
+
+
+def parse_pokemon_information(lines, top_k=None):
+    return dict(iter_pokemon_information(lines, top_k=top_k))
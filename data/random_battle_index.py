@@ -0,0 +1,77 @@
+"""The random-battle sets compiled into bitmasks
+
+Every move a pokemon can have in random battles is given a bit, so each of its sets is one
+integer and checking whether a set has all of the moves that have been seen is one AND"""
+from types import MappingProxyType
+
+import constants
+
+
+class RandomBattleSets:
+    __slots__ = ('move_bits', 'moves', 'set_masks', 'set_moves', 'set_frequencies', 'moves_by_usage', '_possible_moves')
+
+    def __init__(self, sets):
+        self.move_bits = dict()
+        self.set_masks = list()
+        self.set_moves = list()
+        self.set_frequencies = list()
+        for key, frequency in sets[constants.SETS].items():
+            this_set_moves = tuple(key.split('|'))
+            mask = 0
+            for m in this_set_moves:
+                if m not in self.move_bits:
+                    self.move_bits[m] = 1 << len(self.move_bits)
+                mask |= self.move_bits[m]
+            self.set_masks.append(mask)
+            self.set_moves.append(this_set_moves)
+            self.set_frequencies.append(frequency)
+
+        self.moves_by_usage = tuple(m for m, _ in sets[constants.MOVES])
+        for m in self.moves_by_usage:
+            if m not in self.move_bits:
+                self.move_bits[m] = 1 << len(self.move_bits)
+
+        self.moves = tuple(self.move_bits)
+        self._possible_moves = dict()
+
+    def mask_of(self, moves):
+        """A move that is in none of the sets gets a bit that no set has, so no set is consistent with it"""
+        impossible_bit = 1 << len(self.move_bits)
+        mask = 0
+        for m in moves:
+            mask |= self.move_bits.get(m, impossible_bit)
+        return mask
+
+    def consistent_sets(self, known_moves):
+        """Returns the index of every set that has all of `known_moves`"""
+        mask = self.mask_of(known_moves)
+        return [i for i, set_mask in enumerate(self.set_masks) if set_mask & mask == mask]
+
+    def possible_moves(self, known_moves):
+        """The moves, other than `known_moves`, of every set that has all of `known_moves`
+           If no set has all of them, every move the pokemon can have is possible"""
+        mask = self.mask_of(known_moves)
+        try:
+            return self._possible_moves[mask]
+        except KeyError:
+            pass
+
+        new_moves = list()
+        seen = mask
+        for set_mask, this_set_moves in zip(self.set_masks, self.set_moves):
+            if set_mask & mask == mask and set_mask & ~seen:
+                for m in this_set_moves:
+                    bit = self.move_bits[m]
+                    if not seen & bit:
+                        new_moves.append(m)
+                        seen |= bit
+
+        if not new_moves:
+            new_moves = [m for m in self.moves_by_usage if m not in known_moves]
+
+        self._possible_moves[mask] = new_moves = tuple(new_moves)
+        return new_moves
+
+
+def build_random_battle_index(random_battle_sets):
+    return MappingProxyType({name: RandomBattleSets(sets) for name, sets in random_battle_sets.items()})
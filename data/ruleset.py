@@ -0,0 +1,239 @@
+"""The data and constants that differ between generations and formats
+
+A `Ruleset` is built once per pokemon_mode and never modified. The ruleset that is used by
+the engine, the evaluation and the battle-tracking is the one set for the current context,
+so battles in different formats can be played concurrently in the same process.
+`data.all_move_json`, `data.pokedex`, `data.random_battle_sets` and `data.pokemon_sets`
+always read from the current ruleset"""
+import os
+import json
+import logging
+import contextvars
+from functools import lru_cache
+from contextlib import contextmanager
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import constants
+
+logger = logging.getLogger(__name__)
+
+CURRENT_GEN = 8
+DEFAULT_POKEMON_MODE = "gen{}ou".format(CURRENT_GEN)
+MODS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mods')
+
+# there are no mods for the generations before this one - they use the data of this generation
+OLDEST_MODS_GEN = 4
+
+
+def load_mods(kind, gen_number):
+    with open(os.path.join(MODS_DIR, "gen{}_{}_mods.json".format(gen_number, kind)), 'r') as f:
+        return json.load(f)
+
+
+def apply_mods_to_copy(base, kind, gen_number):
+    """Returns a copy of `base` with the mods of every generation from `gen_number` up to the current one applied
+       Only the entries that are modified are copied - the rest are shared with `base`"""
+    modified = dict(base)
+    for gen in reversed(range(max(gen_number, OLDEST_MODS_GEN), CURRENT_GEN)):
+        for name, modifications in load_mods(kind, gen).items():
+            modified[name] = dict(modified[name], **modifications)
+    return modified
+
+
+class Ruleset:
+    __slots__ = (
+        'pokemon_mode',
+        'generation',
+        'gen_number',
+        'move_json',
+        'pokedex',
+        'pokedex_index',
+        'species',
+        'random_battle_sets',
+        'random_battle_index',
+        'hidden_power_type_string_index',
+        'hidden_power_active_move_base_damage_string',
+        'hidden_power_reserve_move_base_damage_string',
+        'request_dict_ability',
+        'terrain_damage_boost',
+        'pokemon_alive_static'
+    )
+
+    def __init__(self, pokemon_mode, **fields):
+        object.__setattr__(self, 'pokemon_mode', pokemon_mode)
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Ruleset is immutable - use `get_ruleset` to get the ruleset for another format")
+
+    def __reduce__(self):
+        # rulesets are rebuilt from their name when sent to another process
+        return get_ruleset, (self.pokemon_mode,)
+
+    @property
+    def is_random_battle(self):
+        return 'random' in self.pokemon_mode
+
+    @property
+    def pokemon_sets(self):
+        """The sets that unknown information about the opponent's pokemon is guessed from"""
+        if self.is_random_battle:
+            return self.random_battle_sets
+        return _standard_battle_sets.get(self.pokemon_mode, {})
+
+    @property
+    def pokemon_sets_index(self):
+        """A `PrefixIndex` of the names in `pokemon_sets`, made the first time it is needed after the sets are loaded"""
+        from data.name_index import PrefixIndex
+        pokemon_sets = self.pokemon_sets
+        index = _pokemon_sets_indexes.get(self.pokemon_mode)
+        if index is None or index[0] is not pokemon_sets:
+            index = (pokemon_sets, PrefixIndex(pokemon_sets))
+            _pokemon_sets_indexes[self.pokemon_mode] = index
+        return index[1]
+
+    def load_pokemon_sets(self, pokemon_sets=None):
+        """Loads the usage-stats for a standard battle format the first time it is needed
+           `pokemon_sets` can be given to use those sets instead of downloading them"""
+        if pokemon_sets is not None:
+            _standard_battle_sets[self.pokemon_mode] = MappingProxyType(pokemon_sets)
+            return
+        if self.is_random_battle or self.pokemon_mode in _standard_battle_sets:
+            return
+        from data.helpers import get_standard_battle_sets
+        with use_ruleset(self):
+            _standard_battle_sets[self.pokemon_mode] = MappingProxyType(get_standard_battle_sets(self.pokemon_mode))
+
+    def __repr__(self):
+        return "Ruleset({})".format(self.pokemon_mode)
+
+
+# usage-stats are downloaded so they are loaded lazily, but only once per format
+_standard_battle_sets = dict()
+
+# {pokemon_mode: (the sets, the index of their names)}
+_pokemon_sets_indexes = dict()
+
+
+@lru_cache(maxsize=None)
+def get_ruleset(pokemon_mode):
+    import data
+    from data.name_index import PrefixIndex
+    from data.random_battle_index import build_random_battle_index
+    from showdown.engine.evaluate import Scoring
+    from showdown.engine import damage_calculator
+
+    gen_number = int(pokemon_mode[3]) if pokemon_mode.startswith('gen') else CURRENT_GEN
+    logger.debug("Building the ruleset for {}".format(pokemon_mode))
+
+    if gen_number < CURRENT_GEN:
+        move_json = apply_mods_to_copy(data.base_move_json, 'move', gen_number)
+        pokedex = apply_mods_to_copy(data.base_pokedex, 'pokedex', gen_number)
+        with open(os.path.join(MODS_DIR, "random_battle_sets_gen7.json"), 'r') as f:
+            random_battle_sets = json.load(f)  # use random battle sets from gen7 if we are not in gen8
+    else:
+        move_json = data.base_move_json
+        pokedex = data.base_pokedex
+        random_battle_sets = data.base_random_battle_sets
+
+    if gen_number <= 5:
+        hidden_power_type_string_index = -2
+        hidden_power_active_move_base_damage_string = "70"
+        hidden_power_reserve_move_base_damage_string = "70"
+    else:
+        hidden_power_type_string_index = constants.HIDDEN_POWER_TYPE_STRING_INDEX
+        hidden_power_active_move_base_damage_string = constants.HIDDEN_POWER_ACTIVE_MOVE_BASE_DAMAGE_STRING
+        hidden_power_reserve_move_base_damage_string = constants.HIDDEN_POWER_RESERVE_MOVE_BASE_DAMAGE_STRING
+
+    return Ruleset(
+        pokemon_mode,
+        generation="gen{}".format(gen_number),
+        gen_number=gen_number,
+        move_json=MappingProxyType(move_json),
+        pokedex=MappingProxyType(pokedex),
+        pokedex_index=PrefixIndex(pokedex),
+        species=dict(),  # filled in by `data.species.get_species`
+        random_battle_sets=MappingProxyType(random_battle_sets),
+        random_battle_index=build_random_battle_index(random_battle_sets),
+        hidden_power_type_string_index=hidden_power_type_string_index,
+        hidden_power_active_move_base_damage_string=hidden_power_active_move_base_damage_string,
+        hidden_power_reserve_move_base_damage_string=hidden_power_reserve_move_base_damage_string,
+        request_dict_ability="baseAbility" if gen_number <= 6 else constants.ABILITY,
+        terrain_damage_boost=(
+            damage_calculator.TERRAIN_DAMAGE_BOOST if gen_number >= CURRENT_GEN else damage_calculator.PRE_GEN_8_TERRAIN_DAMAGE_BOOST
+        ),
+        pokemon_alive_static=(
+            Scoring.RANDOM_BATTLE_POKEMON_ALIVE_STATIC if 'random' in pokemon_mode else Scoring.POKEMON_ALIVE_STATIC
+        )
+    )
+
+
+_current_ruleset = contextvars.ContextVar('ruleset')
+
+
+def current_ruleset():
+    ruleset = _current_ruleset.get(None)
+    if ruleset is None:
+        return get_ruleset(DEFAULT_POKEMON_MODE)
+    return ruleset
+
+
+def set_ruleset(ruleset):
+    """Sets the ruleset for the current context and returns a token that can be given to `reset_ruleset`
+       On Python 3.7+ every asyncio task runs in a copy of the context it was created in, so setting the ruleset
+       in one battle's task does not affect the other running battles"""
+    return _current_ruleset.set(ruleset)
+
+
+def reset_ruleset(token):
+    _current_ruleset.reset(token)
+
+
+@contextmanager
+def use_ruleset(ruleset):
+    token = set_ruleset(ruleset)
+    try:
+        yield ruleset
+    finally:
+        reset_ruleset(token)
+
+
+class CurrentRulesetMapping(Mapping):
+    """A read-only view of one of the mappings of the current ruleset"""
+
+    __slots__ = ('attribute',)
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+
+    def mapping(self):
+        return getattr(current_ruleset(), self.attribute)
+
+    def __getitem__(self, key):
+        return getattr(current_ruleset(), self.attribute)[key]
+
+    def __contains__(self, key):
+        return key in getattr(current_ruleset(), self.attribute)
+
+    def get(self, key, default=None):
+        return getattr(current_ruleset(), self.attribute).get(key, default)
+
+    def __iter__(self):
+        return iter(self.mapping())
+
+    def __len__(self):
+        return len(self.mapping())
+
+    def keys(self):
+        return self.mapping().keys()
+
+    def items(self):
+        return self.mapping().items()
+
+    def values(self):
+        return self.mapping().values()
+
+    def __repr__(self):
+        return "CurrentRulesetMapping({})".format(self.attribute)
@@ -0,0 +1,171 @@
+"""Parsed Smogon usage-stats kept on disk and in memory
+
+Stats are keyed by the game-mode and the month Smogon published them under and are
+stored already parsed, so they are downloaded and parsed once per month instead of
+once per battle. When `SMOGON_STATS_TOP_K` is set only that many of the most likely entries of
+each section are kept. The cache can be filled from moveset files that were downloaded by hand:
+
+    python -m data.smogon_stats_cache gen8ou-0.txt gen8uu-0.txt [--month 2020-05]
+"""
+import os
+import sys
+import json
+import ntpath
+import argparse
+import threading
+from collections import defaultdict
+
+import requests
+
+import config
+from data.parse_smogon_stats import get_smogon_stats_url
+from data.parse_smogon_stats import get_smogon_stats_month
+from data.parse_smogon_stats import get_smogon_stats_game_mode
+from data.parse_smogon_stats import parse_pokemon_information
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'smogon_stats')
+
+# bump this when the parsed format changes so old files are parsed again
+CACHE_VERSION = 2
+
+# Smogon publishes a month's stats a few days into the next month
+MONTH_DELTAS = (1, 2)
+
+_memory_cache = dict()
+_key_locks = defaultdict(threading.Lock)
+_key_locks_lock = threading.Lock()
+
+
+def get_cache_dir():
+    return config.smogon_stats_cache_dir or DEFAULT_CACHE_DIR
+
+
+def get_top_k():
+    return config.smogon_stats_top_k
+
+
+def get_cache_path(game_mode, month, cache_dir=None, top_k=None):
+    file_name = game_mode if top_k is None else "{}-top{}".format(game_mode, top_k)
+    return os.path.join(cache_dir or get_cache_dir(), month, "{}.json".format(file_name))
+
+
+def _lock_for(key):
+    with _key_locks_lock:
+        return _key_locks[key]
+
+
+def load_from_disk(game_mode, month, cache_dir=None, top_k=None):
+    """Returns the cached stats, or None if there are none or they were written by an older version"""
+    path = get_cache_path(game_mode, month, cache_dir, top_k)
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning("Ignoring unreadable usage stats cache: {}".format(path))
+        return None
+
+    if cached.get('version') != CACHE_VERSION:
+        return None
+    return cached['pokemon']
+
+
+def save_to_disk(game_mode, month, pokemon_information, cache_dir=None, top_k=None):
+    path = get_cache_path(game_mode, month, cache_dir, top_k)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # written to a temporary file first so another process never reads half of it
+    temporary_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temporary_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'pokemon': pokemon_information}, f, separators=(',', ':'))
+    os.replace(temporary_path, path)
+
+
+def download(game_mode, month, top_k=None):
+    """Returns the parsed stats, or None if Smogon does not have them or cannot be reached
+       The response is parsed as it is streamed so the whole document is never held in memory"""
+    url = get_smogon_stats_url(game_mode, month)
+    logger.debug("Making HTTP request to {} for usage stats".format(url))
+    try:
+        with requests.get(url, stream=True) as r:
+            if r.status_code != 200:
+                logger.debug("No usage stats at {}: {}".format(url, r.status_code))
+                return None
+            return parse_pokemon_information(r.iter_lines(decode_unicode=True), top_k=top_k)
+    except requests.RequestException as e:
+        logger.warning("Could not download usage stats from {}: {}".format(url, e))
+        return None
+
+
+def _get_cached(game_mode, month, cache_dir, top_k):
+    key = (cache_dir, game_mode, month, top_k)
+    if key not in _memory_cache:
+        pokemon_information = load_from_disk(game_mode, month, cache_dir, top_k)
+        if pokemon_information is None:
+            return None
+        _memory_cache[key] = pokemon_information
+    return _memory_cache[key]
+
+
+def get_usage_stats(game_mode, cache_dir=None, top_k=None):
+    """Returns the parsed stats for `game_mode` from the most recent month that has them
+       Each month is looked up in memory, then on disk and then downloaded"""
+    game_mode = get_smogon_stats_game_mode(game_mode)
+    cache_dir = cache_dir or get_cache_dir()
+    top_k = top_k or get_top_k()
+
+    # concurrent battles in the same format wait for one download instead of each making their own
+    with _lock_for((cache_dir, game_mode)):
+        for month_delta in MONTH_DELTAS:
+            month = get_smogon_stats_month(month_delta)
+            pokemon_information = _get_cached(game_mode, month, cache_dir, top_k)
+            if pokemon_information is None:
+                pokemon_information = download(game_mode, month, top_k)
+                if pokemon_information is None:
+                    continue
+                save_to_disk(game_mode, month, pokemon_information, cache_dir, top_k)
+                pokemon_information = _get_cached(game_mode, month, cache_dir, top_k)
+            return pokemon_information
+
+    logger.warning("No usage stats found for {}".format(game_mode))
+    return dict()
+
+
+def seed_from_file(path, game_mode=None, month=None, cache_dir=None, top_k=None):
+    """Parses a moveset file that was downloaded from Smogon and puts it in the cache
+       The game-mode is taken from a file name like `gen8ou-0.txt` when it is not given"""
+    if game_mode is None:
+        game_mode = ntpath.basename(path).rsplit('-', 1)[0]
+    game_mode = get_smogon_stats_game_mode(game_mode)
+    month = month or get_smogon_stats_month()
+    top_k = top_k or get_top_k()
+
+    with open(path, 'rb') as f:
+        pokemon_information = parse_pokemon_information(f, top_k=top_k)
+
+    save_to_disk(game_mode, month, pokemon_information, cache_dir, top_k)
+    _memory_cache.pop((cache_dir or get_cache_dir(), game_mode, month, top_k), None)
+    logger.debug("Seeded the usage stats for {} {} from {}".format(game_mode, month, path))
+    return game_mode, month
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the usage stats cache from Smogon moveset files")
+    parser.add_argument('files', nargs='+', help="moveset files named like the ones on Smogon, e.g. gen8ou-0.txt")
+    parser.add_argument('--month', help="the YYYY-MM the stats are for (default: last month)")
+    parser.add_argument('--cache-dir', help="defaults to {}".format(DEFAULT_CACHE_DIR))
+    parser.add_argument('--top-k', type=int, help="only keep this many of the most likely entries of each section")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        game_mode, month = seed_from_file(path, month=args.month, cache_dir=args.cache_dir, top_k=args.top_k)
+        print("{} -> {}".format(path, get_cache_path(game_mode, month, args.cache_dir, args.top_k)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
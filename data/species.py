@@ -0,0 +1,52 @@
+"""The pokedex entry of each species read once
+
+Pokemon are made again for the whole team on every request from the server, so what they need from the
+pokedex - including finding the entry of a forme that is not in it - is remembered per ruleset"""
+import logging
+from collections import namedtuple
+
+import constants
+from data.ruleset import current_ruleset
+from showdown.engine.helpers import normalize_name
+from showdown.engine.search_stats import record_process_cache
+
+logger = logging.getLogger(__name__)
+
+
+# `name` is the name of the pokedex entry, `abilities` are the normalized names of the abilities the species can have
+# `base_stats` and `types` are the pokedex's own objects and are not modified
+Species = namedtuple('Species', ['name', 'base_stats', 'types', 'abilities'])
+
+
+def get_species(name):
+    """The `Species` of the normalized `name`, using the first pokedex entry that `name` starts with if it has none
+       Raises KeyError if there is no such entry either"""
+    ruleset = current_ruleset()
+    try:
+        species = ruleset.species[name]
+    except KeyError:
+        pass
+    else:
+        record_process_cache('species', True)
+        return species
+
+    record_process_cache('species', False)
+
+    pokedex_name = name
+    if pokedex_name not in ruleset.pokedex:
+        logger.info("Could not pokedex entry for {}".format(name))
+        pokedex_name = ruleset.pokedex_index.first_prefix_of(name)
+        if pokedex_name is None:
+            raise KeyError(name)
+        logger.info("Using {} instead".format(pokedex_name))
+
+    entry = ruleset.pokedex[pokedex_name]
+    species = Species(
+        pokedex_name,
+        entry[constants.BASESTATS],
+        entry[constants.TYPES],
+        tuple(normalize_name(a) for a in entry[constants.ABILITIES].values())
+    )
+    ruleset.species[name] = species
+    return species
+
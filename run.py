@@ -12,6 +12,8 @@ import logging
 from teams import load_team
 from showdown.run_battle import pokemon_battle
 from showdown.websocket_client import PSWebsocketClient
+from showdown.websocket_client import MessageRecorder
+from showdown.message_router import MessageRouter
 
 from data import all_move_json
 from data import pokedex
@@ -30,6 +32,8 @@ def parse_configs():
     config.use_relative_weights = env.bool("USE_RELATIVE_WEIGHTS", config.use_relative_weights)
     config.gambit_exe_path = env("GAMBIT_PATH", config.gambit_exe_path)
     config.search_depth = int(env("MAX_SEARCH_DEPTH", config.search_depth))
+    config.prepare_battles_budget = env.int("PREPARE_BATTLES_BUDGET", config.prepare_battles_budget)
+    config.prepare_battles_sampling = env("PREPARE_BATTLES_SAMPLING", config.prepare_battles_sampling)
     config.greeting_message = env("GREETING_MESSAGE", config.greeting_message)
     config.battle_ending_message = env("BATTLE_OVER_MESSAGE", config.battle_ending_message)
     config.websocket_uri = env("WEBSOCKET_URI", "sim.smogon.com:8000")
@@ -37,8 +41,13 @@ def parse_configs():
     config.password = env("PS_PASSWORD", "")
     config.bot_mode = env("BOT_MODE")
     config.team_name = env("TEAM_NAME", None)
-    config.pokemon_mode = env("POKEMON_MODE", constants.DEFAULT_MODE)
+    config.pokemon_modes = env.list("POKEMON_MODE", [constants.DEFAULT_MODE])
+    config.pokemon_mode = config.pokemon_modes[0]
     config.run_count = int(env("RUN_COUNT", 1))
+    config.record_messages_path = env("RECORD_MESSAGES", config.record_messages_path)
+    config.max_concurrent_battles = int(env("MAX_CONCURRENT_BATTLES", config.max_concurrent_battles))
+    config.smogon_stats_cache_dir = env("SMOGON_STATS_CACHE_DIR", config.smogon_stats_cache_dir)
+    config.smogon_stats_top_k = env.int("SMOGON_STATS_TOP_K", config.smogon_stats_top_k)
 
     if config.bot_mode == constants.CHALLENGE_USER:
         config.user_to_challenge = env("USER_TO_CHALLENGE")
@@ -51,7 +60,7 @@ def check_dictionaries_are_unmodified(original_pokedex, original_move_json):
     if original_move_json != all_move_json:
         logger.critical("Move JSON changed!\nDumping modified version to `modified_moves.json`")
         with open("modified_moves.json", 'w') as f:
-            json.dump(all_move_json, f, indent=4)
+            json.dump(dict(all_move_json), f, indent=4)
         exit(1)
     else:
         logger.debug("Move JSON unmodified!")
@@ -59,7 +68,7 @@ def check_dictionaries_are_unmodified(original_pokedex, original_move_json):
     if original_pokedex != pokedex:
         logger.critical("Pokedex JSON changed!\nDumping modified version to `modified_pokedex.json`")
         with open("modified_pokedex.json", 'w') as f:
-            json.dump(pokedex, f, indent=4)
+            json.dump(dict(pokedex), f, indent=4)
         exit(1)
     else:
         logger.debug("Pokedex JSON unmodified!")
@@ -70,27 +79,32 @@ async def showdown():
 
     apply_mods(config.pokemon_mode)
 
-    original_pokedex = deepcopy(pokedex)
-    original_move_json = deepcopy(all_move_json)
+    original_pokedex = deepcopy(dict(pokedex))
+    original_move_json = deepcopy(dict(all_move_json))
 
-    ps_websocket_client = await PSWebsocketClient.create(config.username, config.password, config.websocket_uri)
+    recorder = None
+    if config.record_messages_path:
+        recorder = MessageRecorder(
+            config.record_messages_path,
+            pokemon_mode=config.pokemon_mode,
+            battle_bot=config.battle_bot_module,
+            username=config.username
+        )
+
+    ps_websocket_client = await PSWebsocketClient.create(config.username, config.password, config.websocket_uri, recorder=recorder)
     await ps_websocket_client.login()
 
+    if config.max_concurrent_battles > 1:
+        await play_concurrent_battles(ps_websocket_client, original_pokedex, original_move_json)
+        return
+
     battles_run = 0
     wins = 0
     losses = 0
     while True:
-        team = load_team(config.team_name)
-        if config.bot_mode == constants.CHALLENGE_USER:
-            await ps_websocket_client.challenge_user(config.user_to_challenge, config.pokemon_mode, team)
-        elif config.bot_mode == constants.ACCEPT_CHALLENGE:
-            await ps_websocket_client.accept_challenge(config.pokemon_mode, team)
-        elif config.bot_mode == constants.SEARCH_LADDER:
-            await ps_websocket_client.search_for_match(config.pokemon_mode, team)
-        else:
-            raise ValueError("Invalid Bot Mode")
+        pokemon_mode = await request_battle(ps_websocket_client, next_pokemon_mode(battles_run))
 
-        winner = await pokemon_battle(ps_websocket_client, config.pokemon_mode)
+        winner = await pokemon_battle(ps_websocket_client, pokemon_mode)
 
         if winner == config.username:
             wins += 1
@@ -106,5 +120,63 @@ async def showdown():
             break
 
 
+def next_pokemon_mode(battles_started):
+    """The formats in POKEMON_MODE are played in turn"""
+    return config.pokemon_modes[battles_started % len(config.pokemon_modes)]
+
+
+async def request_battle(ps_websocket_client, pokemon_mode):
+    """Requests a battle in `pokemon_mode` and returns the format the battle will be in
+       A challenge in any of the formats in POKEMON_MODE is accepted, so that is the format of the accepted challenge"""
+    team = load_team(config.team_name)
+    if config.bot_mode == constants.CHALLENGE_USER:
+        await ps_websocket_client.challenge_user(config.user_to_challenge, pokemon_mode, team)
+    elif config.bot_mode == constants.ACCEPT_CHALLENGE:
+        pokemon_mode = await ps_websocket_client.accept_challenge(config.pokemon_modes, team)
+    elif config.bot_mode == constants.SEARCH_LADDER:
+        await ps_websocket_client.search_for_match(pokemon_mode, team)
+    else:
+        raise ValueError("Invalid Bot Mode")
+    return pokemon_mode
+
+
+async def play_concurrent_battles(ps_websocket_client, original_pokedex, original_move_json):
+    """Plays up to `config.max_concurrent_battles` battles at once over the same connection
+
+    A router reads every message and hands each battle's messages to the coroutine playing that battle.
+    Only one battle is requested at a time so each new battle-room can be given to the coroutine that asked for it,
+    along with the format it was requested in - battles in all of the formats in POKEMON_MODE are played at once"""
+    router = MessageRouter(ps_websocket_client)
+    router_task = asyncio.ensure_future(router.run())
+    lobby = router.lobby()
+    lobby_lock = asyncio.Lock()
+    results = {'started': 0, 'wins': 0, 'losses': 0}
+
+    async def battle_worker():
+        while True:
+            async with lobby_lock:
+                if results['started'] >= config.run_count:
+                    return
+                pokemon_mode = next_pokemon_mode(results['started'])
+                results['started'] += 1
+                pokemon_mode = await request_battle(lobby, pokemon_mode)
+                battle_client = await router.next_battle()
+
+            winner = await pokemon_battle(battle_client, pokemon_mode)
+
+            if winner == config.username:
+                results['wins'] += 1
+            else:
+                results['losses'] += 1
+
+            logger.info("W: {}\tL: {}".format(results['wins'], results['losses']))
+
+            check_dictionaries_are_unmodified(original_pokedex, original_move_json)
+
+    try:
+        await asyncio.gather(*(battle_worker() for _ in range(config.max_concurrent_battles)))
+    finally:
+        router_task.cancel()
+
 if __name__ == "__main__":
     asyncio.get_event_loop().run_until_complete(showdown())
@@ -1,3 +1,5 @@
+import math
+import random
 import itertools
 from collections import defaultdict
 from collections import namedtuple
@@ -12,13 +14,12 @@ import logging
 
 import data
 from data import all_move_json
-from data import pokedex
 from data.parse_smogon_stats import MOVES_STRING
 from data.parse_smogon_stats import SPREADS_STRING
 from data.parse_smogon_stats import ABILITY_STRING
 from data.parse_smogon_stats import ITEM_STRING
+from data.species import get_species
 from data.helpers import get_pokemon_sets
-from data.helpers import get_standard_battle_sets
 from data.helpers import get_mega_pkmn_name
 from data.helpers import PASS_ITEMS
 from data.helpers import PASS_ABILITIES
@@ -27,17 +28,21 @@ from data.helpers import get_most_likely_item
 from data.helpers import get_most_likely_ability
 from data.helpers import get_most_likely_spread
 from data.helpers import get_all_possible_moves_for_random_battle
+from data.ruleset import current_ruleset
+from data.ruleset import get_ruleset
 
 from showdown.engine.objects import State
 from showdown.engine.objects import Side
 from showdown.engine.objects import Pokemon as TransposePokemon
 
-from showdown.engine.helpers import remove_duplicate_spreads
+from showdown.engine.helpers import spreads_are_alike
 from showdown.engine.helpers import get_pokemon_info_from_condition
 from showdown.engine.helpers import set_makes_sense
 from showdown.engine.helpers import normalize_name
 from showdown.engine.helpers import calculate_stats
 
+from showdown.set_belief import SetBelief
+
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +51,63 @@ LastUsedMove = namedtuple('LastUsedMove', ['pokemon_name', 'move', 'turn'])
 DamageDealt = namedtuple('DamageDealt', ['attacker', 'defender', 'move', 'percent_damage', 'crit'])
 
 
+PREPARE_BATTLES_TOP = 'top'
+PREPARE_BATTLES_SAMPLE = 'sample'
+
+
+def get_joint_probability(percentages):
+    probability = 1
+    for p in percentages:
+        probability *= p / 100
+    return probability
+
+
+def get_weighted_hypotheses(spreads, items, abilities, chance_move_combinations, budget=None):
+    """Each argument is a list of (value, percentage). Returns [((spread, item, ability, chance_moves), weight)]
+       where the weight is the joint probability of the percentages
+
+       Without a budget every combination is returned in order. With a budget only the `budget` most likely values of each
+       part can be in one of the `budget` most likely combinations, so the rest are never combined. The combinations are then
+       ordered most likely first, or in a weighted-random order when `config.prepare_battles_sampling` is 'sample'"""
+    parts = [spreads, items, abilities, chance_move_combinations]
+    if budget is not None:
+        parts = [get_most_likely(part, budget) for part in parts]
+    return combine_weighted_parts(parts, budget)
+
+
+def get_weighted_hypotheses_from_sets(sets, chance_move_combinations, budget=None):
+    """Like `get_weighted_hypotheses` with the (spread, item, ability) already joined together, as a `SetBelief` gives them
+       Every set is combined, even with a budget, so sets that become the same battle do not crowd out the others"""
+    if budget is not None:
+        chance_move_combinations = get_most_likely(chance_move_combinations, budget)
+    return [
+        ((spread, item, ability, chance_moves), weight)
+        for ((spread, item, ability), chance_moves), weight in combine_weighted_parts([sets, chance_move_combinations], budget)
+    ]
+
+
+def get_most_likely(weighted_values, count):
+    return sorted(weighted_values, key=lambda x: x[1], reverse=True)[:count]
+
+
+def combine_weighted_parts(parts, budget=None):
+    hypotheses = [
+        (tuple(value for value, _ in combination), get_joint_probability(percentage for _, percentage in combination))
+        for combination in itertools.product(*parts)
+    ]
+    if budget is None:
+        return hypotheses
+
+    if config.prepare_battles_sampling == PREPARE_BATTLES_SAMPLE:
+        # weighted sampling without replacement: each hypothesis is keyed by u^(1/weight), compared as log(u)/weight
+        # because u^(1/weight) underflows to 0 for the small joint probabilities of usage percentages
+        # 1 - random() is in (0, 1] so the log is always defined
+        keys = [math.log(1.0 - random.random()) / weight if weight > 0 else -math.inf for _, weight in hypotheses]
+        return [h for _, h in sorted(zip(keys, hypotheses), key=lambda x: x[0], reverse=True)]
+
+    return sorted(hypotheses, key=lambda x: x[1], reverse=True)
+
+
 class Battle(ABC):
 
     def __init__(self, battle_tag):
@@ -69,6 +131,17 @@ class Battle(ABC):
 
         self.request_json = None
 
+        # set by `find_best_move` to describe the work done for the most recent decision
+        self.search_stats = None
+
+        # the probability of this battle among the ones returned together by `prepare_battles`
+        self.weight = 1
+
+        # set on battles made by `copy_on_write_clone` - the battle they share everything else with
+        self.clone_of = None
+        # the state of this battle, made once for all of its clones
+        self.state_template = None
+
     def initialize_team_preview(self, user_json, opponent_pokemon, battle_mode):
         self.user.from_json(user_json, first_turn=True)
         self.user.reserve.insert(0, self.user.active)
@@ -78,8 +151,7 @@ class Battle(ABC):
             pokemon = Pokemon.from_switch_string(pkmn_string)
             self.opponent.reserve.append(pokemon)
 
-        smogon_usage_data = get_standard_battle_sets(battle_mode)
-        data.pokemon_sets = smogon_usage_data
+        get_ruleset(battle_mode).load_pokemon_sets()
 
         self.started = True
         self.rqid = user_json[constants.RQID]
@@ -91,18 +163,20 @@ class Battle(ABC):
         pkmn = Pokemon.from_switch_string(pkmn_information)
         self.opponent.active = pkmn
 
-        data.pokemon_sets = data.random_battle_sets
-
         self.started = True
         self.rqid = user_json[constants.RQID]
 
     def mega_evolve_possible(self):
-        return any(g in self.generation for g in constants.MEGA_EVOLVE_GENERATIONS) or 'nationaldex' in config.pokemon_mode
+        return any(g in self.generation for g in constants.MEGA_EVOLVE_GENERATIONS) or 'nationaldex' in current_ruleset().pokemon_mode
 
     def prepare_battles(self, guess_mega_evo_opponent=True, join_moves_together=False):
         """Returns a list of battles based on this one
         The battles have the opponent's reserve pokemon's unknowns filled in
         The opponent's active pokemon in each of the battles has a different set"""
+        # the belief is made on this battle's pokemon, not the copy's, so the next turn starts from it
+        if self.opponent.active is not None:
+            self.opponent.active.get_set_belief()
+
         battle_copy = deepcopy(self)
         battle_copy.opponent.lock_moves()
         battle_copy.user.lock_active_pkmn_first_turn_moves()
@@ -128,62 +202,118 @@ class Battle(ABC):
             battle_copy.opponent.active.guess_most_likely_attributes()
             return [battle_copy]
 
-        possible_spreads = sorted(pokemon_sets[SPREADS_STRING], key=lambda x: x[2], reverse=True)
-        possible_abilities = sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True)
-        possible_items = sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True)
         possible_moves = sorted(pokemon_sets[MOVES_STRING], key=lambda x: x[1], reverse=True)
 
-        spreads = battle_copy.opponent.active.get_possible_spreads(possible_spreads)
-        items = battle_copy.opponent.active.get_possible_items(possible_items)
-        abilities = battle_copy.opponent.active.get_possible_abilities(possible_abilities)
-        expected_moves, chance_moves = battle_copy.opponent.active.get_possible_moves(possible_moves, battle_copy.battle_type)
+        budget = config.prepare_battles_budget
+        opponent_active = battle_copy.opponent.active
+        expected_moves, chance_moves = opponent_active.get_possible_moves(possible_moves, battle_copy.battle_type)
 
         if join_moves_together:
-            chance_move_combinations = [chance_moves]
+            chance_move_combinations = [(tuple(chance_moves), 100)]
         else:
-            number_of_unknown_moves = max(4 - len(battle_copy.opponent.active.moves) - len(expected_moves), 0)
-            chance_move_combinations = list(itertools.combinations(chance_moves, number_of_unknown_moves))
-
-        combinations = list(itertools.product(spreads, items, abilities, chance_move_combinations))
-
-        # create battle clones for each of the combinations
+            move_percentages = dict(possible_moves)
+            number_of_unknown_moves = max(4 - len(opponent_active.moves) - len(expected_moves), 0)
+            chance_move_combinations = [
+                (moves, get_joint_probability(move_percentages.get(m, 100) for m in moves) * 100)
+                for moves in itertools.combinations(chance_moves, number_of_unknown_moves)
+            ]
+
+        # the belief has the sets the pokemon can have given everything seen so far
+        # it is only missing when there is nothing left in it that agrees with what was revealed
+        set_belief = opponent_active.get_set_belief()
+        weighted_sets = set_belief.weighted_sets(opponent_active) if set_belief is not None else []
+        if weighted_sets:
+            hypotheses = get_weighted_hypotheses_from_sets(weighted_sets, chance_move_combinations, budget)
+        else:
+            limit = budget is None
+            spreads = opponent_active.get_weighted_spreads(sorted(pokemon_sets[SPREADS_STRING], key=lambda x: x[2], reverse=True), limit=limit)
+            items = opponent_active.get_weighted_items(sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True), limit=limit)
+            abilities = opponent_active.get_weighted_abilities(sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True), limit=limit)
+            hypotheses = get_weighted_hypotheses(spreads, items, abilities, chance_move_combinations, budget)
+
+        # create battle clones for each of the hypotheses
+        # clones only differ by the opponent's active pokemon so hypotheses giving the same engine pokemon are
+        # the same position - they are searched once with their weights added together
         battles = list()
-        for c in combinations:
-            new_battle = deepcopy(battle_copy)
+        battles_by_state_key = dict()
+        for (spread, item, ability, chance_move_combination), weight in hypotheses:
+            if budget is not None and len(battles) >= budget:
+                break
 
-            all_moves = [m.name for m in new_battle.opponent.active.moves]
+            all_moves = [m.name for m in opponent_active.moves]
             all_moves += expected_moves
-            all_moves += c[3]
+            all_moves += chance_move_combination
             all_moves = [Move(m) for m in all_moves]
+            if not join_moves_together and not set_makes_sense(spread[0], spread[1], item, ability, all_moves):
+                continue
+
+            new_battle = battle_copy.copy_on_write_clone()
+            new_battle.opponent.active.set_spread(spread[0], spread[1])
+            if new_battle.opponent.active.name == 'ditto':
+                new_battle.opponent.active.stats = battle_copy.opponent.active.stats
+            new_battle.opponent.active.item = item
+            new_battle.opponent.active.ability = ability
+            for m in expected_moves:
+                new_battle.opponent.active.add_move(m)
+            for m in chance_move_combination:
+                new_battle.opponent.active.add_move(m)
+            new_battle.opponent.lock_moves()
 
-            if join_moves_together or set_makes_sense(c[0][0], c[0][1], c[1], c[2], all_moves):
-                new_battle.opponent.active.set_spread(c[0][0], c[0][1])
-                if new_battle.opponent.active.name == 'ditto':
-                    new_battle.opponent.active.stats = battle_copy.opponent.active.stats
-                new_battle.opponent.active.item = c[1]
-                new_battle.opponent.active.ability = c[2]
-                for m in expected_moves:
-                    new_battle.opponent.active.add_move(m)
-                for m in c[3]:
-                    new_battle.opponent.active.add_move(m)
+            state_key = new_battle.opponent.active.to_engine_pokemon().state_key()
+            if state_key in battles_by_state_key:
+                battles_by_state_key[state_key].weight += weight
+                logger.debug("Same position as a previous set for opponent's {}:\t{} {} {} {} {}".format(opponent_active.name, spread[0], spread[1], item, ability, all_moves))
+                continue
 
-                logger.debug("Possible set for opponent's {}:\t{} {} {} {} {}".format(battle_copy.opponent.active.name, c[0][0], c[0][1], c[1], c[2], all_moves))
-                battles.append(new_battle)
+            new_battle.weight = weight
+            logger.debug("Possible set for opponent's {}:\t{} {} {} {} {} weight={}".format(opponent_active.name, spread[0], spread[1], item, ability, all_moves, weight))
+            battles_by_state_key[state_key] = new_battle
+            battles.append(new_battle)
 
-            new_battle.opponent.lock_moves()
+        if not battles:
+            return [battle_copy]
 
-        return battles if battles else [battle_copy]
+        total_weight = sum(b.weight for b in battles)
+        for b in battles:
+            b.weight = b.weight / total_weight if total_weight else 1 / len(battles)
+
+        return battles
+
+    def copy_on_write_clone(self):
+        """Returns a copy of this battle that has its own copy of the opponent's active pokemon and shares everything else
+           Only the opponent's active pokemon of the clone can be modified - neither battle's shared parts can change"""
+        clone = copy(self)
+        clone.opponent = copy(self.opponent)
+        clone.opponent.active = deepcopy(self.opponent.active)
+        clone.clone_of = self.clone_of or self
+        clone.state_template = None
+        return clone
+
+    def __deepcopy__(self, memo):
+        """Copies only the parts of the battle that can change. The request is replaced, never changed, so it is shared
+           The copy does not share anything with a battle it was cloned from"""
+        battle_copy = copy(self)
+        memo[id(self)] = battle_copy
+        battle_copy.user = deepcopy(self.user, memo)
+        battle_copy.opponent = deepcopy(self.opponent, memo)
+        battle_copy.search_stats = deepcopy(self.search_stats, memo)
+        battle_copy.clone_of = None
+        battle_copy.state_template = None
+        return battle_copy
 
     def create_state(self):
-        user_active = TransposePokemon.from_state_pokemon_dict(self.user.active.to_dict())
+        if self.clone_of is not None:
+            return self.clone_of.create_state_with_opponent_active(self.opponent.active)
+
+        user_active = self.user.active.to_engine_pokemon()
         user_reserve = dict()
         for mon in self.user.reserve:
-            user_reserve[mon.name] = TransposePokemon.from_state_pokemon_dict(mon.to_dict())
+            user_reserve[mon.name] = mon.to_engine_pokemon()
 
-        opponent_active = TransposePokemon.from_state_pokemon_dict(self.opponent.active.to_dict())
+        opponent_active = self.opponent.active.to_engine_pokemon()
         opponent_reserve = dict()
         for mon in self.opponent.reserve:
-            opponent_reserve[mon.name] = TransposePokemon.from_state_pokemon_dict(mon.to_dict())
+            opponent_reserve[mon.name] = mon.to_engine_pokemon()
 
         user = Side(user_active, user_reserve, copy(self.user.wish), copy(self.user.side_conditions))
         opponent = Side(opponent_active, opponent_reserve, copy(self.opponent.wish), copy(self.opponent.side_conditions))
@@ -191,6 +321,20 @@ class Battle(ABC):
         state = State(user, opponent, self.weather, self.field, self.trick_room)
         return state
 
+    def create_state_with_opponent_active(self, opponent_active):
+        """The state of this battle with a different opponent's active pokemon
+           The rest of the state is only converted the first time and is copied after that"""
+        if self.state_template is None:
+            self.state_template = self.create_state()
+        template = self.state_template
+        return State(
+            template.self.copy(),
+            template.opponent.copy(active=opponent_active.to_engine_pokemon()),
+            template.weather,
+            template.field,
+            template.trick_room
+        )
+
     def get_all_options(self):
         force_switch = self.force_switch or self.user.active.hp <= 0
         wait = self.wait or self.opponent.active.hp <= 0
@@ -256,6 +400,14 @@ class Battler:
 
         self.last_used_move = LastUsedMove('', '', 0)
 
+    def __deepcopy__(self, memo):
+        battler_copy = copy(self)
+        memo[id(self)] = battler_copy
+        battler_copy.active = deepcopy(self.active, memo)
+        battler_copy.reserve = [deepcopy(pkmn, memo) for pkmn in self.reserve]
+        battler_copy.side_conditions = copy(self.side_conditions)
+        return battler_copy
+
     def mega_revealed(self):
         return self.active.is_mega or any(p.is_mega for p in self.reserve)
 
@@ -305,7 +457,7 @@ class Battler:
         for index, pkmn_dict in enumerate(user_json[constants.SIDE][constants.POKEMON]):
 
             pkmn = Pokemon.from_switch_string(pkmn_dict[constants.DETAILS])
-            pkmn.ability = pkmn_dict[constants.REQUEST_DICT_ABILITY]
+            pkmn.ability = pkmn_dict[current_ruleset().request_dict_ability]
             pkmn.index = index + 1
             pkmn.hp, pkmn.max_hp, pkmn.status = get_pokemon_info_from_condition(pkmn_dict[constants.CONDITION])
             for stat, number in pkmn_dict[constants.STATS].items():
@@ -354,7 +506,7 @@ class Battler:
             if move[constants.ID] == constants.HIDDEN_POWER:
                 self.active.add_move('{}{}'.format(
                         constants.HIDDEN_POWER,
-                        move['move'].split()[constants.HIDDEN_POWER_TYPE_STRING_INDEX].lower()
+                        move['move'].split()[current_ruleset().hidden_power_type_string_index].lower()
                     )
                 )
             else:
@@ -396,13 +548,9 @@ class Pokemon:
         self.nature = nature
         self.evs = evs
 
-        try:
-            self.base_stats = pokedex[self.name][constants.BASESTATS]
-        except KeyError:
-            logger.info("Could not pokedex entry for {}".format(self.name))
-            self.name = [k for k in pokedex if self.name.startswith(k)][0]
-            logger.info("Using {} instead".format(self.name))
-            self.base_stats = pokedex[self.name][constants.BASESTATS]
+        species = get_species(self.name)
+        self.name = species.name
+        self.base_stats = species.base_stats
 
         self.stats = calculate_stats(self.base_stats, self.level, nature=nature, evs=evs)
 
@@ -413,7 +561,7 @@ class Pokemon:
             self.hp = 1
 
         self.ability = None
-        self.types = pokedex[self.name][constants.TYPES]
+        self.types = species.types
         self.item = constants.UNKNOWN_ITEM
 
         self.fainted = False
@@ -430,6 +578,13 @@ class Pokemon:
         self.can_have_life_orb = True
         self.can_have_heavydutyboots = True
 
+        # made by `get_set_belief` the first time the set of this pokemon is guessed
+        self.set_belief = None
+
+        # the engine pokemon made by `to_engine_pokemon` and what this pokemon was when it was made
+        self.engine_pokemon = None
+        self.engine_pokemon_key = None
+
     def forme_change(self, new_pkmn_name):
         hp_percent = float(self.hp) / self.max_hp
         moves = self.moves
@@ -518,58 +673,116 @@ class Pokemon:
         self.set_likely_moves_unless_revealed()
         self.set_most_likely_spread()
 
+    def get_set_belief(self):
+        """The belief about this pokemon's set, made from the usage-stats the first time it is needed
+           Returns None if there are no usage-stats for this pokemon"""
+        if self.set_belief is None or self.set_belief.pokemon_name != self.name:
+            try:
+                pokemon_sets = get_pokemon_sets(self.name)
+            except KeyError:
+                return None
+
+            # with a budget every candidate is weighed instead of stopping at the usual cutoffs
+            limit = config.prepare_battles_budget is None
+
+            # nothing has been revealed about a new pokemon so its candidates are not filtered by what this one revealed
+            unrevealed = Pokemon(self.name, self.level)
+            self.set_belief = SetBelief.from_usage(
+                self.name,
+                unrevealed.get_weighted_spreads(sorted(pokemon_sets[SPREADS_STRING], key=lambda x: x[2], reverse=True), limit=limit),
+                unrevealed.get_weighted_items(sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True), limit=limit),
+                unrevealed.get_weighted_abilities(sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True), limit=limit)
+            )
+        return self.set_belief
+
+    def get_possible_items_and_abilities(self):
+        """Returns the [(item, ability)] that `Battle.prepare_battles` guesses from for this pokemon"""
+        set_belief = self.get_set_belief()
+        weighted_sets = set_belief.weighted_sets(self) if set_belief is not None else []
+        if weighted_sets:
+            return list(dict.fromkeys((item, ability) for (_, item, ability), _ in weighted_sets))
+
+        try:
+            pokemon_sets = get_pokemon_sets(self.name)
+        except KeyError:
+            item = self.item if self.item != constants.UNKNOWN_ITEM else get_most_likely_item(self.name)
+            ability = self.ability if self.ability is not None else get_most_likely_ability(self.name)
+            return [(item, ability)]
+
+        limit = config.prepare_battles_budget is None
+        items = self.get_weighted_items(sorted(pokemon_sets[ITEM_STRING], key=lambda x: x[1], reverse=True), limit=limit)
+        abilities = self.get_weighted_abilities(sorted(pokemon_sets[ABILITY_STRING], key=lambda x: x[1], reverse=True), limit=limit)
+        return [(item, ability) for item, _ in items for ability, _ in abilities]
+
     def get_possible_spreads(self, spreads):
+        return [s for s, _ in self.get_weighted_spreads(spreads)]
+
+    def get_weighted_spreads(self, spreads, limit=True):
+        """Returns [((nature, evs), percentage)]. The percentage of spreads that are alike is added to the first of them
+           `limit` stops at the usual cutoffs instead of giving every spread"""
         # update this once you can use previous attacks to rule out spreads
         cumulative_percentage = 0
         possible_spreads = []
         for s in spreads:
             cumulative_percentage += s[2]
-            possible_spreads.append(s[:2])
-            if s[2] < 20 or cumulative_percentage >= 80:
+            for i, (spread, percentage) in enumerate(possible_spreads):
+                if spreads_are_alike(spread, s[:2]):
+                    possible_spreads[i] = (spread, percentage + s[2])
+                    break
+            else:
+                possible_spreads.append((tuple(s[:2]), s[2]))
+            if limit and (s[2] < 20 or cumulative_percentage >= 80):
                 break
 
-        return remove_duplicate_spreads(possible_spreads)
+        return possible_spreads
 
     def get_possible_items(self, items):
-        if self.item == constants.UNKNOWN_ITEM:
-            cumulative_percentage = 0
-            possible_items = []
-            for i in items:
-                if i[1] < 10 or cumulative_percentage >= 80:
-                    return possible_items if possible_items else [constants.UNKNOWN_ITEM]
-                elif i[0] in constants.CHOICE_ITEMS and not self.can_have_choice_item:
-                    pass
-                elif i[0] == 'lifeorb' and not self.can_have_life_orb:
-                    pass
-                elif i[0] == 'assaultvest' and not self.can_have_assaultvest:
-                    pass
-                elif i[0] == 'heavydutyboots' and not self.can_have_heavydutyboots:
-                    pass
-                elif i[0] not in PASS_ITEMS:
-                    possible_items.append(i[0])
-
-                cumulative_percentage += i[1]
-
-            return possible_items if possible_items else [constants.UNKNOWN_ITEM]
+        return [i for i, _ in self.get_weighted_items(items)]
 
-        else:
-            return [self.item]
+    def get_weighted_items(self, items, limit=True):
+        """Returns [(item, percentage)]. `limit` stops at the usual cutoffs instead of giving every item"""
+        if self.item != constants.UNKNOWN_ITEM:
+            return [(self.item, 100)]
+
+        cumulative_percentage = 0
+        possible_items = []
+        for i in items:
+            if limit and (i[1] < 10 or cumulative_percentage >= 80):
+                break
+            elif i[0] in constants.CHOICE_ITEMS and not self.can_have_choice_item:
+                pass
+            elif i[0] == 'lifeorb' and not self.can_have_life_orb:
+                pass
+            elif i[0] == 'assaultvest' and not self.can_have_assaultvest:
+                pass
+            elif i[0] == 'heavydutyboots' and not self.can_have_heavydutyboots:
+                pass
+            elif i[0] not in PASS_ITEMS:
+                possible_items.append((i[0], i[1]))
+
+            cumulative_percentage += i[1]
+
+        return possible_items if possible_items else [(constants.UNKNOWN_ITEM, 100)]
 
     def get_possible_abilities(self, abilities):
-        if self.ability is None:
-            cumulative_percentage = 0
-            possible_abilities = []
-            for i in abilities:
-                if i[1] < 10 or cumulative_percentage >= 80:
-                    return possible_abilities if possible_abilities else [None]
-                elif i[0] not in PASS_ABILITIES:
-                    possible_abilities.append(i[0])
-
-                cumulative_percentage += i[1]
-
-            return possible_abilities if possible_abilities else [None]
-        else:
-            return [self.ability]
+        return [a for a, _ in self.get_weighted_abilities(abilities)]
+
+    def get_weighted_abilities(self, abilities, limit=True):
+        """Returns [(ability, percentage)]. `limit` stops at the usual cutoffs instead of giving every ability"""
+        if self.ability is not None:
+            return [(self.ability, 100)]
+
+        cumulative_percentage = 0
+        possible_abilities = []
+        for i in abilities:
+            if limit and (i[1] < 10 or cumulative_percentage >= 80):
+                break
+            elif i[0] not in PASS_ABILITIES:
+                possible_abilities.append((i[0], i[1]))
+
+            cumulative_percentage += i[1]
+
+        return possible_abilities if possible_abilities else [(None, 100)]
 
     def get_possible_moves(self, moves, battle_type=constants.STANDARD_BATTLE):
         if battle_type == constants.RANDOM_BATTLE:
@@ -613,6 +826,65 @@ class Pokemon:
             constants.MOVES: [m.to_dict() for m in self.moves]
         }
 
+    def engine_key(self):
+        """Everything the engine pokemon is made from. The engine pokemon is only made again when this changes"""
+        return (
+            self.name,
+            self.level,
+            tuple(self.types),
+            self.hp,
+            self.max_hp,
+            self.ability,
+            self.item,
+            tuple(self.stats.items()),
+            self.nature,
+            tuple(self.evs),
+            self.boosts[constants.ATTACK],
+            self.boosts[constants.DEFENSE],
+            self.boosts[constants.SPECIAL_ATTACK],
+            self.boosts[constants.SPECIAL_DEFENSE],
+            self.boosts[constants.SPEED],
+            self.boosts[constants.ACCURACY],
+            self.boosts[constants.EVASION],
+            self.status,
+            tuple(self.volatile_statuses),
+            tuple((m.name, m.disabled, m.current_pp) for m in self.moves)
+        )
+
+    def to_engine_pokemon(self):
+        """A new engine pokemon for this pokemon, the same as `from_state_pokemon_dict(self.to_dict())`
+           Making one is much slower than copying one so the last one made is copied if this pokemon has not changed"""
+        key = self.engine_key()
+        if self.engine_pokemon is None or key != self.engine_pokemon_key:
+            self.engine_pokemon = TransposePokemon(
+                self.name,
+                self.level,
+                self.types,
+                self.hp,
+                self.max_hp,
+                self.ability,
+                self.item,
+                self.stats[constants.ATTACK],
+                self.stats[constants.DEFENSE],
+                self.stats[constants.SPECIAL_ATTACK],
+                self.stats[constants.SPECIAL_DEFENSE],
+                self.stats[constants.SPEED],
+                self.nature,
+                self.evs,
+                self.boosts[constants.ATTACK],
+                self.boosts[constants.DEFENSE],
+                self.boosts[constants.SPECIAL_ATTACK],
+                self.boosts[constants.SPECIAL_DEFENSE],
+                self.boosts[constants.SPEED],
+                self.boosts[constants.ACCURACY],
+                self.boosts[constants.EVASION],
+                self.status,
+                set(self.volatile_statuses),
+                [m.to_dict() for m in self.moves]
+            )
+            self.engine_pokemon_key = key
+        return self.engine_pokemon.copy()
+
     @classmethod
     def get_dummy(cls):
         p = Pokemon('pikachu', 100)
@@ -622,6 +894,19 @@ class Pokemon:
         p.fainted = True
         return p
 
+    def __deepcopy__(self, memo):
+        """The base-stats come from the pokedex and are never changed so they are shared"""
+        pokemon_copy = copy(self)
+        memo[id(self)] = pokemon_copy
+        pokemon_copy.stats = copy(self.stats)
+        pokemon_copy.evs = copy(self.evs)
+        pokemon_copy.types = copy(self.types)
+        pokemon_copy.moves = [deepcopy(m, memo) for m in self.moves]
+        pokemon_copy.volatile_statuses = copy(self.volatile_statuses)
+        pokemon_copy.boosts = copy(self.boosts)
+        pokemon_copy.set_belief = deepcopy(self.set_belief, memo)
+        return pokemon_copy
+
     def __eq__(self, other):
         return self.name == other.name and self.level == other.level
 
@@ -632,8 +917,9 @@ class Pokemon:
 class Move:
     def __init__(self, name):
         name = normalize_name(name)
-        if constants.HIDDEN_POWER in name and not name.endswith(constants.HIDDEN_POWER_ACTIVE_MOVE_BASE_DAMAGE_STRING):
-            name = "{}{}".format(name, constants.HIDDEN_POWER_ACTIVE_MOVE_BASE_DAMAGE_STRING)
+        hidden_power_base_damage_string = current_ruleset().hidden_power_active_move_base_damage_string
+        if constants.HIDDEN_POWER in name and not name.endswith(hidden_power_base_damage_string):
+            name = "{}{}".format(name, hidden_power_base_damage_string)
         move_json = all_move_json[name]
         self.name = name
         self.max_pp = int(move_json.get(constants.PP) * 1.6)
@@ -649,6 +935,10 @@ class Move:
             "current_pp": self.current_pp
         }
 
+    def __deepcopy__(self, memo):
+        # every attribute of a move is immutable
+        return copy(self)
+
     def __eq__(self, other):
         return self.name == other.name
 
@@ -4,6 +4,7 @@ from showdown.battle_bots.helpers import format_decision
 from showdown.engine.find_state_instructions import get_all_state_instructions
 from showdown.engine.select_best_move import pick_safest
 from showdown.engine.evaluate import evaluate
+from showdown.engine.search_stats import SearchStats
 import logging
 
 import random
@@ -53,32 +54,35 @@ def generate_payoff_matrix(value_map):
     return payoff_matrix
 
 
-def calculate_value(state, transition, depth):
+def calculate_value(state, transition, depth, stats=None):
     """
     Takes in the current state, a specific transition (pair of our move and opponent move), 
     and estimates the value associated with applying this transition at current search depth, 
     taking into account the probability of this transition occuring
     """
-    state_instructions = get_all_state_instructions(StateMutator(state), transition[0], transition[1])
+    state_instructions = get_all_state_instructions(StateMutator(state), transition[0], transition[1], stats=stats)
 
     total_value = 0
 
     for instruction in state_instructions:
         mutator = StateMutator(copy.deepcopy(state))
         mutator.apply(instruction.instructions)
-        value = expectiminimax(mutator.state, depth)
+        value = expectiminimax(mutator.state, depth, stats=stats)
         total_value += value * instruction.percentage
     
     return total_value
 
-def expectiminimax(state, depth):
+def expectiminimax(state, depth, stats=None):
     """
     Returns the expectiminimax value of a state down to a certain depth according to
     some evaluation function. Recurs by calling calculate_value on possible transitions.
     The calculate_value function acts as the algorithm's "chance node."  
     """
+    if stats is not None:
+        stats.nodes += 1
+
     if depth == 0:
-        return evaluate(state)
+        return evaluate(state, stats=stats)
 
     winner = state.battle_is_finished()
     if winner:
@@ -91,13 +95,13 @@ def expectiminimax(state, depth):
         transitions = get_transitions(state)
         value_of_transisitons = {}
         for transition in transitions:
-            value_of_transisitons[transition] = calculate_value(state, transition, depth - 1)
+            value_of_transisitons[transition] = calculate_value(state, transition, depth - 1, stats=stats)
 
         move, value = get_dominant_move(generate_payoff_matrix(value_of_transisitons))
 
         return value
 
-def get_value_map(battle, depth):
+def get_value_map(battle, depth, stats=None):
     """
     Returns a dictionary of transistions to expectiminimax values at a certain depth for
     a single possible hidden state of the partially observable game. 
@@ -107,7 +111,7 @@ def get_value_map(battle, depth):
 
     value_of_transisitons = {}
     for transition in transitions:
-        value_of_transisitons[transition] = calculate_value(state, transition, depth - 1)
+        value_of_transisitons[transition] = calculate_value(state, transition, depth - 1, stats=stats)
 
     return value_of_transisitons
 
@@ -141,11 +145,15 @@ class BattleBot(Battle):
 
         This function finds the best move to make based on the expeciminimax algorithm.
         """
-        battles = self.prepare_battles(join_moves_together=True)
+        self.search_stats = SearchStats()
+        with self.search_stats.phase('prepare_battles'):
+            battles = self.prepare_battles(join_moves_together=True)
+        self.search_stats.clones += len(battles)
         value_maps = []
 
-        for b in battles:
-            value_maps.append(get_value_map(b, DEPTH))
+        with self.search_stats.phase('search'):
+            for b in battles:
+                value_maps.append(get_value_map(b, DEPTH, stats=self.search_stats))
 
         best_move, value = get_best_move(value_maps)
         return format_decision(self, best_move)
\ No newline at end of file
@@ -4,6 +4,7 @@ from showdown.battle_bots.helpers import format_decision
 from showdown.engine.find_state_instructions import get_all_state_instructions
 from showdown.engine.select_best_move import pick_safest
 from showdown.engine.evaluate import evaluate
+from showdown.engine.search_stats import SearchStats
 import logging
 
 import random
@@ -31,12 +32,16 @@ class MonteCarloTree():
         - max_depth: how deep to explore this MC tree's child nodes
         - transitions: set of all possible moves, combining our move and opponent move possibilities
         - children: this node's children based on chosen transitions to explore
+        - stats: optional SearchStats object shared by every node in the tree
     """
 
-    def __init__(self, state):
+    def __init__(self, state, stats=None):
         self.state = state
         self.wins = 0
         self.total = 0
+        self.stats = stats
+        if stats is not None:
+            stats.nodes += 1
 
         self.transitions = get_transitions(state)
         self.children = {} #map from transition (our_move, opponent_move) -> MonteCarloTree
@@ -58,7 +63,7 @@ class MonteCarloTree():
         self.total += 1
 
         if depth == MAX_DEPTH:
-            if evaluate(self.state) >= initial_position:
+            if evaluate(self.state, stats=self.stats) >= initial_position:
                 self.wins += 1
                 return True
             else:
@@ -102,7 +107,7 @@ class MonteCarloTree():
         mutator = StateMutator(copy.deepcopy(self.state))
         while True:
             if depth == MAX_DEPTH:
-                if evaluate(mutator.state) >= initial_position:
+                if evaluate(mutator.state, stats=self.stats) >= initial_position:
                     self.wins += 1
                     return True
                 else:
@@ -117,7 +122,7 @@ class MonteCarloTree():
                     return False
 
             transition = random.choice(get_transitions(mutator.state))
-            state_instructions = get_all_state_instructions(mutator, transition[0], transition[1])
+            state_instructions = get_all_state_instructions(mutator, transition[0], transition[1], stats=self.stats)
             possible_instrucitons = [i.instructions for i in state_instructions]
             weights = [i.percentage for i in state_instructions]
             choice = random.choices(possible_instrucitons, weights=weights)[0]
@@ -134,10 +139,10 @@ class MonteCarloTree():
             - chosen_transition: the pair of (our move : opponent move) to apply
         """
         mutator = StateMutator(copy.deepcopy(self.state))
-        state_instructions = get_all_state_instructions(mutator, chosen_transition[0], chosen_transition[1])
+        state_instructions = get_all_state_instructions(mutator, chosen_transition[0], chosen_transition[1], stats=self.stats)
         choice = max(state_instructions, key=lambda i : i.percentage).instructions
         mutator.apply(choice)
-        return MonteCarloTree(mutator.state)
+        return MonteCarloTree(mutator.state, stats=self.stats)
 
     def run(self, times):
         """
@@ -146,7 +151,7 @@ class MonteCarloTree():
             - times: number of times to sample this tree
         """
         for sample in range(times):
-            self.sample(evaluate(self.state))
+            self.sample(evaluate(self.state, stats=self.stats))
             # if DEBUG and sample % 50 == 0:
             #     print("[DEBUG]: ran ", sample, "/", times, " samples") 
 
@@ -225,13 +230,18 @@ class BattleBot(Battle):
 
         Returns the best move according to mcts
         """
-        battles = self.prepare_battles(join_moves_together=True)
+        self.search_stats = SearchStats()
+        with self.search_stats.phase('prepare_battles'):
+            battles = self.prepare_battles(join_moves_together=True)
+        self.search_stats.clones += len(battles)
         value_maps = []
 
-        for b in battles:
-            mctree = MonteCarloTree(b.create_state())
-            mctree.run(int(SAMPLE_COUNT / len(battles)))
-            value_maps.append(mctree.generate_value_map())
+        with self.search_stats.phase('search'):
+            for b in battles:
+                mctree = MonteCarloTree(b.create_state(), stats=self.search_stats)
+                # more likely battles are given more of the samples
+                mctree.run(max(int(SAMPLE_COUNT * b.weight), 1))
+                value_maps.append(mctree.generate_value_map())
 
         best_move, value = get_best_move(value_maps)
         return format_decision(self, best_move)
\ No newline at end of file
@@ -3,6 +3,7 @@ from data import all_move_json
 from showdown.battle import Battle
 from showdown.engine.damage_calculator import calculate_damage
 from showdown.engine.find_state_instructions import update_attacking_move
+from showdown.engine.search_stats import SearchStats
 from ..helpers import format_decision
 
 
@@ -11,6 +12,9 @@ class BattleBot(Battle):
         super(BattleBot, self).__init__(*args, **kwargs)
 
     def find_best_move(self):
+        self.search_stats = SearchStats()
+        self.search_stats.clones += 1
+
         state = self.create_state()
         my_options = self.get_all_options()[0]
 
@@ -28,7 +32,7 @@ class BattleBot(Battle):
         most_damage = -1
         choice = None
         for move in moves:
-            damage_amounts = calculate_damage(state, constants.SELF, move, constants.DO_NOTHING_MOVE)
+            damage_amounts = calculate_damage(state, constants.SELF, move, constants.DO_NOTHING_MOVE, stats=self.search_stats)
 
             damage = damage_amounts[0] if damage_amounts else 0
 
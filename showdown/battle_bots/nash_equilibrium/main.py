@@ -13,6 +13,7 @@ from showdown.engine.select_best_move import remove_guaranteed_opponent_moves
 from showdown.engine.objects import StateMutator
 from showdown.engine.select_best_move import pick_safest
 from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.search_stats import SearchStats
 
 from ..safest.main import pick_safest_move_from_battles
 from ..helpers import format_decision
@@ -132,26 +133,28 @@ def log_nash_equilibria(bot_choices, opponent_choices, bot_percentages, opponent
             opponent_options.append((opponent_choices[i], percentage))
 
 
-def get_weighted_choices_from_multiple_score_lookups(score_lookups):
+def get_weighted_choices_from_multiple_score_lookups(score_lookups, weights=None):
+    """`weights` is the probability of each score lookup's battle. Without them every battle is equally likely"""
     bot_choice_percentages = defaultdict(lambda: 0)
-    number_of_score_lookups = len(score_lookups)
-    for sl in score_lookups:
+    if weights is None:
+        weights = [1 / len(score_lookups)] * len(score_lookups)
+    for sl, weight in zip(score_lookups, weights):
         eq = find_nash_equilibrium(sl)
         log_nash_equilibria(*eq)
         for i, bot_choice in enumerate(eq[0]):
-            bot_choice_percentages[bot_choice] += eq[2][i]/number_of_score_lookups
+            bot_choice_percentages[bot_choice] += eq[2][i] * weight
 
     return list(bot_choice_percentages.items())
 
 
-def pick_move_in_equilibrium_from_multiple_score_lookups(score_lookups):
+def pick_move_in_equilibrium_from_multiple_score_lookups(score_lookups, weights=None):
     # This is the WRONG way to find a Nash Equilibrium from different potential games
     # ... but it is a simple way that works (with crappy results)
     #
     # The games should be modelled properly based on incomplete information (see Harsanyi Transform),
     # however that would require the bot to keep track of what it has revealed to the opponent
     try:
-        weighted_choices = get_weighted_choices_from_multiple_score_lookups(score_lookups)
+        weighted_choices = get_weighted_choices_from_multiple_score_lookups(score_lookups, weights=weights)
     except CouldNotFindEquilibriumError as e:
         logger.warning("Problem finding equilibria: {}".format(e))
         return random.choice([pick_safest(sl)[0][0] for sl in score_lookups])
@@ -173,21 +176,29 @@ class BattleBot(Battle):
         super(BattleBot, self).__init__(*args, **kwargs)
 
     def find_best_move(self):
-        battles = self.prepare_battles()
+        self.search_stats = SearchStats()
+        with self.search_stats.phase('prepare_battles'):
+            battles = self.prepare_battles()
         if len(battles) > 7:
             logger.debug("Not enough is known about the opponent's active pokemon - falling back to safest decision making")
-            battles = self.prepare_battles(join_moves_together=True)
-            decision = pick_safest_move_from_battles(battles)
+            with self.search_stats.phase('prepare_battles'):
+                battles = self.prepare_battles(join_moves_together=True)
+            self.search_stats.clones += len(battles)
+            with self.search_stats.phase('search'):
+                decision = pick_safest_move_from_battles(battles, stats=self.search_stats)
         else:
+            self.search_stats.clones += len(battles)
             list_of_payoffs = list()
-            for b in battles:
-                state = b.create_state()
-                mutator = StateMutator(state)
-                logger.debug("Attempting to find best move from: {}".format(mutator.state))
-                user_options, opponent_options = b.get_all_options()
-                scores = get_payoff_matrix(mutator, user_options, opponent_options, prune=False)
-                list_of_payoffs.append(scores)
-
-            decision = pick_move_in_equilibrium_from_multiple_score_lookups(list_of_payoffs)
+            with self.search_stats.phase('search'):
+                for b in battles:
+                    state = b.create_state()
+                    mutator = StateMutator(state)
+                    logger.debug("Attempting to find best move from: {}".format(mutator.state))
+                    user_options, opponent_options = b.get_all_options()
+                    scores = get_payoff_matrix(mutator, user_options, opponent_options, prune=False, stats=self.search_stats)
+                    list_of_payoffs.append(scores)
+
+            with self.search_stats.phase('equilibrium'):
+                decision = pick_move_in_equilibrium_from_multiple_score_lookups(list_of_payoffs, weights=[b.weight for b in battles])
 
         return format_decision(self, decision)
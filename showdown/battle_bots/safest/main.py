@@ -5,6 +5,7 @@ from ..helpers import format_decision
 from showdown.engine.objects import StateMutator
 from showdown.engine.select_best_move import pick_safest
 from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.search_stats import SearchStats
 
 import config
 
@@ -22,14 +23,14 @@ def prefix_opponent_move(score_lookup, prefix):
     return new_score_lookup
 
 
-def pick_safest_move_from_battles(battles):
+def pick_safest_move_from_battles(battles, stats=None):
     all_scores = dict()
     for i, b in enumerate(battles):
         state = b.create_state()
         mutator = StateMutator(state)
         user_options, opponent_options = b.get_all_options()
         logger.debug("Searching through the state: {}".format(mutator.state))
-        scores = get_payoff_matrix(mutator, user_options, opponent_options, depth = config.search_depth, prune=True)
+        scores = get_payoff_matrix(mutator, user_options, opponent_options, depth=config.search_depth, prune=True, stats=stats)
 
         prefixed_scores = prefix_opponent_move(scores, str(i))
         all_scores = {**all_scores, **prefixed_scores}
@@ -45,9 +46,14 @@ class BattleBot(Battle):
         super(BattleBot, self).__init__(*args, **kwargs)
 
     def find_best_move(self):
+        self.search_stats = SearchStats()
+
         #gets all game states reachable from this one
-        battles = self.prepare_battles(join_moves_together=True) 
-        
-        safest_move = pick_safest_move_from_battles(battles)
+        with self.search_stats.phase('prepare_battles'):
+            battles = self.prepare_battles(join_moves_together=True)
+        self.search_stats.clones += len(battles)
+
+        with self.search_stats.phase('search'):
+            safest_move = pick_safest_move_from_battles(battles, stats=self.search_stats)
         print("SAFEST MOVE: " +str(safest_move))
         return format_decision(self, safest_move)
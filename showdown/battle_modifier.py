@@ -1,10 +1,13 @@
 import json
+from copy import copy
 from copy import deepcopy
 import logging
 
+import numpy as np
+
 import constants
 from data import all_move_json
-from data import pokedex
+from data.species import get_species
 from showdown.battle import Pokemon
 from showdown.battle import LastUsedMove
 from showdown.battle import DamageDealt
@@ -12,13 +15,20 @@ from showdown.engine.helpers import normalize_name
 from showdown.engine.helpers import get_pokemon_info_from_condition
 from showdown.engine.helpers import calculate_stats
 from showdown.engine.find_state_instructions import get_effective_speed
-from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.spread_calculator import get_effective_speeds
+from showdown.engine.spread_calculator import calculate_max_damage_of_spreads
+from showdown.engine.spread_calculator import calculate_stats_of_spreads
+from showdown.engine.spread_calculator import STAT_ATTRIBUTES
+from showdown.set_belief import apply_set
+from showdown.protocol import ProtocolMessage
 
 
 logger = logging.getLogger(__name__)
 
 
-MOVE_END_STRINGS = {'move', 'switch', 'upkeep', ''}
+# these change the order pokemon move in without changing their speed
+MOVE_ORDER_ABILITIES = {'prankster', 'galewings', 'triage', 'stall'}
+MOVE_ORDER_ITEMS = {'quickclaw', 'custapberry', 'laggingtail', 'fullincense'}
 
 
 def find_pokemon_in_reserves(pkmn_name, reserves):
@@ -65,7 +75,7 @@ def switch_or_drag(battle, split_msg):
     if side.active is not None:
         # set the pkmn's types back to their original value if the types were changed
         if constants.TYPECHANGE in side.active.volatile_statuses:
-            original_types = pokedex[side.active.name][constants.TYPES]
+            original_types = get_species(side.active.name).types
             logger.debug("{} had it's type changed - changing its types back to {}".format(side.active.name, original_types))
             side.active.types = original_types
 
@@ -75,7 +85,7 @@ def switch_or_drag(battle, split_msg):
             side.active.stats = calculate_stats(side.active.base_stats, side.active.level)
             side.active.ability = None
             side.active.moves = []
-            side.active.types = pokedex[side.active.name][constants.TYPES]
+            side.active.types = get_species(side.active.name).types
 
         # reset the boost of the pokemon being replaced
         side.active.boosts.clear()
@@ -243,7 +253,7 @@ def move(battle, split_msg):
 
     # if this pokemon used a damaging move, eliminate the possibility of it having a lifeorb
     # the lifeorb will reveal itself if it has it
-    if category in constants.DAMAGING_CATEGORIES and not any([normalize_name(a) in ['sheerforce', 'magicguard'] for a in pokedex[pkmn.name][constants.ABILITIES].values()]):
+    if category in constants.DAMAGING_CATEGORIES and not any(a in ['sheerforce', 'magicguard'] for a in get_species(pkmn.name).abilities):
         logger.debug("{} used a damaging move - not guessing lifeorb anymore".format(pkmn.name))
         pkmn.can_have_life_orb = False
 
@@ -631,35 +641,36 @@ def turn(battle, split_msg):
     battle.turn = int(split_msg[2])
 
 
-def check_choicescarf(battle, msg_lines):
-    def get_move_information(m):
-        try:
-            return m.split('|')[2], all_move_json[normalize_name(m.split('|')[3])]
-        except KeyError:
-            logger.debug("Unknown move {} - using standard 0 priority move".format(normalize_name(m.split('|')[3])))
-            return m.split('|')[2], {constants.PRIORITY: 0}
+def get_move_information(event):
+    try:
+        return event.split_msg[2], all_move_json[event.move]
+    except KeyError:
+        logger.debug("Unknown move {} - using standard 0 priority move".format(event.move))
+        return event.split_msg[2], {constants.PRIORITY: 0}
 
+
+def check_choicescarf(battle, message):
     if (
         battle.opponent.active is None or
         battle.opponent.active.item != constants.UNKNOWN_ITEM or
-        'prankster' in [normalize_name(a) for a in pokedex[battle.opponent.active.name][constants.ABILITIES].values()]
+        'prankster' in get_species(battle.opponent.active.name).abilities
     ):
         return
 
-    moves = [get_move_information(m) for m in msg_lines if m.startswith('|move|')]
+    moves = [get_move_information(event) for event in message.moves()]
     if len(moves) != 2 or moves[0][0].startswith(battle.user.name) or moves[0][1][constants.PRIORITY] != moves[1][1][constants.PRIORITY]:
         return
 
-    battle_copy = deepcopy(battle)
-    battle_copy.user.from_json(battle_copy.request_json)
     if battle.battle_type == constants.RANDOM_BATTLE:
-        battle_copy.opponent.active.set_spread('serious', '85,85,85,85,85,85')  # random battles have known spreads
+        spread = 'serious', '85,85,85,85,85,85'  # random battles have known spreads
+    elif battle.trick_room:
+        spread = 'quiet', '0,0,0,0,0,0'  # assume as slow as possible in trickroom
     else:
-        if battle.trick_room:
-            battle_copy.opponent.active.set_spread('quiet', '0,0,0,0,0,0')  # assume as slow as possible in trickroom
-        else:
-            battle_copy.opponent.active.set_spread('jolly', '0,0,0,0,0,252')  # assume as fast as possible
-    state = battle_copy.create_state()
+        spread = 'jolly', '0,0,0,0,0,252'  # assume as fast as possible
+
+    state = get_state_with_request_stats(battle)
+    opponent_active = state.opponent.active
+    apply_set(opponent_active, battle.opponent.active.base_stats, spread, opponent_active.item, opponent_active.ability)
     opponent_effective_speed = get_effective_speed(state, state.opponent)
     bot_effective_speed = get_effective_speed(state, state.self)
 
@@ -673,8 +684,10 @@ def check_choicescarf(battle, msg_lines):
         battle.opponent.active.item = 'choicescarf'
 
 
-def get_damage_dealt(battle, split_msg, next_messages):
-    move_name = normalize_name(split_msg[3])
+def get_damage_dealt(battle, message, i):
+    """The damage done by the move of the `i`th event of `message`"""
+    split_msg = message.events[i].split_msg
+    move_name = message.events[i].move
     critical_hit = False
 
     if is_opponent(battle, split_msg):
@@ -684,18 +697,14 @@ def get_damage_dealt(battle, split_msg, next_messages):
         attacking_side = battle.user
         defending_side = battle.opponent
 
-    for line in next_messages:
-        next_line_split = line.split('|')
-        # if one of these strings appears in index 1 then
-        # exit out since we are done with this pokemon's move
-        if len(next_line_split) < 2 or next_line_split[1] in MOVE_END_STRINGS:
-            break
-
-        elif next_line_split[1] == '-crit':
+    # the events up to the end of the move are the ones caused by this pokemon's move
+    for event in message.until_move_end(i):
+        next_line_split = event.split_msg
+        if event.action == '-crit':
             critical_hit = True
 
         # if '-damage' appears, we want to parse the percentage damage dealt
-        elif next_line_split[1] == '-damage' and defending_side.name in next_line_split[2]:
+        elif event.action == '-damage' and defending_side.name in next_line_split[2]:
             final_health, maxhp, _ = get_pokemon_info_from_condition(next_line_split[3])
             # maxhp can be 0 if the targetted pokemon fainted
             # the message would be: "0 fnt"
@@ -739,20 +748,21 @@ def check_choice_band_or_specs(battle, damage_dealt):
     if battle.battle_type == constants.RANDOM_BATTLE:
         spread = 'serious', '85,85,85,85,85,85'
 
-    max_damage = float('-inf')
-    potential_battles = battle.prepare_battles(guess_mega_evo_opponent=False, join_moves_together=True)
-
-    battle_copy = deepcopy(battle)
-    battle_copy.user.from_json(battle.request_json)
-    for b in potential_battles:
-        if b.opponent.active.item != choice_item:
-            b.opponent.active.set_spread(*spread)
-            b.user.active.stats = battle_copy.user.active.stats
+    # the prepared battles only differ in the item and ability that matter here, and the spread is the same for
+    # all of them, so each (item, ability) the opponent could have is checked once against the state of this battle
+    state = create_state_with_request_active_stats(battle)
+    opponent_active = state.opponent.active
+    stats = calculate_stats_of_spreads(battle.opponent.active.base_stats, opponent_active.level, [spread])
+    defending_move = get_last_move_or_do_nothing(battle.user)
 
-            state = b.create_state()
-
-            damage = calculate_damage(state, constants.OPPONENT, damage_dealt.move, battle.user.last_used_move.move, calc_type='max')[0]
-            max_damage = max(max_damage, damage)
+    max_damage = float('-inf')
+    for item, ability in battle.opponent.active.get_possible_items_and_abilities():
+        if item != choice_item:
+            opponent_active.item = item
+            opponent_active.ability = ability
+            damage = calculate_max_damage_of_spreads(state, constants.OPPONENT, damage_dealt.move, defending_move, constants.OPPONENT, stats)
+            if damage is not None:
+                max_damage = max(max_damage, int(damage.max()))
 
     # dont infer if we did not find a damage amount
     if max_damage == float('-inf'):
@@ -763,30 +773,130 @@ def check_choice_band_or_specs(battle, damage_dealt):
         battle.opponent.active.item = choice_item
 
 
-def check_heavydutyboots(battle, msg_lines):
+def create_state_with_request_active_stats(battle):
+    """The state of the battle with only the stats of the user's active pokemon taken from the request
+       The rest of the request can already be from the next turn, e.g. an item that was knocked off"""
+    state = battle.create_state()
+    if battle.request_json is None:
+        return state
+
+    for pkmn_dict in battle.request_json[constants.SIDE][constants.POKEMON]:
+        if pkmn_dict[constants.ACTIVE]:
+            for stat, number in pkmn_dict[constants.STATS].items():
+                setattr(state.self.active, STAT_ATTRIBUTES[constants.STAT_ABBREVIATION_LOOKUPS[stat]], number)
+    return state
+
+
+def get_state_with_request_stats(battle):
+    """The state of the battle with the user's stats from the request - the battle only has them estimated from a spread"""
+    battle_copy = copy(battle)
+    if battle.request_json is not None:
+        battle_copy.user = deepcopy(battle.user)
+        battle_copy.user.from_json(battle.request_json)
+    return battle_copy.create_state()
+
+
+def get_last_move_or_do_nothing(side):
+    last_move = side.last_used_move.move
+    if last_move.startswith(constants.SWITCH_STRING + " ") or last_move in all_move_json:
+        return last_move
+    return constants.DO_NOTHING_MOVE
+
+
+def update_set_belief_from_move_order(battle, message):
+    """Rules out the opponent's sets that would have made the two pokemon move in the other order"""
+    if battle.opponent.active is None or battle.user.active is None:
+        return
+    set_belief = battle.opponent.active.get_set_belief()
+    if set_belief is None:
+        return
+
+    if (
+        len(message.move_indices) != 2 or
+        message.has_action_after(message.move_indices[0], 'switch') or
+        message.has_action_after(message.move_indices[0], 'drag') or
+        battle.user.active.item in MOVE_ORDER_ITEMS or
+        battle.user.active.ability in MOVE_ORDER_ABILITIES
+    ):
+        return
+
+    moves = [get_move_information(event) for event in message.moves()]
+    if moves[0][1][constants.PRIORITY] != moves[1][1][constants.PRIORITY]:
+        return
+    opponent_moved_first = not moves[0][0].startswith(battle.user.name)
+
+    state = get_state_with_request_stats(battle)
+    user_effective_speed = get_effective_speed(state, state.self)
+    opponent_active = state.opponent.active
+
+    def likelihoods(item, ability, stats):
+        if item in MOVE_ORDER_ITEMS or ability in MOVE_ORDER_ABILITIES:
+            return np.ones(len(stats[constants.SPEED]), dtype=bool)
+        opponent_active.item = item
+        opponent_active.ability = ability
+        opponent_effective_speeds = get_effective_speeds(state, state.opponent, stats[constants.SPEED])
+        opponent_should_move_first = (opponent_effective_speeds > user_effective_speed) != bool(battle.trick_room)
+
+        # a speed tie could go either way
+        return (opponent_effective_speeds == user_effective_speed) | (opponent_should_move_first == opponent_moved_first)
+
+    set_belief.update_spreads(battle.opponent.active.base_stats, opponent_active.level, likelihoods)
+
+
+def update_set_belief_from_damage_dealt(battle, damage_dealt, attacking_side):
+    """Rules out the opponent's sets that could not have dealt, or taken, as much damage as was seen
+       `attacking_side` is 'opponent' when the opponent's pokemon dealt the damage and 'self' when it took it
+       Only too much damage rules a set out: multi-hit moves, substitutes and the like make it do less than expected"""
+    if (
+        battle.opponent.active is None or
+        damage_dealt.crit or
+        damage_dealt.move in constants.WEIGHT_BASED_MOVES or
+        damage_dealt.move in constants.SPEED_BASED_MOVES or
+        all_move_json.get(damage_dealt.move, {}).get(constants.CATEGORY) not in constants.DAMAGING_CATEGORIES
+    ):
+        return
+    set_belief = battle.opponent.active.get_set_belief()
+    if set_belief is None:
+        return
+
+    state = get_state_with_request_stats(battle)
+    opponent_active = state.opponent.active
+
+    if attacking_side == constants.OPPONENT:
+        defending_move = get_last_move_or_do_nothing(battle.user)
+    else:
+        defending_move = get_last_move_or_do_nothing(battle.opponent)
+
+    def likelihoods(item, ability, stats):
+        opponent_active.item = item
+        opponent_active.ability = ability
+        max_damage = calculate_max_damage_of_spreads(state, attacking_side, damage_dealt.move, defending_move, constants.OPPONENT, stats)
+        if max_damage is None:
+            return np.ones(len(stats[constants.SPEED]), dtype=bool)
+
+        if attacking_side == constants.OPPONENT:
+            defender_maxhp = state.self.active.maxhp
+        else:
+            defender_maxhp = stats[constants.HITPOINTS]
+
+        # multiply to avoid rounding errors
+        return damage_dealt.percent_damage * defender_maxhp <= max_damage * 1.2
+
+    set_belief.update_spreads(battle.opponent.active.base_stats, opponent_active.level, likelihoods)
+
+
+def check_heavydutyboots(battle, message, i):
+    """Checks whether the opponent's pokemon that switched in at the `i`th event of `message` was affected by entry hazards"""
     side_to_check = battle.opponent
 
     if (
         side_to_check.active.item != constants.UNKNOWN_ITEM or
-        'magicguard' in [normalize_name(a) for a in pokedex[side_to_check.active.name][constants.ABILITIES].values()]
+        'magicguard' in get_species(side_to_check.active.name).abilities
     ):
         return
 
     if side_to_check.side_conditions[constants.STEALTH_ROCK] > 0:
-        pkmn_took_stealthrock_damage = False
-        for line in msg_lines:
-            split_line = line.split('|')
-
-            # |-damage|p2a: Weedle|88/100|[from] Stealth Rock
-            if (
-                len(split_line) > 4 and
-                split_line[1] == '-damage' and
-                split_line[2].startswith(side_to_check.name) and
-                split_line[4] == '[from] Stealth Rock'
-            ):
-                pkmn_took_stealthrock_damage = True
-
-        if not pkmn_took_stealthrock_damage:
+        if not message.hazard_affected_after(i, side_to_check.name, constants.STEALTH_ROCK):
             logger.debug("{} has heavydutyboots".format(side_to_check.active.name))
             side_to_check.active.item = 'heavydutyboots'
         else:
@@ -798,20 +908,7 @@ def check_heavydutyboots(battle, msg_lines):
         'flying' not in side_to_check.active.types and
         side_to_check.active.ability != 'levitate'
     ):
-        pkmn_took_spikes_damage = False
-        for line in msg_lines:
-            split_line = line.split('|')
-
-            # |-damage|p2a: Weedle|88/100|[from] Spikes
-            if (
-                    len(split_line) > 4 and
-                    split_line[1] == '-damage' and
-                    split_line[2].startswith(side_to_check.name) and
-                    split_line[4] == '[from] Spikes'
-            ):
-                pkmn_took_spikes_damage = True
-
-        if not pkmn_took_spikes_damage:
+        if not message.hazard_affected_after(i, side_to_check.name, constants.SPIKES):
             logger.debug("{} has heavydutyboots".format(side_to_check.active.name))
             side_to_check.active.item = 'heavydutyboots'
         else:
@@ -825,22 +922,15 @@ def check_heavydutyboots(battle, msg_lines):
         side_to_check.active.ability != 'levitate' and
         side_to_check.active.ability not in constants.IMMUNE_TO_POISON_ABILITIES
     ):
-        pkmn_took_toxicspikes_poison = False
-        for line in msg_lines:
-            split_line = line.split('|')
-
-            # a pokemon can be toxic-ed from sources other than toxicspikes
-            # stopping at one of these strings ensures those other sources aren't considered
-            if len(split_line) < 2 or split_line[1] in MOVE_END_STRINGS:
-                break
-
-            # |-status|p2a: Pikachu|psn
-            if (
-                    split_line[1] == '-status' and
-                    (split_line[3] == constants.POISON or split_line[3] == constants.TOXIC) and
-                    split_line[2].startswith(side_to_check.name)
-            ):
-                pkmn_took_toxicspikes_poison = True
+        # a pokemon can be toxic-ed from sources other than toxicspikes
+        # only looking until the end of the switch's lines ensures those other sources aren't considered
+        # |-status|p2a: Pikachu|psn
+        pkmn_took_toxicspikes_poison = any(
+            event.action == '-status' and
+            (event.split_msg[3] == constants.POISON or event.split_msg[3] == constants.TOXIC) and
+            event.split_msg[2].startswith(side_to_check.name)
+            for event in message.until_move_end(i)
+        )
 
         if not pkmn_took_toxicspikes_poison:
             logger.debug("{} has heavydutyboots".format(side_to_check.active.name))
@@ -854,20 +944,7 @@ def check_heavydutyboots(battle, msg_lines):
             'flying' not in side_to_check.active.types and
             side_to_check.active.ability != 'levitate'
     ):
-        pkmn_was_affected_by_stickyweb = False
-        for line in msg_lines:
-            split_line = line.split('|')
-
-            # |-activate|p2a: Gengar|move: Sticky Web
-            if (
-                    len(split_line) == 4 and
-                    split_line[1] == '-activate' and
-                    split_line[2].startswith(side_to_check.name) and
-                    split_line[3] == 'move: Sticky Web'
-            ):
-                pkmn_was_affected_by_stickyweb = True
-
-        if not pkmn_was_affected_by_stickyweb:
+        if not message.hazard_affected_after(i, side_to_check.name, constants.STICKY_WEB):
             logger.debug("{} has heavydutyboots".format(side_to_check.active.name))
             side_to_check.active.item = 'heavydutyboots'
         else:
@@ -875,67 +952,75 @@ def check_heavydutyboots(battle, msg_lines):
             side_to_check.active.can_have_heavydutyboots = False
 
 
+BATTLE_MODIFIERS = {
+    'request': request,
+    'switch': switch_or_drag,
+    'faint': faint,
+    'drag': switch_or_drag,
+    '-heal': heal_or_damage,
+    '-damage': heal_or_damage,
+    'move': move,
+    '-boost': boost,
+    '-unboost': unboost,
+    '-status': status,
+    '-activate': activate,
+    '-start': start_volatile_status,
+    '-end': end_volatile_status,
+    '-curestatus': curestatus,
+    '-cureteam': cureteam,
+    '-weather': weather,
+    '-fieldstart': fieldstart,
+    '-fieldend': fieldend,
+    '-sidestart': sidestart,
+    '-sideend': sideend,
+    '-item': set_item,
+    '-enditem': remove_item,
+    '-immune': set_ability,
+    '-ability': set_opponent_ability_from_ability_tag,
+    'detailschange': form_change,
+    'replace': form_change,
+    '-formechange': form_change,
+    '-transform': transform,
+    '-mega': mega,
+    '-zpower': zpower,
+    '-clearnegativeboost': clearnegativeboost,
+    '-clearallboost': clearallboost,
+    '-singleturn': singleturn,
+    'upkeep': upkeep,
+    'turn': turn
+}
+
+
 def update_battle(battle, msg):
-    msg_lines = msg.split('\n')
+    message = ProtocolMessage.from_message(msg)
 
     action = None
-    for i, line in enumerate(msg_lines):
-        split_msg = line.split('|')
+    for i, event in enumerate(message.events):
+        split_msg = event.split_msg
         if len(split_msg) < 2:
             continue
 
-        action = split_msg[1].strip()
-
-        battle_modifiers_lookup = {
-            'request': request,
-            'switch': switch_or_drag,
-            'faint': faint,
-            'drag': switch_or_drag,
-            '-heal': heal_or_damage,
-            '-damage': heal_or_damage,
-            'move': move,
-            '-boost': boost,
-            '-unboost': unboost,
-            '-status': status,
-            '-activate': activate,
-            '-start': start_volatile_status,
-            '-end': end_volatile_status,
-            '-curestatus': curestatus,
-            '-cureteam': cureteam,
-            '-weather': weather,
-            '-fieldstart': fieldstart,
-            '-fieldend': fieldend,
-            '-sidestart': sidestart,
-            '-sideend': sideend,
-            '-item': set_item,
-            '-enditem': remove_item,
-            '-immune': set_ability,
-            '-ability': set_opponent_ability_from_ability_tag,
-            'detailschange': form_change,
-            'replace': form_change,
-            '-formechange': form_change,
-            '-transform': transform,
-            '-mega': mega,
-            '-zpower': zpower,
-            '-clearnegativeboost': clearnegativeboost,
-            '-clearallboost': clearallboost,
-            '-singleturn': singleturn,
-            'upkeep': upkeep,
-            'turn': turn
-        }
-
-        function_to_call = battle_modifiers_lookup.get(action)
+        action = event.action
+
+        function_to_call = BATTLE_MODIFIERS.get(action)
         if function_to_call is not None:
             function_to_call(battle, split_msg)
 
         if action == 'move' and is_opponent(battle, split_msg):
-            check_choicescarf(battle, msg_lines)
-            damage_dealt = get_damage_dealt(battle, split_msg, msg_lines[i + 1:])
+            check_choicescarf(battle, message)
+            update_set_belief_from_move_order(battle, message)
+            damage_dealt = get_damage_dealt(battle, message, i)
             if damage_dealt:
                 check_choice_band_or_specs(battle, damage_dealt)
+                update_set_belief_from_damage_dealt(battle, damage_dealt, constants.OPPONENT)
+
+        elif action == 'move' and '[from]' not in split_msg[-1]:
+            damage_dealt = get_damage_dealt(battle, message, i)
+            if damage_dealt:
+                update_set_belief_from_damage_dealt(battle, damage_dealt, constants.SELF)
 
         elif action == 'switch' and is_opponent(battle, split_msg):
-            check_heavydutyboots(battle, msg_lines[i+1:])
+            check_heavydutyboots(battle, message, i)
 
         if action == 'turn':
             return True
@@ -3,6 +3,7 @@ from copy import deepcopy
 
 import constants
 from data import all_move_json
+from data.ruleset import current_ruleset
 
 
 pokemon_type_indicies = {
@@ -48,6 +49,52 @@ damage_multipication_array = [[1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1/2, 0, 1, 1,
                               [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]]
 
 
+# every combination of types a pokemon can have is given an id, and its row in `type_combination_effectiveness`
+# is the multiplier of every attacking type, by its index, against it. A pokemon resolves its types to an id
+# when they change, so the effectiveness of a move against it is one lookup instead of one per type
+
+# {tuple of types: id of the combination}
+type_combination_ids = dict()
+
+# the rows of the combinations, by their id
+type_combination_effectiveness = []
+
+
+def type_combination(types):
+    """The id of the combination of `types`, which is added to the table if it is not in it
+       Raises KeyError for a type that is not in `pokemon_type_indicies`"""
+    key = tuple(types)
+    try:
+        return type_combination_ids[key]
+    except KeyError:
+        pass
+
+    # the same types in another order are the same combination
+    sorted_key = tuple(sorted(key))
+    if sorted_key in type_combination_ids:
+        combination = type_combination_ids[key] = type_combination_ids[sorted_key]
+        return combination
+
+    defending_type_indices = [pokemon_type_indicies[t] for t in key]
+    row = []
+    for attacking_type_multipliers in damage_multipication_array:
+        modifier = 1
+        for defending_type_index in defending_type_indices:
+            modifier *= attacking_type_multipliers[defending_type_index]
+        row.append(modifier)
+
+    combination = type_combination_ids[key] = type_combination_ids[sorted_key] = len(type_combination_effectiveness)
+    type_combination_effectiveness.append(tuple(row))
+    return combination
+
+
+# the combinations of up to two types are in the table from the start, others are added when they are seen
+type_combination(())
+for _first_type in pokemon_type_indicies:
+    for _second_type in pokemon_type_indicies:
+        type_combination((_first_type, _second_type) if _first_type != _second_type else (_first_type,))
+
+
 SPECIAL_LOGIC_MOVES = {
     "seismictoss": lambda attacker, defender: [int(attacker.level)] if "ghost" not in defender.types else None,
     "nightshade": lambda attacker, defender: [int(attacker.level)] if "normal" not in defender.types else None,
@@ -60,11 +107,14 @@ SPECIAL_LOGIC_MOVES = {
 
 
 TERRAIN_DAMAGE_BOOST = 1.3
+PRE_GEN_8_TERRAIN_DAMAGE_BOOST = 1.5  # terrain gave a 1.5x damage boost prior to gen8
 
 
-def _calculate_damage(attacker, defender, move, conditions=None, calc_type='average'):
+def _calculate_damage(attacker, defender, move, conditions=None, calc_type='average', stats=None):
     # This function assumes the `move` dictionary has already been updated to account for move/item/ability special-effects
     # You may want to use `calculate_damage`
+    if stats is not None:
+        stats.damage_calculations += 1
 
     acceptable_calc_types = ['average', 'max', 'min_max', 'min_max_average', 'all']
     if calc_type not in acceptable_calc_types:
@@ -109,16 +159,7 @@ def _calculate_damage(attacker, defender, move, conditions=None, calc_type='aver
         elif defense == constants.SPECIAL_ATTACK:
             attacking_stats[attack] = attacker.special_attack
 
-    defending_types = defender.types
-    if attacking_move[constants.ID] == 'thousandarrows' and 'flying' in defending_types:
-        defending_types = copy(defender.types)
-        defending_types.remove('flying')
-    if attacking_move[constants.TYPE] == 'ground' and constants.ROOST in defender.volatile_status:
-        defending_types = copy(defender.types)
-        try:
-            defending_types.remove('flying')
-        except ValueError:
-            pass
+    defending_types = get_defending_types(attacking_move, defender)
 
     # rock types get 1.5x SPDEF in sand
     try:
@@ -137,6 +178,20 @@ def _calculate_damage(attacker, defender, move, conditions=None, calc_type='aver
     return list(set(damage_rolls))
 
 
+def get_defending_types(attacking_move, defender):
+    defending_types = defender.types
+    if attacking_move[constants.ID] == 'thousandarrows' and 'flying' in defending_types:
+        defending_types = copy(defender.types)
+        defending_types.remove('flying')
+    if attacking_move[constants.TYPE] == 'ground' and constants.ROOST in defender.volatile_status:
+        defending_types = copy(defender.types)
+        try:
+            defending_types.remove('flying')
+        except ValueError:
+            pass
+    return defending_types
+
+
 def is_super_effective(move_type, defending_pokemon_types):
     multiplier = type_effectiveness_modifier(move_type, defending_pokemon_types)
     return multiplier > 1
@@ -150,7 +205,10 @@ def is_not_very_effective(move_type, defending_pokemon_types):
 def calculate_modifier(attacker, defender, defending_types, attacking_move, conditions):
 
     modifier = 1
-    modifier *= type_effectiveness_modifier(attacking_move[constants.TYPE], defending_types)
+    if defending_types is defender.types:
+        modifier *= type_effectiveness_against(attacking_move[constants.TYPE], defender)
+    else:
+        modifier *= type_effectiveness_modifier(attacking_move[constants.TYPE], defending_types)
     modifier *= weather_modifier(attacking_move, conditions.get(constants.WEATHER))
     modifier *= stab_modifier(attacker, attacking_move)
     modifier *= burn_modifier(attacker, attacking_move)
@@ -213,13 +271,18 @@ def get_damage_rolls(damage, calc_type):
 
 
 def type_effectiveness_modifier(attacking_move_type, defending_types):
-    modifier = 1
-    attacking_type_index = pokemon_type_indicies[attacking_move_type]
-    for pkmn_type in defending_types:
-        defending_type_index = pokemon_type_indicies[pkmn_type]
-        modifier *= damage_multipication_array[attacking_type_index][defending_type_index]
+    try:
+        combination = type_combination_ids[tuple(defending_types)]
+    except KeyError:
+        combination = type_combination(defending_types)
+    return type_combination_effectiveness[combination][pokemon_type_indicies[attacking_move_type]]
 
-    return modifier
+
+def type_effectiveness_against(attacking_move_type, pokemon):
+    """`type_effectiveness_modifier` against the types of the engine pokemon `pokemon`"""
+    if pokemon.type_combination is None:
+        return type_effectiveness_modifier(attacking_move_type, pokemon.types)
+    return type_combination_effectiveness[pokemon.type_combination][pokemon_type_indicies[attacking_move_type]]
 
 
 def weather_modifier(attacking_move, weather):
@@ -272,15 +335,15 @@ def aurora_veil_modifier(aurora_veil):
 
 def terrain_modifier(attacker, defender, attacking_move, terrain):
     if terrain == constants.ELECTRIC_TERRAIN and attacking_move[constants.TYPE] == 'electric' and attacker.is_grounded():
-        return TERRAIN_DAMAGE_BOOST
+        return current_ruleset().terrain_damage_boost
     elif terrain == constants.GRASSY_TERRAIN and attacking_move[constants.TYPE] == 'grass' and attacker.is_grounded():
-        return TERRAIN_DAMAGE_BOOST
+        return current_ruleset().terrain_damage_boost
     elif terrain == constants.GRASSY_TERRAIN and attacking_move[constants.ID] == 'earthquake':
         return 0.5
     elif terrain == constants.MISTY_TERRAIN and attacking_move[constants.TYPE] == 'dragon' and defender.is_grounded():
         return 0.5
     elif terrain == constants.PSYCHIC_TERRAIN and attacking_move[constants.TYPE] == 'psychic' and attacker.is_grounded():
-        return TERRAIN_DAMAGE_BOOST
+        return current_ruleset().terrain_damage_boost
     elif terrain == constants.PSYCHIC_TERRAIN and attacking_move[constants.PRIORITY] > 0 and defender.is_grounded():
         return 0
     return 1
@@ -297,7 +360,7 @@ def volatile_status_modifier(attacking_move, attacker, defender):
     return modifier
 
 
-def calculate_damage(state, attacking_side_string, attacking_move, defending_move, calc_type='average'):
+def calculate_damage(state, attacking_side_string, attacking_move, defending_move, calc_type='average', stats=None):
     # a wrapper for `_calculate_damage` that takes into account move/item/ability special-effects
     from showdown.engine.find_state_instructions import update_attacking_move
     from showdown.engine.find_state_instructions import user_moves_first
@@ -340,4 +403,4 @@ def calculate_damage(state, attacking_side_string, attacking_move, defending_mov
         state.field
     )
 
-    return _calculate_damage(attacking_side.active, defending_side.active, attacking_move_dict, conditions=conditions, calc_type=calc_type)
+    return _calculate_damage(attacking_side.active, defending_side.active, attacking_move_dict, conditions=conditions, calc_type=calc_type, stats=stats)
@@ -1,8 +1,10 @@
 import constants
+from data.ruleset import current_ruleset
 
 
 class Scoring:
     POKEMON_ALIVE_STATIC = 75
+    RANDOM_BATTLE_POKEMON_ALIVE_STATIC = 30  # random battle benefits from a lower static score for an alive pkmn
     POKEMON_HP = 100  # 100 points for 100% hp, 0 points for 0% hp. This is in addition to being alive
     POKEMON_HIDDEN = 10
     POKEMON_BOOSTS = {
@@ -66,12 +68,12 @@ class Scoring:
     }
 
 
-def evaluate_pokemon(pkmn):
+def evaluate_pokemon(pkmn, pokemon_alive_static=Scoring.POKEMON_ALIVE_STATIC):
     score = 0
     if pkmn.hp <= 0:
         return score
 
-    score += Scoring.POKEMON_ALIVE_STATIC
+    score += pokemon_alive_static
     score += Scoring.POKEMON_HP * (float(pkmn.hp) / pkmn.maxhp)
 
     # boosts have diminishing returns
@@ -98,27 +100,31 @@ def evaluate_pokemon(pkmn):
     return round(score)
 
 
-def evaluate(state):
+def evaluate(state, stats=None):
+    if stats is not None:
+        stats.evaluations += 1
+
     score = 0
+    pokemon_alive_static = current_ruleset().pokemon_alive_static
 
     number_of_opponent_reserve_revealed = len(state.opponent.reserve) + 1
     bot_alive_reserve_count = len([p.hp for p in state.self.reserve.values() if p.hp > 0])
     opponent_alive_reserves_count = len([p for p in state.opponent.reserve.values() if p.hp > 0]) + (6-number_of_opponent_reserve_revealed)
 
     # evaluate the bot's pokemon
-    score += evaluate_pokemon(state.self.active)
+    score += evaluate_pokemon(state.self.active, pokemon_alive_static)
     for pkmn in state.self.reserve.values():
-        this_pkmn_score = evaluate_pokemon(pkmn)
+        this_pkmn_score = evaluate_pokemon(pkmn, pokemon_alive_static)
         score += this_pkmn_score
 
     # evaluate the opponent's visible pokemon
-    score -= evaluate_pokemon(state.opponent.active)
+    score -= evaluate_pokemon(state.opponent.active, pokemon_alive_static)
     for pkmn in state.opponent.reserve.values():
-        this_pkmn_score = evaluate_pokemon(pkmn)
+        this_pkmn_score = evaluate_pokemon(pkmn, pokemon_alive_static)
         score -= this_pkmn_score
 
     for _ in range(opponent_alive_reserves_count):
-        score -= Scoring.POKEMON_ALIVE_STATIC
+        score -= pokemon_alive_static
 
     # evaluate the side-conditions for the bot
     for condition, count in state.self.side_conditions.items():
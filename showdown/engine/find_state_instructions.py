@@ -6,7 +6,14 @@ from data import all_move_json
 
 from . import instruction_generator
 from .damage_calculator import _calculate_damage
+from .damage_calculator import SPECIAL_LOGIC_MOVES as DAMAGE_SPECIAL_LOGIC_MOVES
 from .objects import TransposeInstruction
+from .special_effects import dependencies
+from .special_effects.abilities import modify_attack_against as ability_attack_against
+from .special_effects.abilities import modify_attack_being_used as ability_attack_being_used
+from .special_effects.items import modify_attack_against as item_attack_against
+from .special_effects.items import modify_attack_being_used as item_attack_being_used
+from .special_effects.moves import move_special_effect
 from .special_effects.abilities.modify_attack_against import ability_modify_attack_against
 from .special_effects.abilities.modify_attack_being_used import ability_modify_attack_being_used
 from .special_effects.items.modify_attack_against import item_modify_attack_against
@@ -29,8 +36,12 @@ def lookup_move(move_name):
 
 
 def get_effective_speed(state, side):
-    boosted_speed = side.active.calculate_boosted_stats()[constants.SPEED]
+    return int(apply_speed_modifiers(state, side, side.active.calculate_boosted_stats()[constants.SPEED]))
 
+
+def apply_speed_modifiers(state, side, boosted_speed):
+    """`boosted_speed` with the weather, terrain, ability, item and status of `side`'s active pokemon applied
+       `boosted_speed` can be a numpy array to get the speed of many spreads of the same pokemon at once"""
     if state.weather == constants.SUN and side.active.ability == 'chlorophyll':
         boosted_speed *= 2
     elif state.weather == constants.RAIN and side.active.ability == 'swiftswim':
@@ -57,7 +68,7 @@ def get_effective_speed(state, side):
     if constants.PARALYZED == side.active.status and side.active.ability != 'quickfeet':
         boosted_speed *= 0.5
 
-    return int(boosted_speed)
+    return boosted_speed
 
 
 def get_effective_priority(side, move, field):
@@ -75,9 +86,17 @@ def get_effective_priority(side, move, field):
 
 
 def user_moves_first(state, user_move, opponent_move):
-    user_effective_speed = get_effective_speed(state, state.self)
-    opponent_effective_speed = get_effective_speed(state, state.opponent)
+    return moves_in_order(
+        state,
+        user_move,
+        opponent_move,
+        get_effective_speed(state, state.self),
+        get_effective_speed(state, state.opponent),
+    )
 
+
+def moves_in_order(state, user_move, opponent_move, user_effective_speed, opponent_effective_speed, user_priority=None, opponent_priority=None):
+    """`user_moves_first` with the effective speeds, and optionally the priorities, already known"""
     # both users selected a switch
     if constants.SWITCH_STRING in user_move and constants.SWITCH_STRING in opponent_move:
         return user_effective_speed > opponent_effective_speed
@@ -94,15 +113,14 @@ def user_moves_first(state, user_move, opponent_move):
             return True
         return False
 
-    user_priority = get_effective_priority(state.self, user_move, state.field)
-    opponent_priority = get_effective_priority(state.opponent, opponent_move, state.field)
+    if user_priority is None:
+        user_priority = get_effective_priority(state.self, user_move, state.field)
+    if opponent_priority is None:
+        opponent_priority = get_effective_priority(state.opponent, opponent_move, state.field)
 
     if user_priority == opponent_priority:
-        user_is_faster = user_effective_speed > opponent_effective_speed
-        if state.trick_room:
-            return not user_is_faster
-        else:
-            return user_is_faster
+        # compared with `!=` instead of `not` so either speed can be a numpy array of the speeds of many spreads
+        return (user_effective_speed > opponent_effective_speed) != bool(state.trick_room)
 
     if user_priority > opponent_priority:
         return True
@@ -110,7 +128,90 @@ def user_moves_first(state, user_move, opponent_move):
         return False
 
 
-def update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move, defending_move, first_move, weather, terrain):
+# the moves made by `update_attacking_move` are remembered up to this many at a time
+MAX_UPDATED_MOVES = 100000
+
+# {(move id, the abilities and items of both pokemon): what the effects that apply to the move read, or UNCACHEABLE}
+_effect_dependencies = dict()
+
+# {key of the arguments of `update_attacking_move`: (the move it was given, the move it made)}
+# the move it was given is kept so its id is not reused by another move while it is part of a key
+_updated_moves = dict()
+
+
+def get_effect_dependencies(attacking_pokemon, defending_pokemon, attacking_move):
+    """The `special_effects.dependencies` of the effects that `update_attacking_move` can apply to the move,
+       or UNCACHEABLE if one of them reads something that is not one of them"""
+    key = (attacking_move[constants.ID], attacking_pokemon.ability, attacking_pokemon.item, defending_pokemon.ability, defending_pokemon.item)
+    try:
+        return _effect_dependencies[key]
+    except KeyError:
+        pass
+
+    effects = [
+        (move_special_effect.move_dependencies, move_special_effect.move_lookup.get(attacking_move[constants.ID])),
+        (ability_attack_being_used.ability_dependencies, ability_attack_being_used.ability_lookup.get(attacking_pokemon.ability)),
+        (item_attack_being_used.item_dependencies, vars(item_attack_being_used).get(attacking_pokemon.item)),
+        (ability_attack_against.ability_dependencies, ability_attack_against.ability_lookup.get(defending_pokemon.ability)),
+        (item_attack_against.item_dependencies, item_attack_against.item_lookup.get(defending_pokemon.item)),
+    ]
+
+    effect_dependencies = []
+    for declared_dependencies, effect in effects:
+        if effect is None:
+            continue
+        this_effect_dependencies = declared_dependencies.get(effect, dependencies.UNCACHEABLE)
+        if this_effect_dependencies is dependencies.UNCACHEABLE:
+            effect_dependencies = dependencies.UNCACHEABLE
+            break
+        effect_dependencies += [d for d in this_effect_dependencies if d not in effect_dependencies]
+    else:
+        effect_dependencies = tuple(effect_dependencies)
+
+    _effect_dependencies[key] = effect_dependencies
+    return effect_dependencies
+
+
+def update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move, defending_move, first_move, weather, terrain, stats=None):
+    """The move after the special-effects of the move, the abilities and items and protect are applied
+       The same moves come up at every node of a search so the move that is made is remembered for the values of
+       everything the effects read, and is shared - it must not be changed"""
+    effect_dependencies = get_effect_dependencies(attacking_pokemon, defending_pokemon, attacking_move)
+    if effect_dependencies is dependencies.UNCACHEABLE:
+        # counted as a miss since the effects are run
+        if stats is not None:
+            stats.record_cache('updated_moves', False)
+        return _update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move, defending_move, first_move, weather, terrain)
+
+    key = (
+        id(attacking_move),
+        attacking_pokemon.ability,
+        attacking_pokemon.item,
+        defending_pokemon.ability,
+        defending_pokemon.item,
+        attacking_move[constants.ID] in attacking_pokemon.volatile_status,
+        tuple(vs in defending_pokemon.volatile_status for vs in constants.PROTECT_VOLATILE_STATUSES),
+        tuple(d(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain) for d in effect_dependencies)
+    )
+    try:
+        updated_move = _updated_moves[key][1]
+    except KeyError:
+        pass
+    else:
+        if stats is not None:
+            stats.record_cache('updated_moves', True)
+        return updated_move
+
+    if stats is not None:
+        stats.record_cache('updated_moves', False)
+    updated_move = _update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move, defending_move, first_move, weather, terrain)
+    if len(_updated_moves) >= MAX_UPDATED_MOVES:
+        _updated_moves.clear()
+    _updated_moves[key] = (attacking_move, updated_move)
+    return updated_move
+
+
+def _update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move, defending_move, first_move, weather, terrain):
     # update the attacking move based on certain special-effects:
     #   - abilities
     #   - items
@@ -193,11 +294,153 @@ def update_attacking_move(attacking_pokemon, defending_pokemon, attacking_move,
     return attacking_move
 
 
+# the instructions that never change the damage of a move, other than a move in `damage_calculator.SPECIAL_LOGIC_MOVES`
+DAMAGE_NEUTRAL_INSTRUCTIONS = {
+    constants.MUTATOR_DAMAGE,
+    constants.MUTATOR_HEAL,
+    constants.MUTATOR_WISH_START,
+    constants.MUTATOR_WISH_DECREMENT,
+    constants.MUTATOR_DISABLE_MOVE,
+    constants.MUTATOR_ENABLE_MOVE,
+    constants.MUTATOR_TOGGLE_TRICKROOM
+}
+
+# the volatile-statuses that `_calculate_damage` looks at
+DAMAGE_VOLATILE_STATUSES = {'magnetrise', 'flashfire', 'tarshot', constants.ROOST}
+
+
+def changes_damage(instruction):
+    if instruction[0] in DAMAGE_NEUTRAL_INSTRUCTIONS:
+        return False
+    elif instruction[0] in (constants.MUTATOR_APPLY_VOLATILE_STATUS, constants.MUTATOR_REMOVE_VOLATILE_STATUS):
+        return instruction[2] in DAMAGE_VOLATILE_STATUSES
+    elif instruction[0] in (constants.MUTATOR_APPLY_STATUS, constants.MUTATOR_REMOVE_STATUS):
+        return instruction[2] == constants.BURN
+    return True
+
+
+class NodeContext:
+    """What the moves at one node of the search are resolved with that is the same for every pair of moves there:
+    the effective speeds and priorities, the screens and weather each side attacks into, the move of the pokemon
+    moving first after its special-effects, for each attacker, move and kind of move it is used against, and the
+    damage of each move after its special-effects against the other side's active pokemon
+
+    It is only valid while the state is the one it was made for, so the moves and conditions are only used for the
+    pokemon moving first. The damage is also used for the pokemon moving second while the instructions of the first
+    pokemon's move have not changed anything it depends on, e.g. after only doing damage"""
+    __slots__ = ('state', 'effective_speeds', '_moves', '_priorities', '_conditions', '_first_moves', '_damage')
+
+    def __init__(self, state):
+        self.state = state
+        self.effective_speeds = {
+            constants.SELF: get_effective_speed(state, state.self),
+            constants.OPPONENT: get_effective_speed(state, state.opponent)
+        }
+        self._moves = dict()
+        self._priorities = dict()
+        self._conditions = dict()
+        self._first_moves = dict()
+
+        # {(attacker, id of the move, calc_type): (the move, its damage)}
+        # the move is kept so its id is not reused by another move while it is part of a key
+        self._damage = dict()
+
+    def lookup_move(self, move_name):
+        move = self._moves.get(move_name)
+        if move is None:
+            move = self._moves[move_name] = lookup_move(move_name)
+        return move
+
+    def priority(self, side_string, move_name, move):
+        priority = self._priorities.get((side_string, move_name))
+        if priority is None:
+            side = self.state.self if side_string == constants.SELF else self.state.opponent
+            priority = self._priorities[(side_string, move_name)] = get_effective_priority(side, move, self.state.field)
+        return priority
+
+    def user_moves_first(self, user_move_string, opponent_move_string):
+        user_move = self.lookup_move(user_move_string)
+        opponent_move = self.lookup_move(opponent_move_string)
+        user_priority = None
+        opponent_priority = None
+        if constants.SWITCH_STRING not in user_move and constants.SWITCH_STRING not in opponent_move:
+            user_priority = self.priority(constants.SELF, user_move_string, user_move)
+            opponent_priority = self.priority(constants.OPPONENT, opponent_move_string, opponent_move)
+
+        return moves_in_order(
+            self.state,
+            user_move,
+            opponent_move,
+            self.effective_speeds[constants.SELF],
+            self.effective_speeds[constants.OPPONENT],
+            user_priority,
+            opponent_priority
+        )
+
+    def conditions(self, defending_side):
+        conditions = self._conditions.get(id(defending_side))
+        if conditions is None:
+            conditions = self._conditions[id(defending_side)] = get_conditions(self.state, defending_side)
+        return conditions
+
+    def first_move(self, attacker, attacking_pokemon, defending_pokemon, attacking_move, defending_move, stats=None):
+        """The move of `attacking_pokemon` moving first after its special-effects
+           They only see whether `defending_move` is a switch and its category"""
+        key = (
+            attacker,
+            attacking_move[constants.ID],
+            constants.SWITCH_STRING in defending_move,
+            defending_move.get(constants.CATEGORY)
+        )
+        move = self._first_moves.get(key)
+        if stats is not None:
+            stats.record_cache('first_moves', move is not None)
+        if move is None:
+            move = self._first_moves[key] = update_attacking_move(
+                attacking_pokemon,
+                defending_pokemon,
+                attacking_move,
+                defending_move,
+                True,
+                self.state.weather,
+                self.state.field,
+                stats=stats
+            )
+        return move
+
+    def damage(self, attacker, attacking_pokemon, defending_pokemon, attacking_move, conditions, instructions, calc_type, stats=None):
+        """`_calculate_damage` of `attacking_move`, which has had its special-effects applied, with the pokemon
+           at this node after `instructions`"""
+        if attacking_move[constants.ID] in DAMAGE_SPECIAL_LOGIC_MOVES or any(changes_damage(i) for i in instructions):
+            return _calculate_damage(attacking_pokemon, defending_pokemon, attacking_move, conditions=conditions, calc_type=calc_type, stats=stats)
+
+        key = (attacker, id(attacking_move), calc_type)
+        damage = self._damage.get(key)
+        if stats is not None:
+            stats.record_cache('node_damage', damage is not None)
+        if damage is None:
+            damage = self._damage[key] = (
+                attacking_move,
+                _calculate_damage(attacking_pokemon, defending_pokemon, attacking_move, conditions=conditions, calc_type=calc_type, stats=stats)
+            )
+        return damage[1]
+
+
+def get_conditions(state, defending_side):
+    return {
+        constants.REFLECT: defending_side.side_conditions[constants.REFLECT],
+        constants.LIGHT_SCREEN: defending_side.side_conditions[constants.LIGHT_SCREEN],
+        constants.AURORA_VEIL: defending_side.side_conditions[constants.AURORA_VEIL],
+        constants.WEATHER: state.weather,
+        constants.TERRAIN: state.field
+    }
+
+
 def cannot_use_move(attacking_pokemon, attacking_move):
     return constants.TAUNT in attacking_pokemon.volatile_status and attacking_move[constants.CATEGORY] not in constants.DAMAGING_CATEGORIES
 
 
-def get_state_instructions_from_move(mutator, attacking_move, defending_move, attacker, defender, first_move, instructions):
+def get_state_instructions_from_move(mutator, attacking_move, defending_move, attacker, defender, first_move, instructions, stats=None, context=None):
     instructions.frozen = False
 
     if constants.SWITCH_STRING in attacking_move:
@@ -213,19 +456,10 @@ def get_state_instructions_from_move(mutator, attacking_move, defending_move, at
     defending_side = instruction_generator.get_side_from_state(mutator.state, defender)
     attacking_pokemon = attacking_side.active
     defending_pokemon = defending_side.active
-    active_weather = mutator.state.weather
 
     if cannot_use_move(attacking_pokemon, attacking_move):
         attacking_move = lookup_move(constants.DO_NOTHING_MOVE)
 
-    conditions = {
-        constants.REFLECT: defending_side.side_conditions[constants.REFLECT],
-        constants.LIGHT_SCREEN: defending_side.side_conditions[constants.LIGHT_SCREEN],
-        constants.AURORA_VEIL: defending_side.side_conditions[constants.AURORA_VEIL],
-        constants.WEATHER: active_weather,
-        constants.TERRAIN: mutator.state.field
-    }
-
     if attacking_pokemon.hp == 0:
         # if the attacker is dead, remove the 'flinched' volatile-status if it has it and exit early
         # this triggers if the pokemon moves second but the first attack knocked it out
@@ -233,15 +467,21 @@ def get_state_instructions_from_move(mutator, attacking_move, defending_move, at
         mutator.reverse(instructions.instructions)
         return [instructions]
 
-    attacking_move = update_attacking_move(
-        attacking_pokemon,
-        defending_pokemon,
-        attacking_move,
-        defending_move,
-        first_move,
-        mutator.state.weather,
-        mutator.state.field
-    )
+    if context is not None and first_move:
+        conditions = context.conditions(defending_side)
+        attacking_move = context.first_move(attacker, attacking_pokemon, defending_pokemon, attacking_move, defending_move, stats=stats)
+    else:
+        conditions = get_conditions(mutator.state, defending_side)
+        attacking_move = update_attacking_move(
+            attacking_pokemon,
+            defending_pokemon,
+            attacking_move,
+            defending_move,
+            first_move,
+            mutator.state.weather,
+            mutator.state.field,
+            stats=stats
+        )
 
     instructions = instruction_generator.get_instructions_from_flinched(mutator, attacker, instructions)
 
@@ -281,7 +521,10 @@ def get_state_instructions_from_move(mutator, attacking_move, defending_move, at
 
     # move is a damaging move
     if attacking_move[constants.CATEGORY] in constants.DAMAGING_CATEGORIES:
-        damage_amounts = _calculate_damage(attacking_pokemon, defending_pokemon, attacking_move, conditions=conditions, calc_type=config.damage_calc_type)
+        if context is not None:
+            damage_amounts = context.damage(attacker, attacking_pokemon, defending_pokemon, attacking_move, conditions, instructions.instructions, config.damage_calc_type, stats=stats)
+        else:
+            damage_amounts = _calculate_damage(attacking_pokemon, defending_pokemon, attacking_move, conditions=conditions, calc_type=config.damage_calc_type, stats=stats)
 
         attacking_move_secondary = attacking_move[constants.SECONDARY]
         attacking_move_self = attacking_move.get(constants.SELF)
@@ -415,7 +658,7 @@ def get_state_instructions_from_move(mutator, attacking_move, defending_move, at
     if switch_out_move_triggered(attacking_move, damage_amounts):
         temp_instructions = []
         for i in all_instructions:
-            best_switch = get_best_switch_pokemon(mutator, i, attacker, attacking_side, defending_move, first_move)
+            best_switch = get_best_switch_pokemon(mutator, i, attacker, attacking_side, defending_move, first_move, stats=stats)
             if best_switch is not None:
                 temp_instructions += instruction_generator.get_instructions_from_switch(mutator, attacker, best_switch, i)
             else:
@@ -448,23 +691,28 @@ def end_of_turn_triggered(user_move, opponent_move):
     return True
 
 
-def get_all_state_instructions(mutator, user_move_string, opponent_move_string):
-    user_move = lookup_move(user_move_string)
-    opponent_move = lookup_move(opponent_move_string)
-
-    bot_moves_first = user_moves_first(mutator.state, user_move, opponent_move)
+def get_all_state_instructions(mutator, user_move_string, opponent_move_string, stats=None, context=None):
+    """`context` is the `NodeContext` of the state that the other pairs of moves at the same node share"""
+    if context is None:
+        user_move = lookup_move(user_move_string)
+        opponent_move = lookup_move(opponent_move_string)
+        bot_moves_first = user_moves_first(mutator.state, user_move, opponent_move)
+    else:
+        user_move = context.lookup_move(user_move_string)
+        opponent_move = context.lookup_move(opponent_move_string)
+        bot_moves_first = context.user_moves_first(user_move_string, opponent_move_string)
 
     instructions = TransposeInstruction(1.0, [], False)
 
     all_instructions = []
     if bot_moves_first:
-        instructions = get_state_instructions_from_move(mutator, user_move, opponent_move, constants.SELF, constants.OPPONENT, True, instructions)
+        instructions = get_state_instructions_from_move(mutator, user_move, opponent_move, constants.SELF, constants.OPPONENT, True, instructions, stats=stats, context=context)
         for instruction in instructions:
-            all_instructions += get_state_instructions_from_move(mutator, opponent_move, user_move, constants.OPPONENT, constants.SELF, False, instruction)
+            all_instructions += get_state_instructions_from_move(mutator, opponent_move, user_move, constants.OPPONENT, constants.SELF, False, instruction, stats=stats, context=context)
     else:
-        instructions = get_state_instructions_from_move(mutator, opponent_move, user_move, constants.OPPONENT, constants.SELF, True, instructions)
+        instructions = get_state_instructions_from_move(mutator, opponent_move, user_move, constants.OPPONENT, constants.SELF, True, instructions, stats=stats, context=context)
         for instruction in instructions:
-            all_instructions += get_state_instructions_from_move(mutator, user_move, opponent_move, constants.SELF, constants.OPPONENT, False, instruction)
+            all_instructions += get_state_instructions_from_move(mutator, user_move, opponent_move, constants.SELF, constants.OPPONENT, False, instruction, stats=stats, context=context)
 
     if end_of_turn_triggered(user_move_string, opponent_move_string):
         temp_instructions = []
@@ -474,4 +722,7 @@ def get_all_state_instructions(mutator, user_move_string, opponent_move_string):
 
     all_instructions = remove_duplicate_instructions(all_instructions)
 
+    if stats is not None:
+        stats.record_branches(len(all_instructions))
+
     return all_instructions
@@ -1,7 +1,11 @@
 import math
+from functools import lru_cache
+
 import constants
 
 from data import all_move_json
+from showdown.engine.search_stats import current_search_stats
+from showdown.engine.search_stats import record_process_cache
 
 
 natures = {
@@ -103,19 +107,23 @@ def get_pokemon_info_from_condition(condition_string: str):
         return hp, maxhp, None
 
 
+STATS = (
+    constants.HITPOINTS,
+    constants.ATTACK,
+    constants.DEFENSE,
+    constants.SPECIAL_ATTACK,
+    constants.SPECIAL_DEFENSE,
+    constants.SPEED
+)
+
+# the characters removed from names
+NAME_DELETIONS = str.maketrans('', '', " -.'%*:")
+
+
+@lru_cache(maxsize=4096)
 def normalize_name(name):
-    return name\
-        .replace(" ", "")\
-        .replace("-", "")\
-        .replace(".", "")\
-        .replace("\'", "")\
-        .replace("%", "")\
-        .replace("*", "")\
-        .replace(":", "")\
-        .strip()\
-        .lower()\
-        .encode('ascii', 'ignore')\
-        .decode('utf-8')
+    """The same names are normalized over and over while reading the protocol, so they are remembered"""
+    return name.translate(NAME_DELETIONS).strip().lower().encode('ascii', 'ignore').decode('utf-8')
 
 
 def set_makes_sense(nature, spread, item, ability, moves):
@@ -163,6 +171,21 @@ def common_pkmn_stat_calc(stat: int, iv: int, ev: int, level: int):
 
 
 def calculate_stats(base_stats, level, ivs=(31,) * 6, evs=(85,) * 6, nature='serious'):
+    """The same species, level and spread are calculated over and over, so the stats are remembered
+       A new dict is returned every time since callers change it"""
+    search_stats = current_search_stats()
+    misses = search_stats.cache_misses['calculated_stats'] if search_stats is not None else 0
+    stats = _calculate_stats(tuple(base_stats[stat] for stat in STATS), level, tuple(ivs), tuple(evs), nature)
+    # `_calculate_stats` only runs - and counts the miss - when the stats were not remembered
+    if search_stats is not None and search_stats.cache_misses['calculated_stats'] == misses:
+        search_stats.record_cache('calculated_stats', True)
+    return dict(zip(STATS, stats))
+
+
+@lru_cache(maxsize=4096)
+def _calculate_stats(base_stats, level, ivs, evs, nature):
+    record_process_cache('calculated_stats', False)
+    base_stats = dict(zip(STATS, base_stats))
     new_stats = dict()
 
     new_stats[constants.HITPOINTS] = common_pkmn_stat_calc(
@@ -208,5 +231,4 @@ def calculate_stats(base_stats, level, ivs=(31,) * 6, evs=(85,) * 6, nature='ser
     ) + 5
 
     new_stats = update_stats_from_nature(new_stats, nature)
-    new_stats = {k: int(v) for k, v in new_stats.items()}
-    return new_stats
+    return tuple(int(new_stats[stat]) for stat in STATS)
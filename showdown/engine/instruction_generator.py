@@ -3,7 +3,7 @@ from copy import copy
 import constants
 import logging
 
-from .damage_calculator import type_effectiveness_modifier
+from .damage_calculator import type_effectiveness_against
 from .special_effects.abilities.on_switch_in import ability_on_switch_in
 from .special_effects.items.end_of_turn import item_end_of_turn
 from .special_effects.abilities.end_of_turn import ability_end_of_turn
@@ -159,14 +159,19 @@ def get_instructions_from_switch(mutator, attacker, switch_pokemon_name, instruc
     instruction_additions = remove_volatile_status_and_boosts_instructions(attacking_side, attacker)
     mutator.apply(instruction_additions)
 
-    for move in filter(lambda x: x[constants.DISABLED] is True and x[constants.CURRENT_PP], attacking_side.active.moves):
-        remove_disabled_instruction = (
-            constants.MUTATOR_ENABLE_MOVE,
-            attacker,
-            move[constants.ID]
-        )
-        mutator.apply_one(remove_disabled_instruction)
-        instruction_additions.append(remove_disabled_instruction)
+    # most pokemon switching out have no disabled moves, which the bitmask shows without looking at the moves
+    switching_out = attacking_side.active
+    if switching_out.disabled_moves:
+        for index, move_id in enumerate(switching_out.move_ids):
+            if not switching_out.move_is_disabled(index) or not switching_out.move_pp[index]:
+                continue
+            remove_disabled_instruction = (
+                constants.MUTATOR_ENABLE_MOVE,
+                attacker,
+                move_id
+            )
+            mutator.apply_one(remove_disabled_instruction)
+            instruction_additions.append(remove_disabled_instruction)
 
     if attacking_side.active.ability == 'regenerator' and attacking_side.active.hp:
         hp_missing = attacking_side.active.maxhp - attacking_side.active.hp
@@ -200,7 +205,7 @@ def get_instructions_from_switch(mutator, attacker, switch_pokemon_name, instruc
 
         # account for stealth rock damage
         if attacking_side.side_conditions[constants.STEALTH_ROCK] == 1:
-            multiplier = type_effectiveness_modifier('rock', switch_pkmn.types)
+            multiplier = type_effectiveness_against('rock', switch_pkmn)
             stealth_rock_instruction = (
                 constants.MUTATOR_DAMAGE,
                 attacker,
@@ -1124,11 +1129,13 @@ def get_end_of_turn_instructions(mutator, instruction, bot_move, opponent_move,
             (pkmn.item in constants.CHOICE_ITEMS or locking_move or pkmn.ability == 'gorillatactics')
         ):
             move_used = move[constants.ID]
-            for m in filter(lambda x: x[constants.ID] != move_used and not x[constants.DISABLED], pkmn.moves):
+            for move_id in pkmn.enabled_moves():
+                if move_id == move_used:
+                    continue
                 disable_instruction = (
                     constants.MUTATOR_DISABLE_MOVE,
                     attacker,
-                    m[constants.ID]
+                    move_id
                 )
                 mutator.apply_one(disable_instruction)
                 instruction.add_instruction(disable_instruction)
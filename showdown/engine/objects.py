@@ -3,6 +3,7 @@ from copy import copy
 
 import constants
 from data import all_move_json
+from .damage_calculator import type_combination
 
 
 boost_multiplier_lookup = {
@@ -36,7 +37,7 @@ class State(object):
         if force_switch:
             possible_moves = []
         else:
-            possible_moves = [m[constants.ID] for m in self.self.active.moves if not m[constants.DISABLED]]
+            possible_moves = self.self.active.enabled_moves()
 
         if self.self.trapped(self.opponent.active):
             possible_switches = []
@@ -49,7 +50,7 @@ class State(object):
         if self.opponent.active.hp <= 0:
             possible_moves = []
         else:
-            possible_moves = [m[constants.ID] for m in self.opponent.active.moves if not m[constants.DISABLED]]
+            possible_moves = self.opponent.active.enabled_moves()
 
         if self.opponent.trapped(self.self.active):
             possible_switches = []
@@ -151,6 +152,24 @@ class Side(object):
         else:
             return False
 
+    def copy(self, active=None):
+        """A copy that instructions can be applied to without changing this side
+           `active` replaces the active pokemon instead of copying it
+
+           Instructions only change the active pokemon, and replace the side-conditions instead of changing them,
+           so the reserve pokemon and the side-conditions are shared with the copy"""
+        return Side(
+            active or self.active.copy(),
+            dict(self.reserve),
+            self.wish,
+            self.side_conditions
+        )
+
+    def add_side_condition(self, effect, amount):
+        side_conditions = copy(self.side_conditions)
+        side_conditions[effect] += amount
+        self.side_conditions = side_conditions
+
     @classmethod
     def from_dict(cls, side_dict):
         return Side(
@@ -173,7 +192,8 @@ class Pokemon(object):
     __slots__ = (
         'id',
         'level',
-        'types',
+        '_types',
+        'type_combination',
         'hp',
         'maxhp',
         'ability',
@@ -194,7 +214,10 @@ class Pokemon(object):
         'evasion_boost',
         'status',
         'volatile_status',
-        'moves',
+        'move_ids',
+        'move_slots',
+        'move_pp',
+        'disabled_moves',
         'burn_multiplier'
     )
 
@@ -245,20 +268,138 @@ class Pokemon(object):
         self.accuracy_boost = accuracy_boost
         self.evasion_boost = evasion_boost
         self.status = status
-        self.volatile_status = volatile_status or set()
+        # a frozenset so that a copy shares it - instructions replace it instead of changing it
+        self.volatile_status = frozenset(volatile_status or ())
         self.moves = moves or list()
 
         # evaluation relies on a multiplier for the burn status
         # it is calculated here to save time during evaluation
         self.burn_multiplier = self.calculate_burn_multiplier()
 
+    def copy(self):
+        """A copy that instructions can be applied to without changing this pokemon
+           Instructions replace the attributes instead of changing them in-place so every one of them is shared"""
+        # attributes are assigned one by one because `copy` is slow for an object with __slots__
+        new_pokemon = Pokemon.__new__(Pokemon)
+        new_pokemon.id = self.id
+        new_pokemon.level = self.level
+        new_pokemon._types = self._types
+        new_pokemon.type_combination = self.type_combination
+        new_pokemon.hp = self.hp
+        new_pokemon.maxhp = self.maxhp
+        new_pokemon.ability = self.ability
+        new_pokemon.item = self.item
+        new_pokemon.attack = self.attack
+        new_pokemon.defense = self.defense
+        new_pokemon.special_attack = self.special_attack
+        new_pokemon.special_defense = self.special_defense
+        new_pokemon.speed = self.speed
+        new_pokemon.nature = self.nature
+        new_pokemon.evs = self.evs
+        new_pokemon.attack_boost = self.attack_boost
+        new_pokemon.defense_boost = self.defense_boost
+        new_pokemon.special_attack_boost = self.special_attack_boost
+        new_pokemon.special_defense_boost = self.special_defense_boost
+        new_pokemon.speed_boost = self.speed_boost
+        new_pokemon.accuracy_boost = self.accuracy_boost
+        new_pokemon.evasion_boost = self.evasion_boost
+        new_pokemon.status = self.status
+        new_pokemon.volatile_status = self.volatile_status
+        new_pokemon.move_ids = self.move_ids
+        new_pokemon.move_slots = self.move_slots
+        new_pokemon.move_pp = self.move_pp
+        new_pokemon.disabled_moves = self.disabled_moves
+        new_pokemon.burn_multiplier = self.burn_multiplier
+        return new_pokemon
+
+    @property
+    def types(self):
+        return self._types
+
+    @types.setter
+    def types(self, types):
+        # the combination is resolved here so damage calculations look up its id instead of every type
+        # a type the engine does not know, e.g. 'bird', has no id and is only an error if a move is used against it
+        self._types = types
+        try:
+            self.type_combination = type_combination(types)
+        except KeyError:
+            self.type_combination = None
+
+    @property
+    def moves(self):
+        return MoveSlots(self)
+
+    @moves.setter
+    def moves(self, moves):
+        # the moves are kept as the tuples of their ids and pp and a bitmask of the disabled moves
+        # so a copy of the pokemon shares them instead of copying a dict for every move
+        self.set_move_ids(tuple(m[constants.ID] for m in moves))
+        self.move_pp = tuple(m.get(constants.CURRENT_PP) for m in moves)
+        self.disabled_moves = 0
+        for index, move in enumerate(moves):
+            if move.get(constants.DISABLED):
+                self.disabled_moves |= 1 << index
+
+    def set_move_ids(self, move_ids):
+        self.move_ids = move_ids
+
+        # {move id: its slot} so an instruction finds a move without searching the moves
+        # a copy shares it, so it is replaced and never changed
+        self.move_slots = dict()
+        for index, move_id in enumerate(move_ids):
+            self.move_slots.setdefault(move_id, index)
+
+    def move_is_disabled(self, index):
+        return bool(self.disabled_moves >> index & 1)
+
+    def enabled_moves(self):
+        return [move_id for index, move_id in enumerate(self.move_ids) if not self.disabled_moves >> index & 1]
+
+    def move_index(self, move_name):
+        try:
+            return self.move_slots[move_name]
+        except KeyError:
+            raise ValueError("{} not in pokemon's moves: {}".format(move_name, self.moves))
+
+    def state_key(self):
+        """A hashable key that is the same for two pokemon the engine cannot tell apart
+           The nature and evs only matter when the stats are calculated again, so different spreads
+           that give the same stats have the same key"""
+        spread = (self.nature, self.evs) if self.id in constants.STATS_RECALCULATED_FROM_SPREAD else None
+        return (
+            self.id,
+            self.level,
+            tuple(self.types),
+            self.hp,
+            self.maxhp,
+            self.ability,
+            self.item,
+            self.attack,
+            self.defense,
+            self.special_attack,
+            self.special_defense,
+            self.speed,
+            spread,
+            self.attack_boost,
+            self.defense_boost,
+            self.special_attack_boost,
+            self.special_defense_boost,
+            self.speed_boost,
+            self.accuracy_boost,
+            self.evasion_boost,
+            self.status,
+            self.volatile_status,
+            tuple(sorted(zip(self.move_ids, (self.move_is_disabled(i) for i in range(len(self.move_ids))), self.move_pp)))
+        )
+
     def calculate_burn_multiplier(self):
         # this will result in a positive evaluation for a burned pokemon
         if self.ability in ['guts', 'marvelscale', 'quickfeet']:
             return -2
 
         # +1 to the multiplier for each physical move
-        burn_multiplier = len([m for m in self.moves if all_move_json[m[constants.ID]][constants.CATEGORY] == constants.PHYSICAL])
+        burn_multiplier = len([m for m in self.move_ids if all_move_json[m][constants.CATEGORY] == constants.PHYSICAL])
 
         # evaluation could use more than 4 moves for opponent's pokemon - dont go over 4
         burn_multiplier = min(4, burn_multiplier)
@@ -337,7 +478,7 @@ class Pokemon(object):
             d.get(constants.ACCURACY_BOOST, 0),
             d.get(constants.EVASION_BOOST, 0),
             d[constants.STATUS],
-            set(d[constants.VOLATILE_STATUS]),
+            d[constants.VOLATILE_STATUS],
             d[constants.MOVES]
         )
 
@@ -384,6 +525,95 @@ class Pokemon(object):
             })
 
 
+class MoveSlots(object):
+    """The moves of an engine pokemon as the list of dicts it was made from:
+       {constants.ID: ..., constants.DISABLED: ..., constants.CURRENT_PP: ...}
+       Changes made through it are made to the pokemon"""
+    __slots__ = ('pokemon',)
+
+    def __init__(self, pokemon):
+        self.pokemon = pokemon
+
+    def __len__(self):
+        return len(self.pokemon.move_ids)
+
+    def __iter__(self):
+        for index in range(len(self.pokemon.move_ids)):
+            yield MoveSlot(self.pokemon, index)
+
+    def __getitem__(self, index):
+        return MoveSlot(self.pokemon, range(len(self.pokemon.move_ids))[index])
+
+    def append(self, move):
+        self.pokemon.moves = self.to_list() + [move]
+
+    def to_list(self):
+        return [m.to_dict() for m in self]
+
+    def __eq__(self, other):
+        if isinstance(other, MoveSlots):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
+class MoveSlot(object):
+    """One of `MoveSlots`"""
+    __slots__ = ('pokemon', 'index')
+
+    def __init__(self, pokemon, index):
+        self.pokemon = pokemon
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == constants.ID:
+            return self.pokemon.move_ids[self.index]
+        elif key == constants.DISABLED:
+            return self.pokemon.move_is_disabled(self.index)
+        elif key == constants.CURRENT_PP:
+            return self.pokemon.move_pp[self.index]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == constants.DISABLED:
+            if value:
+                self.pokemon.disabled_moves |= 1 << self.index
+            else:
+                self.pokemon.disabled_moves &= ~(1 << self.index)
+        elif key == constants.CURRENT_PP:
+            self.pokemon.move_pp = self.pokemon.move_pp[:self.index] + (value,) + self.pokemon.move_pp[self.index + 1:]
+        elif key == constants.ID:
+            self.pokemon.set_move_ids(self.pokemon.move_ids[:self.index] + (value,) + self.pokemon.move_ids[self.index + 1:])
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {
+            constants.ID: self[constants.ID],
+            constants.DISABLED: self[constants.DISABLED],
+            constants.CURRENT_PP: self[constants.CURRENT_PP]
+        }
+
+    def copy(self):
+        return self.to_dict()
+
+    def __eq__(self, other):
+        if isinstance(other, MoveSlot):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
 class TransposeInstruction:
     __slots__ = ('percentage', 'instructions', 'frozen')
 
@@ -485,40 +715,31 @@ class StateMutator:
 
     def disable_move(self, side, move_name):
         side = self.get_side(side)
-        try:
-            move = next(filter(lambda x: x[constants.ID] == move_name, side.active.moves))
-        except StopIteration:
-            raise ValueError("{} not in pokemon's moves: {}".format(move_name, side.active.moves))
-
-        move[constants.DISABLED] = True
+        side.active.disabled_moves |= 1 << side.active.move_index(move_name)
 
     def enable_move(self, side, move_name):
         side = self.get_side(side)
-        try:
-            move = next(filter(lambda x: x[constants.ID] == move_name, side.active.moves))
-        except StopIteration:
-            raise ValueError("{} not in pokemon's moves: {}".format(move_name, side.active.moves))
-
-        move[constants.DISABLED] = False
+        side.active.disabled_moves &= ~(1 << side.active.move_index(move_name))
 
     def switch(self, side, _, switch_pokemon_name):
         # the second parameter to this function is the current active pokemon
         # this value must be here for reversing purposes
         side = self.get_side(side)
 
+        # the reserve pokemon are shared with copies of the state, so the one switching in is copied before it is changed
         side.reserve[side.active.id] = side.active
-        side.active = side.reserve.pop(switch_pokemon_name)
+        side.active = side.reserve.pop(switch_pokemon_name).copy()
 
     def reverse_switch(self, side, previous_active, current_active):
         self.switch(side, current_active, previous_active)
 
     def apply_volatile_status(self, side, volatile_status):
         side = self.get_side(side)
-        side.active.volatile_status.add(volatile_status)
+        side.active.volatile_status = side.active.volatile_status | {volatile_status}
 
     def remove_volatile_status(self, side, volatile_status):
         side = self.get_side(side)
-        side.active.volatile_status.remove(volatile_status)
+        side.active.volatile_status = side.active.volatile_status - {volatile_status}
 
     def damage(self, side, amount):
         side = self.get_side(side)
@@ -561,15 +782,15 @@ class StateMutator:
 
     def side_start(self, side, effect, amount):
         side = self.get_side(side)
-        side.side_conditions[effect] += amount
+        side.add_side_condition(effect, amount)
 
     def reverse_side_start(self, side, effect, amount):
         side = self.get_side(side)
-        side.side_conditions[effect] -= amount
+        side.add_side_condition(effect, -amount)
 
     def side_end(self, side, effect, amount):
         side = self.get_side(side)
-        side.side_conditions[effect] -= amount
+        side.add_side_condition(effect, -amount)
 
     def reverse_side_end(self, side, effect, amount):
         self.side_start(side, effect, amount)
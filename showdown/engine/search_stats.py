@@ -0,0 +1,133 @@
+import time
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# the `SearchStats` of the phase running in this context. Each battle's search runs in its own copy of the context,
+# so the lookups of the caches that last for the whole process are only counted by the battle that made them
+_current_search_stats = contextvars.ContextVar('search_stats', default=None)
+
+
+class SearchStats:
+    """Counters describing the work done by the engine to make a single decision
+
+    Every update is a single integer/dict operation so an instance can be threaded
+    through the search and left on in production.
+    Functions that accept a `stats` parameter skip all bookkeeping when it is None"""
+
+    __slots__ = (
+        'nodes',
+        'evaluations',
+        'damage_calculations',
+        'move_pairs',
+        'branches',
+        'max_branches',
+        'pruned_rows',
+        'pruned_cells',
+        'clones',
+        'cache_hits',
+        'cache_misses',
+        'phase_times'
+    )
+
+    def __init__(self):
+        self.nodes = 0
+        self.evaluations = 0
+        self.damage_calculations = 0
+        self.move_pairs = 0
+        self.branches = 0
+        self.max_branches = 0
+        self.pruned_rows = 0
+        self.pruned_cells = 0
+        self.clones = 0
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+        self.phase_times = defaultdict(float)
+
+    def record_branches(self, number_of_branches):
+        # called once per move-pair given to `get_all_state_instructions`
+        self.move_pairs += 1
+        self.branches += number_of_branches
+        if number_of_branches > self.max_branches:
+            self.max_branches = number_of_branches
+
+    def record_cache(self, cache_name, hit):
+        if hit:
+            self.cache_hits[cache_name] += 1
+        else:
+            self.cache_misses[cache_name] += 1
+
+    @property
+    def branches_per_move_pair(self):
+        if not self.move_pairs:
+            return 0
+        return self.branches / self.move_pairs
+
+    def cache_hit_rate(self, cache_name):
+        total = self.cache_hits[cache_name] + self.cache_misses[cache_name]
+        if not total:
+            return 0
+        return self.cache_hits[cache_name] / total
+
+    @contextmanager
+    def phase(self, phase_name):
+        """Accumulates the wall-time spent inside of this context under `phase_name`, and the hits and misses of the
+           caches that last for the whole process, which are not looked up with a `stats` at hand"""
+        token = _current_search_stats.set(self)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phase_times[phase_name] += time.perf_counter() - start
+            _current_search_stats.reset(token)
+
+    def merge(self, other):
+        self.nodes += other.nodes
+        self.evaluations += other.evaluations
+        self.damage_calculations += other.damage_calculations
+        self.move_pairs += other.move_pairs
+        self.branches += other.branches
+        self.max_branches = max(self.max_branches, other.max_branches)
+        self.pruned_rows += other.pruned_rows
+        self.pruned_cells += other.pruned_cells
+        self.clones += other.clones
+        for k, v in other.cache_hits.items():
+            self.cache_hits[k] += v
+        for k, v in other.cache_misses.items():
+            self.cache_misses[k] += v
+        for k, v in other.phase_times.items():
+            self.phase_times[k] += v
+
+    def to_dict(self):
+        cache_names = set(self.cache_hits) | set(self.cache_misses)
+        return {
+            'nodes': self.nodes,
+            'evaluations': self.evaluations,
+            'damage_calculations': self.damage_calculations,
+            'move_pairs': self.move_pairs,
+            'branches': self.branches,
+            'branches_per_move_pair': round(self.branches_per_move_pair, 3),
+            'max_branches': self.max_branches,
+            'pruned_rows': self.pruned_rows,
+            'pruned_cells': self.pruned_cells,
+            'clones': self.clones,
+            'cache_hit_rates': {name: round(self.cache_hit_rate(name), 3) for name in sorted(cache_names)},
+            'phase_times': {name: round(t, 6) for name, t in self.phase_times.items()}
+        }
+
+    def __repr__(self):
+        return str(self.to_dict())
+
+
+
+def current_search_stats():
+    """The `SearchStats` of the phase running in this context, or None outside of one"""
+    return _current_search_stats.get()
+
+
+def record_process_cache(cache_name, hit):
+    """Counts a lookup of a cache that lasts for the whole process in the phase running in this context, if any"""
+    stats = _current_search_stats.get()
+    if stats is not None:
+        stats.record_cache(cache_name, hit)
@@ -4,6 +4,7 @@ from collections import defaultdict
 import constants
 
 from .evaluate import evaluate
+from .find_state_instructions import NodeContext
 from .find_state_instructions import get_all_state_instructions
 
 
@@ -62,19 +63,22 @@ def move_item_to_front_of_list(l, item):
     return [l[i] for i in all_indicies]
 
 
-def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True):
+def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=True, stats=None):
     """
     :param mutator: a StateMutator object representing the state of the battle
     :param user_options: options for the bot
     :param opponent_options: options for the opponent
     :param depth: the remaining depth before the state is evaluated
     :param prune: specify whether or not to prune the tree
+    :param stats: an optional SearchStats object that is updated with the work done by the search
     :return: a dictionary representing the potential move combinations and their associated scores
     """
+    if stats is not None:
+        stats.nodes += 1
 
     winner = mutator.state.battle_is_finished()
     if winner:
-        return {(constants.DO_NOTHING_MOVE, constants.DO_NOTHING_MOVE): evaluate(mutator.state) + WON_BATTLE*depth*winner}
+        return {(constants.DO_NOTHING_MOVE, constants.DO_NOTHING_MOVE): evaluate(mutator.state, stats=stats) + WON_BATTLE*depth*winner}
 
     depth -= 1
 
@@ -82,10 +86,13 @@ def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=Tr
     # this is a special case in a random battle where the opponent's pokemon has fainted, but the opponent still
     # has reserves left that are unseen
     if opponent_options == [constants.DO_NOTHING_MOVE] and mutator.state.opponent.active.hp == 0:
-        return {(user_option, constants.DO_NOTHING_MOVE): evaluate(mutator.state) for user_option in user_options}
+        return {(user_option, constants.DO_NOTHING_MOVE): evaluate(mutator.state, stats=stats) for user_option in user_options}
 
     state_scores = dict()
 
+    # the state is the same at the start of every cell so what the moves are resolved with is shared between them
+    context = NodeContext(mutator.state)
+
     best_score = float('-inf')
     for i, user_move in enumerate(user_options):
         worst_score_for_this_row = float('inf')
@@ -96,14 +103,16 @@ def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=Tr
         for j, opponent_move in enumerate(opponent_options[:]):
             if skip:
                 state_scores[(user_move, opponent_move)] = float('nan')
+                if stats is not None:
+                    stats.pruned_cells += 1
                 continue
 
             score = 0
-            state_instructions = get_all_state_instructions(mutator, user_move, opponent_move)
+            state_instructions = get_all_state_instructions(mutator, user_move, opponent_move, stats=stats, context=context)
             if depth == 0:
                 for instructions in state_instructions:
                     mutator.apply(instructions.instructions)
-                    t_score = evaluate(mutator.state)
+                    t_score = evaluate(mutator.state, stats=stats)
                     score += (t_score * instructions.percentage)
                     mutator.reverse(instructions.instructions)
 
@@ -112,7 +121,7 @@ def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=Tr
                     this_percentage = instructions.percentage
                     mutator.apply(instructions.instructions)
                     next_turn_user_options, next_turn_opponent_options = mutator.state.get_all_options()
-                    safest = pick_safest(get_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune))
+                    safest = pick_safest(get_payoff_matrix(mutator, next_turn_user_options, next_turn_opponent_options, depth=depth, prune=prune, stats=stats))
                     score += safest[1] * this_percentage
                     mutator.reverse(instructions.instructions)
 
@@ -123,6 +132,8 @@ def get_payoff_matrix(mutator, user_options, opponent_options, depth=2, prune=Tr
 
             if prune and score < best_score:
                 skip = True
+                if stats is not None:
+                    stats.pruned_rows += 1
 
                 # MOST of the time in pokemon, an opponent's move that causes a prune will cause a prune elsewhere
                 # move this item to the front of the list to prune faster
@@ -1,6 +1,7 @@
 import constants
 
 from ...damage_calculator import is_super_effective
+from .. import dependencies
 
 
 def levitate(attacking_move, attacking_pokemon, defending_pokemon):
@@ -489,6 +490,51 @@ ability_lookup = {
 }
 
 
+# what each effect reads besides the move - see `special_effects.dependencies`
+ability_dependencies = {
+    levitate: (),
+    lightningrod: (),
+    stormdrain: (),
+    voltabsorb: (),
+    waterabsorb: (),
+    motordrive: (),
+    sapsipper: (),
+    multiscale: (dependencies.defender_hp,),
+    thickfat: (),
+    solidrock: (dependencies.defender_types,),
+    contrary: (),
+    noguard: (),
+    flashfire: (),
+    bulletproof: (),
+    furcoat: (),
+    fluffy: (),
+    magicbounce: (),
+    ironbarbs: (),
+    roughskin: (),
+    wonderguard: (dependencies.defender_types,),
+    stamina: (),
+    waterbubble: (),
+    queenlymajesty: (),
+    tanglinghair: (),
+    cottondown: (),
+    marvelscale: (dependencies.defender_status,),
+    justified: (),
+    shielddust: (),
+    competitive: (),
+    defiant: (),
+    weakarmor: (),
+    liquidooze: (),
+    innerfocus: (),
+    soundproof: (),
+    darkaura: (dependencies.attacker_ability,),
+    fairyaura: (dependencies.attacker_ability,),
+    icescales: (),
+    punkrock: (),
+    steamengine: (),
+    damp: ()
+}
+
+
 def ability_modify_attack_against(ability_name, attacking_move, attacking_pokemon, defending_pokemon):
     if (
         attacking_pokemon.ability == 'neutralizinggas' or
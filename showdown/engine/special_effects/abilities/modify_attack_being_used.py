@@ -2,6 +2,7 @@ import constants
 
 from ...damage_calculator import is_not_very_effective
 from ...damage_calculator import is_super_effective
+from .. import dependencies
 
 
 def analytic(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather):
@@ -419,6 +420,57 @@ ability_lookup = {
 }
 
 
+# what each effect reads besides the move - see `special_effects.dependencies`
+ability_dependencies = {
+    analytic: (dependencies.moves_first,),
+    adaptability: (dependencies.attacker_types,),
+    aerilate: (),
+    galvanize: (),
+    liquidvoice: (),
+    compoundeyes: (),
+    contrary: (),
+    hustle: (),
+    ironfist: (),
+    megalauncher: (),
+    noguard: (),
+    pixilate: (),
+    refrigerate: (),
+    scrappy: (dependencies.defender_types,),
+    serenegrace: (),
+    sheerforce: (),
+    strongjaw: (),
+    technician: (),
+    toughclaws: (),
+    toxicboost: (dependencies.attacker_status,),
+    hugepower: (),
+    guts: (dependencies.attacker_status,),
+    reckless: (),
+    rockhead: (),
+    parentalbond: (),
+    tintedlens: (dependencies.defender_types,),
+    skilllink: (),
+    waterbubble: (),
+    steelworker: (),
+    neuroforce: (dependencies.defender_types,),
+    blaze: (dependencies.attacker_hp,),
+    torrent: (dependencies.attacker_hp,),
+    overgrow: (dependencies.attacker_hp,),
+    swarm: (dependencies.attacker_hp,),
+    defeatist: (dependencies.attacker_hp,),
+    sandforce: (dependencies.current_weather,),
+    darkaura: (dependencies.defender_ability,),
+    fairyaura: (dependencies.defender_ability,),
+    prankster: (dependencies.defender_types,),
+    gorillatactics: (),
+    punkrock: (),
+    steelyspirit: (),
+    stakeout: (dependencies.defending_move_kind,),
+    solarpower: (dependencies.current_weather,),
+    transistor: (),
+    dragonsmaw: ()
+}
+
+
 def ability_modify_attack_being_used(ability_name, attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather):
     if attacking_pokemon.ability == 'neutralizinggas' or defending_pokemon.ability == 'neutralizinggas':
         return attacking_move
@@ -0,0 +1,92 @@
+"""What the special-effects that modify a move read besides the move itself
+
+Every effect that `update_attacking_move` can apply declares which of these it reads, so the move it makes
+can be remembered for the same move and the same values of them. An effect that reads something that is
+not here - boosted stats, the weight of a pokemon - is declared UNCACHEABLE and always runs"""
+import constants
+
+
+UNCACHEABLE = None
+
+
+def attacker_id(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return attacking_pokemon.id
+
+
+def attacker_types(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return tuple(attacking_pokemon.types)
+
+
+def attacker_status(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return attacking_pokemon.status
+
+
+def attacker_hp(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return attacking_pokemon.hp, attacking_pokemon.maxhp
+
+
+def attacker_ability(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return attacking_pokemon.ability
+
+
+def attacker_item(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return attacking_pokemon.item
+
+
+def attacker_boosts(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return (
+        attacking_pokemon.attack_boost,
+        attacking_pokemon.defense_boost,
+        attacking_pokemon.special_attack_boost,
+        attacking_pokemon.special_defense_boost,
+        attacking_pokemon.speed_boost
+    )
+
+
+def attacker_volatile_status(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return frozenset(attacking_pokemon.volatile_status)
+
+
+def defender_id(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return defending_pokemon.id
+
+
+def defender_types(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return tuple(defending_pokemon.types)
+
+
+def defender_status(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return defending_pokemon.status
+
+
+def defender_hp(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return defending_pokemon.hp, defending_pokemon.maxhp
+
+
+def defender_ability(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return defending_pokemon.ability
+
+
+def defender_item(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return defending_pokemon.item
+
+
+def defender_volatile_status(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return frozenset(defending_pokemon.volatile_status)
+
+
+def defending_move_kind(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    # the effects only look at whether the other pokemon is switching and the category of its move
+    return constants.SWITCH_STRING in defending_move, defending_move.get(constants.CATEGORY)
+
+
+def moves_first(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return first_move
+
+
+def current_weather(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return weather
+
+
+def current_terrain(attacking_pokemon, defending_pokemon, defending_move, first_move, weather, terrain):
+    return terrain
@@ -1,6 +1,7 @@
 import constants
 
 from ...damage_calculator import is_super_effective
+from .. import dependencies
 
 
 def eviolite(attacking_move, attacking_pokemon, defending_pokemon):
@@ -41,6 +42,16 @@ def weaknesspolicy(attacking_move, attacking_pokemon, defending_pokemon):
     return attacking_move
 
 
+# what each effect reads besides the move - see `special_effects.dependencies`
+item_dependencies = {
+    eviolite: (),
+    rockyhelmet: (),
+    assaultvest: (),
+    airballoon: (),
+    weaknesspolicy: (dependencies.defender_types,)
+}
+
+
 item_lookup = {
     'weaknesspolicy': weaknesspolicy,
     'eviolite': eviolite,
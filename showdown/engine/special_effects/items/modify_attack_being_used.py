@@ -1,6 +1,7 @@
 import constants
 
 from ...damage_calculator import is_super_effective
+from .. import dependencies
 
 
 def choiceband(attacking_move, attacking_pokemon, defending_pokemon):
@@ -216,6 +217,39 @@ def griseousorb(attacking_move, attacking_pokemon, defending_pokemon):
     return attacking_move
 
 
+# what each effect reads besides the move - see `special_effects.dependencies`
+item_dependencies = {
+    choiceband: (),
+    choicespecs: (),
+    lifeorb: (),
+    expertbelt: (dependencies.defender_types,),
+    blackglasses: (),
+    magnet: (),
+    spelltag: (),
+    thickclub: (dependencies.attacker_id,),
+    whiteherb: (),
+    wiseglasses: (),
+    blackbelt: (),
+    charcoal: (),
+    dragonfang: (),
+    hardstone: (),
+    metalcoat: (),
+    miracleseed: (),
+    mysticwater: (),
+    nevermeltice: (),
+    poisonbarb: (),
+    sharpbeak: (),
+    silkscarf: (),
+    silverpowder: (),
+    softsand: (),
+    twistedspoon: (),
+    souldew: (dependencies.attacker_id,),
+    adamantorb: (dependencies.attacker_id,),
+    lustrousorb: (dependencies.attacker_id,),
+    griseousorb: (dependencies.attacker_id,)
+}
+
+
 def item_modify_attack_being_used(item_name, attacking_move, attacking_pokemon, defending_pokemon):
     try:
         return globals()[item_name](attacking_move, attacking_pokemon, defending_pokemon)
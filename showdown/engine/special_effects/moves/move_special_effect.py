@@ -1,5 +1,6 @@
 import constants
 from data import pokedex
+from .. import dependencies
 
 
 def suckerpunch(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
@@ -568,6 +569,62 @@ move_lookup = {
 }
 
 
+# what each effect reads besides the move - see `special_effects.dependencies`
+move_dependencies = {
+    suckerpunch: (dependencies.moves_first, dependencies.defending_move_kind,),
+    eruption: (dependencies.attacker_hp,),
+    tailslap: (dependencies.attacker_ability,),
+    freezedry: (dependencies.defender_types,),
+    hex: (dependencies.defender_status,),
+    foulplay: dependencies.UNCACHEABLE,
+    storedpower: (dependencies.attacker_boosts,),
+    psyshock: dependencies.UNCACHEABLE,
+    facade: (dependencies.attacker_status,),
+    avalanche: (dependencies.moves_first, dependencies.defending_move_kind,),
+    gyroball: dependencies.UNCACHEABLE,
+    electroball: dependencies.UNCACHEABLE,
+    focuspunch: (dependencies.moves_first, dependencies.defending_move_kind,),
+    acrobatics: (dependencies.attacker_item,),
+    technoblast: (dependencies.attacker_item,),
+    multiattack: (dependencies.attacker_item,),
+    knockoff: (dependencies.defender_id, dependencies.defender_item, dependencies.defender_ability, dependencies.defender_volatile_status,),
+    hurricane: (dependencies.current_weather,),
+    blizzard: (dependencies.current_weather,),
+    solarbeam: (dependencies.current_weather,),
+    toxic: (dependencies.attacker_types,),
+    strengthsap: dependencies.UNCACHEABLE,
+    revelationdance: (dependencies.attacker_types,),
+    lowkick: dependencies.UNCACHEABLE,
+    painsplit: (dependencies.attacker_hp, dependencies.defender_hp,),
+    pursuit: (dependencies.defending_move_kind,),
+    aurawheel: (dependencies.attacker_id,),
+    dynamaxcannon: (dependencies.defender_volatile_status,),
+    dragondarts: (),
+    boltbeak: (dependencies.moves_first, dependencies.defending_move_kind,),
+    clangoroussoul: (dependencies.attacker_hp,),
+    bodypress: dependencies.UNCACHEABLE,
+    lifedew: (),
+    steelbeam: (),
+    doubleironbash: (),
+    morningsun: (dependencies.current_weather,),
+    shoreup: (dependencies.current_weather,),
+    heavyslam: dependencies.UNCACHEABLE,
+    noretreat: (dependencies.attacker_volatile_status,),
+    growth: (dependencies.current_weather,),
+    expandingforce: (dependencies.current_terrain,),
+    risingvoltage: (dependencies.current_terrain,),
+    steelroller: (dependencies.current_terrain,),
+    mistyexplosion: (dependencies.current_terrain,),
+    terrainpulse: (dependencies.current_terrain,),
+    poltergeist: (dependencies.defender_item,),
+    tripleaxel: (),
+    dualwingbeat: (),
+    wickedblow: (),
+    surgingstrikes: (),
+    weatherball: (dependencies.current_weather,)
+}
+
+
 def modify_attack_being_used(attacking_move, defending_move, attacking_pokemon, defending_pokemon, first_move, weather, terrain):
     move_func = move_lookup.get(attacking_move[constants.ID])
     if move_func is not None:
@@ -0,0 +1,208 @@
+"""The stats, speed and damage of one pokemon for many spreads at once
+
+The stats of the spreads are numpy arrays with one element per spread, so checking something that happened
+in a battle against every spread is a few array operations instead of one full calculation per spread.
+Everything that does not depend on the spread - the special-effects of the move, item and ability - is
+worked out by the same code the engine uses, once for every group of spreads that it is the same for"""
+import numpy as np
+
+import constants
+from data import all_move_json
+from showdown.engine.helpers import STATS
+from showdown.engine.helpers import natures
+from showdown.engine.objects import boost_multiplier_lookup
+from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.damage_calculator import calculate_modifier
+from showdown.engine.damage_calculator import get_defending_types
+from showdown.engine.damage_calculator import SPECIAL_LOGIC_MOVES
+from showdown.engine.find_state_instructions import get_effective_speed
+from showdown.engine.find_state_instructions import moves_in_order
+from showdown.engine.find_state_instructions import apply_speed_modifiers
+from showdown.engine.find_state_instructions import update_attacking_move
+
+
+# the special-effects of these moves use the stats or hp of the pokemon
+# they are calculated one spread at a time
+SPREAD_DEPENDENT_MOVES = (
+    constants.SPEED_BASED_MOVES |
+    set(SPECIAL_LOGIC_MOVES) |
+    {'foulplay', 'psyshock', 'psystrike', 'secretsword', 'bodypress'}
+)
+
+# the names of the engine pokemon's attributes for the stats
+STAT_ATTRIBUTES = {
+    constants.HITPOINTS: 'maxhp',
+    constants.ATTACK: 'attack',
+    constants.DEFENSE: 'defense',
+    constants.SPECIAL_ATTACK: 'special_attack',
+    constants.SPECIAL_DEFENSE: 'special_defense',
+    constants.SPEED: 'speed'
+}
+
+
+def calculate_stats_of_spreads(base_stats, level, spreads):
+    """`calculate_stats` for each (nature, evs) in `spreads`, with the evs as a comma-separated string
+       Returns {stat: array} with one element per spread"""
+    evs = np.array([[int(e) for e in evs.split(',')] for _, evs in spreads]).reshape(len(spreads), len(STATS))
+    spread_natures = [natures.get(nature, {}) for nature, _ in spreads]
+
+    stats = dict()
+    for i, stat in enumerate(STATS):
+        values = np.floor(((2 * base_stats[stat] + 31 + np.floor(evs[:, i] / 4)) * level) / 100)
+        values += level + 10 if stat == constants.HITPOINTS else 5
+
+        # in the same order as `update_stats_from_nature` so the rounding is the same
+        values = np.where([n.get('plus') == stat for n in spread_natures], values * 1.1, values)
+        values = np.where([n.get('minus') == stat for n in spread_natures], values / 1.1, values)
+        stats[stat] = values.astype(int)
+
+    return stats
+
+
+def get_effective_speeds(state, side, speeds):
+    """`get_effective_speed` of `side`'s active pokemon for each of `speeds`"""
+    boosted_speeds = boost_multiplier_lookup[side.active.speed_boost] * np.asarray(speeds)
+    return apply_speed_modifiers(state, side, boosted_speeds).astype(int)
+
+
+def calculate_max_damage_of_spreads(state, attacking_side_string, attacking_move, defending_move, spreads_side_string, stats):
+    """`calculate_damage` with calc_type='max' for every spread of the active pokemon of `spreads_side_string`, with
+       the stats of the spreads from `calculate_stats_of_spreads`. The rest of that pokemon, e.g. its item, ability and
+       hp percentage, is used as it is
+
+       Returns an array with the damage of each spread, or None for a move that does no damage"""
+    spreads_side = state.self if spreads_side_string == constants.SELF else state.opponent
+
+    if attacking_move in SPREAD_DEPENDENT_MOVES:
+        return _calculate_max_damage_one_spread_at_a_time(state, attacking_side_string, attacking_move, defending_move, spreads_side, stats)
+
+    # the special-effects copy a move before changing it so the moves are not copied here
+    attacking_move_dict = all_move_json[attacking_move]
+    if defending_move.startswith(constants.SWITCH_STRING + " "):
+        defending_move_dict = {constants.SWITCH_STRING: defending_move.split(constants.SWITCH_STRING)[-1]}
+    else:
+        defending_move_dict = all_move_json.get(defending_move)
+
+    if attacking_side_string == constants.SELF:
+        attacking_side = state.self
+        defending_side = state.opponent
+    elif attacking_side_string == constants.OPPONENT:
+        attacking_side = state.opponent
+        defending_side = state.self
+    else:
+        raise ValueError("attacking_side_string must be one of: ['self', 'opponent']")
+
+    conditions = {
+        constants.REFLECT: state.opponent.side_conditions[constants.REFLECT],
+        constants.LIGHT_SCREEN: state.opponent.side_conditions[constants.LIGHT_SCREEN],
+        constants.AURORA_VEIL: state.opponent.side_conditions[constants.AURORA_VEIL],
+        constants.WEATHER: state.weather,
+        constants.TERRAIN: state.field
+    }
+
+    # which pokemon moves first can change the move so the spreads are split by it
+    attacker_moves_first = _user_moves_first_for_spreads(state, attacking_move_dict, defending_move_dict, spreads_side, stats[constants.SPEED])
+
+    max_damage = np.zeros(len(attacker_moves_first), dtype=int)
+    for moves_first in set(attacker_moves_first.tolist()):
+        move = attacking_move_dict
+
+        # a charge move doesn't need to charge when only calculating damage
+        if constants.CHARGE in move[constants.FLAGS]:
+            move = move.copy()
+            move[constants.FLAGS] = {k: v for k, v in move[constants.FLAGS].items() if k != constants.CHARGE}
+
+        move = update_attacking_move(
+            attacking_side.active,
+            defending_side.active,
+            move,
+            defending_move_dict,
+            moves_first,
+            state.weather,
+            state.field
+        )
+        damage = _calculate_max_damage_of_spreads(attacking_side, defending_side, spreads_side, move, conditions, stats)
+        if damage is None:
+            return None
+        np.copyto(max_damage, damage, where=attacker_moves_first == moves_first)
+
+    return max_damage
+
+
+def _user_moves_first_for_spreads(state, user_move, opponent_move, spreads_side, speeds):
+    # only the speed changes between spreads and `moves_in_order` compares the speeds of all of them at once
+    effective_speeds = get_effective_speeds(state, spreads_side, speeds)
+    if spreads_side is state.self:
+        moves_first = moves_in_order(state, user_move, opponent_move, effective_speeds, get_effective_speed(state, state.opponent))
+    else:
+        moves_first = moves_in_order(state, user_move, opponent_move, get_effective_speed(state, state.self), effective_speeds)
+    return np.broadcast_to(moves_first, effective_speeds.shape)
+
+
+def _calculate_max_damage_of_spreads(attacking_side, defending_side, spreads_side, move, conditions, stats):
+    # the same calculation as `_calculate_damage`, with the stats of the spreads' pokemon being arrays
+    attacker = attacking_side.active
+    defender = defending_side.active
+
+    attacking_type = move.get(constants.CATEGORY)
+    if attacking_type == constants.PHYSICAL:
+        attack = constants.ATTACK
+        defense = constants.DEFENSE
+        attack_boost = attacker.attack_boost
+        defense_boost = defender.defense_boost
+    elif attacking_type == constants.SPECIAL:
+        attack = constants.SPECIAL_ATTACK
+        defense = constants.SPECIAL_DEFENSE
+        attack_boost = attacker.special_attack_boost
+        defense_boost = defender.special_defense_boost
+    else:
+        return None
+
+    if move[constants.BASE_POWER] == 0:
+        return 0
+
+    attacking_stat = stats[attack] if attacking_side is spreads_side else getattr(attacker, STAT_ATTRIBUTES[attack])
+    defending_stat = stats[defense] if defending_side is spreads_side else getattr(defender, STAT_ATTRIBUTES[defense])
+
+    # an unaware defender ignores the boosts of a physical attacker, an unaware attacker ignores all of the defender's
+    if not (defender.ability == 'unaware' and attack == constants.ATTACK):
+        attacking_stat = boost_multiplier_lookup[attack_boost] * attacking_stat
+    if attacker.ability != 'unaware':
+        defending_stat = boost_multiplier_lookup[defense_boost] * defending_stat
+
+    # rock types get 1.5x SPDEF in sand
+    if conditions[constants.WEATHER] == constants.SAND and 'rock' in defender.types and defense == constants.SPECIAL_DEFENSE:
+        defending_stat = np.floor(defending_stat * 1.5)
+
+    defending_types = get_defending_types(move, defender)
+
+    damage = int(int((2 * attacker.level) / 5) + 2) * move[constants.BASE_POWER]
+    damage = np.floor(damage * np.asarray(attacking_stat) / np.asarray(defending_stat))
+    damage = np.floor(damage / 50) + 2
+    damage = damage * calculate_modifier(attacker, defender, defending_types, move, conditions)
+
+    return damage.astype(int)
+
+
+def _calculate_max_damage_one_spread_at_a_time(state, attacking_side_string, attacking_move, defending_move, spreads_side, stats):
+    spreads_pokemon = spreads_side.active
+    original_hp = spreads_pokemon.hp
+    original_stats = {stat: getattr(spreads_pokemon, attribute) for stat, attribute in STAT_ATTRIBUTES.items()}
+    hp_percent = spreads_pokemon.hp / spreads_pokemon.maxhp if spreads_pokemon.maxhp else 1
+
+    max_damage = np.zeros(len(stats[constants.SPEED]), dtype=int)
+    for i in range(len(max_damage)):
+        for stat, attribute in STAT_ATTRIBUTES.items():
+            setattr(spreads_pokemon, attribute, int(stats[stat][i]))
+        spreads_pokemon.hp = round(spreads_pokemon.maxhp * hp_percent)
+
+        damage = calculate_damage(state, attacking_side_string, attacking_move, defending_move, calc_type='max')
+        if damage is None:
+            max_damage = None
+            break
+        max_damage[i] = damage[0]
+
+    for stat, attribute in STAT_ATTRIBUTES.items():
+        setattr(spreads_pokemon, attribute, original_stats[stat])
+    spreads_pokemon.hp = original_hp
+    return max_damage
@@ -9,7 +9,7 @@ def switch_out_move_triggered(move, damage_amounts):
             return damage_amounts is not None and all(damage_amounts)
 
 
-def get_best_switch_pokemon(mutator, instructions, attacker, attacking_side, defending_move, first_move):
+def get_best_switch_pokemon(mutator, instructions, attacker, attacking_side, defending_move, first_move, stats=None):
     from .select_best_move import get_payoff_matrix
 
     switches = attacking_side.get_switches()
@@ -22,8 +22,8 @@ def get_best_switch_pokemon(mutator, instructions, attacker, attacking_side, def
         other_move = constants.DO_NOTHING_MOVE
 
     if attacker == constants.SELF:
-        best_switch = max(get_payoff_matrix(mutator, switches, [other_move], depth=1).items(), key=lambda x: x[1])[0][0]
+        best_switch = max(get_payoff_matrix(mutator, switches, [other_move], depth=1, stats=stats).items(), key=lambda x: x[1])[0][0]
     else:
-        best_switch = min(get_payoff_matrix(mutator, [other_move], switches, depth=1).items(), key=lambda x: x[1])[0][1]
+        best_switch = min(get_payoff_matrix(mutator, [other_move], switches, depth=1, stats=stats).items(), key=lambda x: x[1])[0][1]
 
     return best_switch.split()[-1].strip()
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from showdown.websocket_client import PSWebsocketClient
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+SAVE_REPLAY_RESPONSE = "|queryresponse|savereplay|"
+
+
+def get_battle_tag(msg):
+    """Returns the battle-tag of the room a message belongs to, or None if it is not for a battle room"""
+    if msg.startswith('>battle-'):
+        return msg.split('\n', 1)[0][1:].strip()
+    elif msg.startswith(SAVE_REPLAY_RESPONSE):
+        # the replay's id is the battle-tag without the `battle-` prefix
+        try:
+            return "battle-{}".format(json.loads(msg.replace(SAVE_REPLAY_RESPONSE, ""))['id'])
+        except (ValueError, KeyError):
+            return None
+    return None
+
+
+class MessageRouter:
+    """Reads every message from a websocket connection and puts it in the queue for the room it belongs to
+
+    Messages for a battle-tag that has not been seen before create a new queue and
+    the battle-tag is put in `new_battles`. Messages that are not for a battle room
+    go to the global queue, which only keeps the most recent `global_queue_size` messages"""
+
+    def __init__(self, ps_websocket_client, global_queue_size=100):
+        self.ps_websocket_client = ps_websocket_client
+        self.battle_queues = dict()
+        self.finished_battles = set()
+        self.new_battles = asyncio.Queue()
+        self.global_queue = asyncio.Queue(maxsize=global_queue_size)
+
+    def route(self, msg):
+        battle_tag = get_battle_tag(msg)
+        if battle_tag is None:
+            if self.global_queue.full():
+                self.global_queue.get_nowait()
+            self.global_queue.put_nowait(msg)
+            return
+
+        if battle_tag in self.finished_battles:
+            logger.debug("Dropping message for finished battle {}".format(battle_tag))
+            return
+
+        if battle_tag not in self.battle_queues:
+            logger.debug("New battle: {}".format(battle_tag))
+            self.battle_queues[battle_tag] = asyncio.Queue()
+            self.new_battles.put_nowait(battle_tag)
+
+        self.battle_queues[battle_tag].put_nowait(msg)
+
+    async def run(self):
+        while True:
+            msg = await self.ps_websocket_client.receive_message()
+            self.route(msg)
+
+    def lobby(self):
+        """A connection that receives the messages that are not for a battle room"""
+        return RoutedWebsocketClient(self, self.global_queue)
+
+    async def next_battle(self):
+        """Waits for a message from a new battle room and returns a connection that receives that battle's messages"""
+        battle_tag = await self.new_battles.get()
+        return RoutedWebsocketClient(self, self.battle_queues[battle_tag])
+
+    def finish_battle(self, battle_tag):
+        self.battle_queues.pop(battle_tag, None)
+        self.finished_battles.add(battle_tag)
+
+
+class RoutedWebsocketClient(PSWebsocketClient):
+    """Behaves like the `PSWebsocketClient` the router reads from, but only receives messages from one queue"""
+
+    def __init__(self, router, queue):
+        self.router = router
+        self.queue = queue
+        self.username = router.ps_websocket_client.username
+
+    async def receive_message(self):
+        return await self.queue.get()
+
+    async def send_message(self, room, message_list):
+        await self.router.ps_websocket_client.send_message(room, message_list)
+        self.last_message = self.router.ps_websocket_client.last_message
+
+    async def leave_battle(self, battle_tag, save_replay=False):
+        await super().leave_battle(battle_tag, save_replay=save_replay)
+        self.router.finish_battle(battle_tag)
@@ -0,0 +1,90 @@
+"""The messages from the server parsed once into events
+
+Every line of a message is split into its fields once. What the checks in `battle_modifier` look for
+further on in the message - where the lines caused by a move end, the moves that were used, entry
+hazards taking effect - is indexed while parsing, so looking ahead does not rescan the message"""
+from collections import namedtuple
+
+import constants
+from showdown.engine.helpers import normalize_name
+
+
+# the actions that end the lines caused by a move
+MOVE_END_STRINGS = {'move', 'switch', 'upkeep', ''}
+
+# the entry hazards that show up as damage from them
+HAZARD_DAMAGE_SOURCES = {
+    '[from] Stealth Rock': constants.STEALTH_ROCK,
+    '[from] Spikes': constants.SPIKES
+}
+
+
+# `action` is '' for a line without one, `side` is the start of the identifier of the pokemon the line is about
+# e.g. 'p2' for 'p2a: Weedle', and `move` is the normalized name of the move of a 'move' line
+ProtocolEvent = namedtuple('ProtocolEvent', ['action', 'split_msg', 'side', 'move'])
+
+
+def parse_line(line):
+    split_msg = line.split('|')
+    if len(split_msg) < 2:
+        return ProtocolEvent('', split_msg, None, None)
+
+    action = split_msg[1].strip()
+    side = split_msg[2][:2] if len(split_msg) > 2 else None
+    move = normalize_name(split_msg[3]) if action == 'move' and len(split_msg) > 3 else None
+    return ProtocolEvent(action, split_msg, side, move)
+
+
+class ProtocolMessage:
+    __slots__ = ('events', 'move_indices', 'move_end', 'last_index', 'last_hazard_index')
+
+    def __init__(self, msg_lines):
+        self.events = [parse_line(line) for line in msg_lines]
+
+        # the index of every 'move' event
+        self.move_indices = []
+
+        # {action: index of the last event with it}
+        self.last_index = dict()
+
+        # {(side, hazard): index of the last event with the hazard affecting that side's pokemon}
+        self.last_hazard_index = dict()
+
+        for i, event in enumerate(self.events):
+            self.last_index[event.action] = i
+            split_msg = event.split_msg
+            if event.action == 'move':
+                self.move_indices.append(i)
+
+            # |-damage|p2a: Weedle|88/100|[from] Stealth Rock
+            elif event.action == '-damage' and len(split_msg) > 4 and split_msg[4] in HAZARD_DAMAGE_SOURCES:
+                self.last_hazard_index[(event.side, HAZARD_DAMAGE_SOURCES[split_msg[4]])] = i
+
+            # |-activate|p2a: Gengar|move: Sticky Web
+            elif event.action == '-activate' and len(split_msg) == 4 and split_msg[3] == 'move: Sticky Web':
+                self.last_hazard_index[(event.side, constants.STICKY_WEB)] = i
+
+        # the index of the first event after each event that ends the lines of a move
+        self.move_end = [len(self.events)] * len(self.events)
+        end = len(self.events)
+        for i in range(len(self.events) - 1, -1, -1):
+            self.move_end[i] = end
+            if self.events[i].action in MOVE_END_STRINGS:
+                end = i
+
+    @classmethod
+    def from_message(cls, msg):
+        return cls(msg.split('\n'))
+
+    def until_move_end(self, i):
+        """The events after the `i`th one up to the end of the lines of the move"""
+        return self.events[i + 1:self.move_end[i]]
+
+    def moves(self):
+        return [self.events[i] for i in self.move_indices]
+
+    def has_action_after(self, i, action):
+        return self.last_index.get(action, -1) > i
+
+    def hazard_affected_after(self, i, side, hazard):
+        return self.last_hazard_index.get((side, hazard), -1) > i
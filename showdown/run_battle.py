@@ -2,12 +2,14 @@ import importlib
 import json
 import asyncio
 import concurrent.futures
+import contextvars
 from copy import deepcopy
 import logging
 
 import constants
 import config
-from showdown.engine.evaluate import Scoring
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
 from showdown.battle import Pokemon
 from showdown.battle import LastUsedMove
 from showdown.battle_modifier import async_update_battle
@@ -28,9 +30,14 @@ async def async_pick_move(battle):
 
     loop = asyncio.get_event_loop()
     with concurrent.futures.ThreadPoolExecutor() as pool:
+        # the executor's thread does not share this context - copy it so the search uses this battle's ruleset
         best_move = await loop.run_in_executor(
-            pool, battle_copy.find_best_move
+            pool, contextvars.copy_context().run, battle_copy.find_best_move
         )
+    battle.search_stats = battle_copy.search_stats
+    if battle.search_stats is not None:
+        logger.debug("Search stats: {}".format(battle.search_stats))
+
     choice = best_move[0]
     if constants.SWITCH_STRING in choice:
         battle.user.last_used_move = LastUsedMove(battle.user.active.name, "switch {}".format(choice.split()[-1]), battle.turn)
@@ -133,6 +140,10 @@ async def start_standard_battle(ps_websocket_client: PSWebsocketClient, pokemon_
         if split_line[1] == constants.TEAM_PREVIEW_POKE and split_line[2].strip() == opponent_id:
             opponent_pokemon.append(split_line[3])
 
+    # usage-stats may need to be downloaded - do not block the other battles while that happens
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, contextvars.copy_context().run, get_ruleset(pokemon_battle_type).load_pokemon_sets)
+
     battle.initialize_team_preview(user_json, opponent_pokemon, pokemon_battle_type)
     await handle_team_preview(battle, ps_websocket_client)
 
@@ -141,7 +152,6 @@ async def start_standard_battle(ps_websocket_client: PSWebsocketClient, pokemon_
 
 async def start_battle(ps_websocket_client, pokemon_battle_type):
     if "random" in pokemon_battle_type:
-        Scoring.POKEMON_ALIVE_STATIC = 30  # random battle benefits from a lower static score for an alive pkmn
         battle = await start_random_battle(ps_websocket_client, pokemon_battle_type)
     else:
         battle = await start_standard_battle(ps_websocket_client, pokemon_battle_type)
@@ -153,6 +163,12 @@ async def start_battle(ps_websocket_client, pokemon_battle_type):
 
 
 async def pokemon_battle(ps_websocket_client, pokemon_battle_type):
+    # the ruleset is reset when the battle ends so the task that played it is left as it was
+    with use_ruleset(get_ruleset(pokemon_battle_type)):
+        return await _play_battle(ps_websocket_client, pokemon_battle_type)
+
+
+async def _play_battle(ps_websocket_client, pokemon_battle_type):
     battle = await start_battle(ps_websocket_client, pokemon_battle_type)
     while True:
 
@@ -0,0 +1,183 @@
+"""What is believed about the set of one of the opponent's pokemon
+
+The belief is a weight for every (spread, item, ability) the pokemon's usage-stats allow. It is made
+once and each piece of evidence from the protocol - which pokemon moved first, how much damage was done -
+rules out the sets that could not have made it, so the sets are not guessed again from scratch every turn.
+Revealed items and abilities and the `can_have_*` flags of the pokemon are applied when the belief is read"""
+import numpy as np
+
+import constants
+from showdown.engine.helpers import calculate_stats
+from showdown.engine.spread_calculator import calculate_stats_of_spreads
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SetBelief:
+    __slots__ = ('pokemon_name', 'sets', '_spread_groups')
+
+    def __init__(self, pokemon_name, sets):
+        self.pokemon_name = pokemon_name
+
+        # {(spread, item, ability): weight}
+        # updates replace this dict instead of changing it so copies of the belief can share it
+        self.sets = sets
+
+        # (sets, base_stats, level, groups) of the last `update_spreads`, see `_get_spread_groups`
+        self._spread_groups = None
+
+    @classmethod
+    def from_usage(cls, pokemon_name, spreads, items, abilities):
+        """Each argument is a list of (value, percentage) with the parts assumed to be independent, as in the usage-stats"""
+        sets = dict()
+        for spread, spread_percentage in spreads:
+            for item, item_percentage in items:
+                for ability, ability_percentage in abilities:
+                    sets[(tuple(spread), item, ability)] = spread_percentage * item_percentage * ability_percentage
+        return cls(pokemon_name, sets)
+
+    def copy(self):
+        belief = SetBelief(self.pokemon_name, self.sets)
+        belief._spread_groups = self._spread_groups
+        return belief
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def update(self, likelihood):
+        """Multiplies the weight of every set by `likelihood(spread, item, ability)` and forgets the sets that reach 0
+           Evidence that none of the sets could have made is ignored - the set is more likely missing from the usage-stats"""
+        return self._update_weights({s: likelihood(*s) for s in self.sets})
+
+    def update_spreads(self, base_stats, level, likelihoods):
+        """`update` with `likelihoods(item, ability, stats)` returning the likelihood of every spread with that item and
+           ability at once, where `stats` is from `calculate_stats_of_spreads` for those spreads"""
+        likelihood_of_set = dict()
+        groups_left = list()
+        for item, ability, item_and_ability_sets, stats in self._get_spread_groups(base_stats, level):
+            spread_likelihoods = np.asarray(likelihoods(item, ability, stats))
+            likelihood_of_set.update(zip(item_and_ability_sets, spread_likelihoods.tolist()))
+
+            left = spread_likelihoods > 0
+            if left.all():
+                groups_left.append((item, ability, item_and_ability_sets, stats))
+            elif left.any():
+                sets_left = [s for s, is_left in zip(item_and_ability_sets, left.tolist()) if is_left]
+                groups_left.append((item, ability, sets_left, {stat: values[left] for stat, values in stats.items()}))
+
+        if not self._update_weights(likelihood_of_set):
+            return False
+
+        # the sets that are left are in the same groups so they are not grouped again
+        self._spread_groups = (self.sets, dict(base_stats), level, groups_left)
+        return True
+
+    def _get_spread_groups(self, base_stats, level):
+        """[(item, ability, sets, stats)] with the sets grouped by their item and ability and `stats` being from
+           `calculate_stats_of_spreads` for the spreads of the group's sets
+           The groups are kept with the sets they are for, `update_spreads` keeps them up to date"""
+        if self._spread_groups is not None:
+            sets, groups_base_stats, groups_level, groups = self._spread_groups
+            if sets is self.sets and groups_base_stats == base_stats and groups_level == level:
+                return groups
+
+        sets_by_item_and_ability = dict()
+        for s in self.sets:
+            sets_by_item_and_ability.setdefault(s[1:], []).append(s)
+
+        # the stats of every set in the order of the groups, so the stats of a group are a slice of them
+        ordered_sets = [s for item_and_ability_sets in sets_by_item_and_ability.values() for s in item_and_ability_sets]
+        spreads = list(dict.fromkeys(s[0] for s in ordered_sets))
+        spread_index = {spread: i for i, spread in enumerate(spreads)}
+        indices = np.array([spread_index[s[0]] for s in ordered_sets], dtype=int)
+        stats = {stat: values[indices] for stat, values in calculate_stats_of_spreads(base_stats, level, spreads).items()}
+
+        groups = list()
+        start = 0
+        for (item, ability), item_and_ability_sets in sets_by_item_and_ability.items():
+            end = start + len(item_and_ability_sets)
+            groups.append((item, ability, item_and_ability_sets, {stat: values[start:end] for stat, values in stats.items()}))
+            start = end
+
+        self._spread_groups = (self.sets, dict(base_stats), level, groups)
+        return groups
+
+    def _update_weights(self, likelihood_of_set):
+        updated = dict()
+        for s, weight in self.sets.items():
+            new_weight = weight * likelihood_of_set[s]
+            if new_weight > 0:
+                updated[s] = new_weight
+
+        if not updated:
+            logger.debug("No set for {} agrees with what was seen, ignoring it".format(self.pokemon_name))
+            return False
+
+        if len(updated) < len(self.sets):
+            logger.debug("Ruled out {} of {} sets for {}".format(len(self.sets) - len(updated), len(self.sets), self.pokemon_name))
+        self.sets = updated
+        return True
+
+    def weighted_sets(self, pkmn):
+        """Returns [((spread, item, ability), percentage)] for the sets `pkmn` can still have, in the order they were made
+           A revealed item or ability that the belief does not have replaces the item or ability of every set"""
+        sets = self.sets
+        if pkmn.item != constants.UNKNOWN_ITEM:
+            sets = _with_revealed(sets, 1, pkmn.item)
+        else:
+            sets = {s: w for s, w in sets.items() if item_is_possible(pkmn, s[1])}
+
+        if pkmn.ability is not None:
+            sets = _with_revealed(sets, 2, pkmn.ability)
+
+        total_weight = sum(sets.values())
+        if not total_weight:
+            return []
+        return [(s, w / total_weight * 100) for s, w in sets.items()]
+
+    def __repr__(self):
+        return "SetBelief({}, {} sets)".format(self.pokemon_name, len(self.sets))
+
+
+def item_is_possible(pkmn, item):
+    if item in constants.CHOICE_ITEMS:
+        return pkmn.can_have_choice_item
+    elif item == 'lifeorb':
+        return pkmn.can_have_life_orb
+    elif item == 'assaultvest':
+        return pkmn.can_have_assaultvest
+    elif item == 'heavydutyboots':
+        return pkmn.can_have_heavydutyboots
+    return True
+
+
+def _with_revealed(sets, index, revealed):
+    matching = {s: w for s, w in sets.items() if s[index] == revealed}
+    if matching:
+        return matching
+
+    replaced = dict()
+    for s, w in sets.items():
+        revealed_set = s[:index] + (revealed,) + s[index + 1:]
+        replaced[revealed_set] = replaced.get(revealed_set, 0) + w
+    return replaced
+
+
+def apply_set(pokemon, base_stats, spread, item, ability):
+    """Gives the engine pokemon `pokemon` the stats of `spread` and the item and ability, keeping the percentage of its hp"""
+    nature, evs = spread
+    evs = tuple(int(e) for e in evs.split(','))
+    stats = calculate_stats(base_stats, pokemon.level, nature=nature, evs=evs)
+    hp_percent = pokemon.hp / pokemon.maxhp if pokemon.maxhp else 1
+    pokemon.maxhp = stats[constants.HITPOINTS]
+    pokemon.hp = round(pokemon.maxhp * hp_percent)
+    pokemon.attack = stats[constants.ATTACK]
+    pokemon.defense = stats[constants.DEFENSE]
+    pokemon.special_attack = stats[constants.SPECIAL_ATTACK]
+    pokemon.special_defense = stats[constants.SPECIAL_DEFENSE]
+    pokemon.speed = stats[constants.SPEED]
+    pokemon.nature = nature
+    pokemon.evs = evs
+    pokemon.item = item
+    pokemon.ability = ability
@@ -16,6 +16,26 @@ class SaveReplayError(Exception):
     pass
 
 
+class MessageRecorder:
+    """Appends every websocket message to a file as a line of JSON
+
+    The first line describes the session so the recording can be replayed without a server"""
+
+    IN = 'in'
+    OUT = 'out'
+    META = 'meta'
+
+    def __init__(self, path, **meta):
+        self.file = open(path, 'a', buffering=1)
+        self.write(self.META, meta)
+
+    def write(self, direction, message):
+        self.file.write(json.dumps({'direction': direction, 'time': time.time(), 'message': message}) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
 class PSWebsocketClient:
 
     websocket = None
@@ -25,10 +45,12 @@ class PSWebsocketClient:
     password = None
     last_message = None
     last_challenge_time = 0
+    recorder = None
 
     @classmethod
-    async def create(cls, username, password, address):
+    async def create(cls, username, password, address, recorder=None):
         self = PSWebsocketClient()
+        self.recorder = recorder
         self.username = username
         self.password = password
         self.address = "ws://{}/showdown/websocket".format(address)
@@ -39,6 +61,8 @@ class PSWebsocketClient:
     async def receive_message(self):
         message = await self.websocket.recv()
         logger.debug("Received message from websocket: {}".format(message))
+        if self.recorder is not None:
+            self.recorder.write(MessageRecorder.IN, message)
         return message
 
     async def send_message(self, room, message_list):
@@ -46,6 +70,8 @@ class PSWebsocketClient:
         logger.debug("Sending message to websocket: {}".format(message))
         await self.websocket.send(message)
         self.last_message = message
+        if self.recorder is not None:
+            self.recorder.write(MessageRecorder.OUT, message)
 
     async def get_id_and_challstr(self):
         while True:
@@ -110,8 +136,9 @@ class PSWebsocketClient:
         await self.send_message('', message)
         self.last_challenge_time = time.time()
 
-    async def accept_challenge(self, battle_format, team):
-        logger.debug("Waiting for a {} challenge".format(battle_format))
+    async def accept_challenge(self, battle_formats, team):
+        """Accepts the first challenge in one of `battle_formats` and returns its format"""
+        logger.debug("Waiting for a challenge in one of {}".format(battle_formats))
         await self.update_team(team)
         username = None
         while username is None:
@@ -122,7 +149,7 @@ class PSWebsocketClient:
                     challenges = json.loads(split_msg[2])
                     if challenges['challengesFrom'] is not None:
                         username, challenge_format = next(iter(challenges['challengesFrom'].items()))
-                        if challenge_format != battle_format:
+                        if challenge_format not in battle_formats:
                             username = None
                 except ValueError:
                     username = None
@@ -131,6 +158,7 @@ class PSWebsocketClient:
 
         message = ["/accept " + username]
         await self.send_message('', message)
+        return challenge_format
 
     async def search_for_match(self, battle_format, team):
         logger.debug("Searching for ranked {} match".format(battle_format))
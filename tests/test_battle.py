@@ -1,13 +1,28 @@
+import random
 import unittest
 from unittest import mock
+from copy import deepcopy
 
 import constants
-
+import config
+
+from data.parse_smogon_stats import MOVES_STRING
+from data.parse_smogon_stats import SPREADS_STRING
+from data.parse_smogon_stats import ABILITY_STRING
+from data.parse_smogon_stats import ITEM_STRING
+from data.ruleset import get_ruleset
+from data.ruleset import set_ruleset
+from data.ruleset import reset_ruleset
 from showdown.battle import LastUsedMove
 from showdown.battle import Battle
 from showdown.battle import Battler
 from showdown.battle import Pokemon
 from showdown.battle import Move
+from showdown.battle import get_weighted_hypotheses
+from showdown.battle import combine_weighted_parts
+from showdown.battle import PREPARE_BATTLES_SAMPLE
+from showdown.engine.objects import Pokemon as TransposePokemon
+from showdown.engine.objects import StateMutator
 
 
 # so we can instantiate a Battle object for testing
@@ -1293,3 +1308,282 @@ class TestBattle(unittest.TestCase):
         )
 
         self.assertEqual(expected_options, self.battle.get_all_options())
+
+
+class TestGetWeightedHypotheses(unittest.TestCase):
+    def setUp(self):
+        self.spreads = [(('timid', '0,0,0,252,4,252'), 60), (('modest', '0,0,0,252,4,252'), 40)]
+        self.items = [('lightball', 50), ('choicespecs', 50)]
+        self.abilities = [('static', 100)]
+        self.moves = [(('surf',), 100)]
+        self.previous_sampling = config.prepare_battles_sampling
+
+    def tearDown(self):
+        config.prepare_battles_sampling = self.previous_sampling
+
+    def test_without_a_budget_every_combination_is_given_in_order(self):
+        hypotheses = get_weighted_hypotheses(self.spreads, self.items, self.abilities, self.moves)
+        self.assertEqual(
+            [
+                ((('timid', '0,0,0,252,4,252'), 'lightball', 'static', ('surf',)), 0.3),
+                ((('timid', '0,0,0,252,4,252'), 'choicespecs', 'static', ('surf',)), 0.3),
+                ((('modest', '0,0,0,252,4,252'), 'lightball', 'static', ('surf',)), 0.2),
+                ((('modest', '0,0,0,252,4,252'), 'choicespecs', 'static', ('surf',)), 0.2),
+            ],
+            [(h, round(w, 6)) for h, w in hypotheses]
+        )
+
+    def test_budget_orders_combinations_by_their_probability(self):
+        items = [('choicespecs', 20), ('lightball', 80)]
+        hypotheses = get_weighted_hypotheses(self.spreads, items, self.abilities, self.moves, budget=1)
+        self.assertEqual([((('timid', '0,0,0,252,4,252'), 'lightball', 'static', ('surf',)), 0.48)], [(h, round(w, 6)) for h, w in hypotheses])
+
+    def test_sampling_gives_each_combination_once(self):
+        config.prepare_battles_sampling = PREPARE_BATTLES_SAMPLE
+        hypotheses = get_weighted_hypotheses(self.spreads, self.items, self.abilities, self.moves, budget=2)
+        self.assertEqual(4, len(hypotheses))
+        self.assertEqual(4, len(set(h for h, _ in hypotheses)))
+
+    def test_sampling_picks_small_weights_in_proportion_to_them(self):
+        config.prepare_battles_sampling = PREPARE_BATTLES_SAMPLE
+        random_state = random.getstate()
+        random.seed(0)
+
+        # joint probabilities of 1e-4 to 4e-4, which u^(1/weight) would have made all 0
+        part = [('a', 0.01), ('b', 0.02), ('c', 0.03), ('d', 0.04)]
+        trials = 4000
+        first = {'a': 0, 'b': 0, 'c': 0, 'd': 0}
+        for _ in range(trials):
+            (value,), _ = combine_weighted_parts([part], budget=1)[0]
+            first[value] += 1
+        random.setstate(random_state)
+
+        for value, percentage in part:
+            expected = trials * percentage / 0.1
+            self.assertAlmostEqual(expected, first[value], delta=expected * 0.15, msg=value)
+
+
+class TestPrepareBattles(unittest.TestCase):
+    def setUp(self):
+        self.ruleset = get_ruleset('gen8preparebattlestest')
+        self.ruleset.load_pokemon_sets({
+            'pikachu': {
+                SPREADS_STRING: [('timid', '0,0,0,252,4,252', 50), ('modest', '0,0,0,252,4,252', 30), ('jolly', '0,252,0,0,4,252', 20)],
+                ITEM_STRING: [('lightball', 60), ('choicespecs', 30)],
+                ABILITY_STRING: [('static', 100)],
+                MOVES_STRING: [('thunderbolt', 99), ('voltswitch', 80), ('surf', 60), ('grassknot', 50), ('extremespeed', 40)],
+            }
+        })
+        self.token = set_ruleset(self.ruleset)
+        self.previous_budget = config.prepare_battles_budget
+
+        self.battle = Battle(None)
+        self.battle.battle_type = constants.STANDARD_BATTLE
+        self.battle.generation = 'gen8'
+        self.battle.user.active = Pokemon('raichu', 100)
+        self.battle.opponent.active = Pokemon('pikachu', 100)
+        self.battle.opponent.active.moves = [Move('thunderbolt')]
+
+    def tearDown(self):
+        reset_ruleset(self.token)
+        config.prepare_battles_budget = self.previous_budget
+
+    def test_weights_of_the_battles_add_up_to_one(self):
+        battles = self.battle.prepare_battles(join_moves_together=True)
+        self.assertAlmostEqual(1, sum(b.weight for b in battles))
+
+    def test_budget_limits_the_number_of_battles(self):
+        config.prepare_battles_budget = 2
+        battles = self.battle.prepare_battles()
+        self.assertEqual(2, len(battles))
+
+    def test_budget_keeps_the_most_likely_sets(self):
+        config.prepare_battles_budget = 1
+        battle = self.battle.prepare_battles()[0]
+        self.assertEqual('lightball', battle.opponent.active.item)
+        self.assertEqual('timid', battle.opponent.active.nature)
+        self.assertEqual(1, battle.weight)
+
+    def test_sets_that_give_the_same_position_are_one_battle(self):
+        # both natures are neutral so the two spreads give the same stats
+        self.ruleset.load_pokemon_sets({
+            'pikachu': {
+                SPREADS_STRING: [('hardy', '0,0,0,252,4,252', 60), ('serious', '0,0,0,252,4,252', 40)],
+                ITEM_STRING: [('lightball', 100)],
+                ABILITY_STRING: [('static', 100)],
+                MOVES_STRING: [('thunderbolt', 99), ('voltswitch', 80)],
+            }
+        })
+        battles = self.battle.prepare_battles(join_moves_together=True)
+        self.assertEqual(1, len(battles))
+        self.assertEqual(1, battles[0].weight)
+
+    def test_duplicate_sets_do_not_use_up_the_budget(self):
+        self.ruleset.load_pokemon_sets({
+            'pikachu': {
+                SPREADS_STRING: [('hardy', '0,0,0,252,4,252', 60), ('serious', '0,0,0,252,4,252', 40)],
+                ITEM_STRING: [('lightball', 70), ('choicespecs', 30)],
+                ABILITY_STRING: [('static', 100)],
+                MOVES_STRING: [('thunderbolt', 99), ('voltswitch', 80)],
+            }
+        })
+        config.prepare_battles_budget = 2
+        battles = self.battle.prepare_battles(join_moves_together=True)
+        self.assertEqual(['lightball', 'choicespecs'], [b.opponent.active.item for b in battles])
+        self.assertAlmostEqual(0.70 / 0.88, battles[0].weight)
+
+
+    def test_sets_ruled_out_by_the_belief_are_not_prepared(self):
+        self.battle.opponent.active.get_set_belief().update(lambda spread, item, ability: int(spread[0] == 'timid'))
+        battles = self.battle.prepare_battles(join_moves_together=True)
+        self.assertEqual({'timid'}, {b.opponent.active.nature for b in battles})
+
+    def test_belief_is_kept_on_the_battle_for_the_next_turn(self):
+        self.battle.prepare_battles(join_moves_together=True)
+        self.assertIsNotNone(self.battle.opponent.active.set_belief)
+
+
+class TestCopyOnWriteClone(unittest.TestCase):
+    def setUp(self):
+        self.battle = Battle(None)
+        self.battle.user.active = Pokemon('raichu', 100)
+        self.battle.user.active.add_move('thunderbolt')
+        self.battle.user.reserve = [Pokemon('pikachu', 100)]
+        self.battle.opponent.active = Pokemon('pikachu', 100)
+        self.battle.opponent.active.add_move('volttackle')
+        self.battle.opponent.reserve = [Pokemon('rattata', 100)]
+
+    def test_clone_only_has_its_own_opponent_active(self):
+        clone = self.battle.copy_on_write_clone()
+        self.assertIs(self.battle.user, clone.user)
+        self.assertIs(self.battle.opponent.reserve, clone.opponent.reserve)
+        self.assertIsNot(self.battle.opponent.active, clone.opponent.active)
+
+    def test_modifying_the_clones_opponent_active_does_not_modify_the_battle(self):
+        clone = self.battle.copy_on_write_clone()
+        clone.opponent.active.item = 'lightball'
+        clone.opponent.active.add_move('surf')
+        self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
+        self.assertEqual(['volttackle'], [m.name for m in self.battle.opponent.active.moves])
+
+    def test_clone_creates_the_same_state_as_a_deep_copy(self):
+        clone = self.battle.copy_on_write_clone()
+        clone.opponent.active.item = 'lightball'
+        deep_copy = deepcopy(self.battle)
+        deep_copy.opponent.active.item = 'lightball'
+        self.assertEqual(str(deep_copy.create_state()), str(clone.create_state()))
+
+    def test_states_of_clones_can_be_modified_independently(self):
+        first_state = self.battle.copy_on_write_clone().create_state()
+        second_state = self.battle.copy_on_write_clone().create_state()
+
+        first_state.self.active.moves[0][constants.DISABLED] = True
+        StateMutator(first_state).apply([
+            (constants.MUTATOR_SWITCH, constants.SELF, 'raichu', 'pikachu'),
+            (constants.MUTATOR_APPLY_VOLATILE_STATUS, constants.SELF, 'confusion'),
+            (constants.MUTATOR_SIDE_START, constants.OPPONENT, constants.STEALTH_ROCK, 1),
+        ])
+
+        self.assertFalse(second_state.self.active.moves[0][constants.DISABLED])
+        self.assertEqual(set(), second_state.self.reserve['pikachu'].volatile_status)
+        self.assertEqual(0, second_state.opponent.side_conditions[constants.STEALTH_ROCK])
+
+
+class TestDeepCopy(unittest.TestCase):
+    def setUp(self):
+        self.battle = Battle(None)
+        self.battle.user.active = Pokemon('raichu', 100)
+        self.battle.user.active.add_move('thunderbolt')
+        self.battle.user.reserve = [Pokemon('pikachu', 100)]
+        self.battle.user.side_conditions[constants.STEALTH_ROCK] = 1
+        self.battle.opponent.active = Pokemon('pikachu', 100)
+        self.battle.opponent.active.add_move('volttackle')
+        self.battle.opponent.active.boosts[constants.ATTACK] = 2
+        self.battle.opponent.reserve = [Pokemon('rattata', 100)]
+
+    def test_deep_copy_creates_the_same_state(self):
+        self.assertEqual(str(self.battle.create_state()), str(deepcopy(self.battle).create_state()))
+
+    def test_modifying_the_deep_copy_does_not_modify_the_battle(self):
+        battle_copy = deepcopy(self.battle)
+        battle_copy.user.active.moves[0].disabled = True
+        battle_copy.user.active.stats[constants.SPEED] = 1
+        battle_copy.user.active.volatile_statuses.append('confusion')
+        battle_copy.user.reserve.append(Pokemon('rattata', 100))
+        battle_copy.user.side_conditions[constants.STEALTH_ROCK] += 1
+        battle_copy.opponent.active.boosts[constants.ATTACK] += 1
+        battle_copy.opponent.reserve[0].types.append('fire')
+
+        self.assertFalse(self.battle.user.active.moves[0].disabled)
+        self.assertNotEqual(1, self.battle.user.active.stats[constants.SPEED])
+        self.assertEqual([], self.battle.user.active.volatile_statuses)
+        self.assertEqual(1, len(self.battle.user.reserve))
+        self.assertEqual(1, self.battle.user.side_conditions[constants.STEALTH_ROCK])
+        self.assertEqual(2, self.battle.opponent.active.boosts[constants.ATTACK])
+        self.assertEqual(['normal'], self.battle.opponent.reserve[0].types)
+
+    def test_side_conditions_of_the_deep_copy_default_to_zero(self):
+        self.assertEqual(0, deepcopy(self.battle).user.side_conditions[constants.SPIKES])
+
+    def test_deep_copy_of_a_clone_does_not_share_anything_with_the_battle_it_was_cloned_from(self):
+        clone = self.battle.copy_on_write_clone()
+        clone.opponent.active.item = 'lightball'
+        clone_copy = deepcopy(clone)
+
+        self.assertIsNone(clone_copy.clone_of)
+        self.assertIsNot(self.battle.user, clone_copy.user)
+        self.assertEqual(str(clone.create_state()), str(clone_copy.create_state()))
+
+
+def engine_pokemon_attributes(engine_pokemon):
+    return {attribute: getattr(engine_pokemon, attribute) for attribute in TransposePokemon.__slots__}
+
+
+class TestToEnginePokemon(unittest.TestCase):
+    def setUp(self):
+        self.pokemon = Pokemon('pikachu', 100)
+        self.pokemon.add_move('volttackle')
+        self.pokemon.add_move('thunderbolt')
+        self.pokemon.boosts[constants.SPEED] = 1
+        self.pokemon.volatile_statuses.append('confusion')
+
+    def test_is_the_same_as_converting_the_dict_of_the_pokemon(self):
+        self.assertEqual(
+            engine_pokemon_attributes(TransposePokemon.from_state_pokemon_dict(self.pokemon.to_dict())),
+            engine_pokemon_attributes(self.pokemon.to_engine_pokemon())
+        )
+
+    def test_unchanged_pokemon_gives_a_new_copy_of_the_same_engine_pokemon(self):
+        first = self.pokemon.to_engine_pokemon()
+        first.hp = 1
+        first.moves[0][constants.DISABLED] = True
+        first.volatile_status |= {'substitute'}
+
+        second = self.pokemon.to_engine_pokemon()
+        self.assertIsNot(first, second)
+        self.assertEqual(self.pokemon.hp, second.hp)
+        self.assertFalse(second.moves[0][constants.DISABLED])
+        self.assertEqual({'confusion'}, second.volatile_status)
+
+    def test_changes_to_the_pokemon_make_a_new_engine_pokemon(self):
+        self.pokemon.to_engine_pokemon()
+
+        self.pokemon.hp -= 10
+        self.pokemon.boosts[constants.ATTACK] += 2
+        self.pokemon.moves[1].disabled = True
+        self.pokemon.volatile_statuses.remove('confusion')
+        self.pokemon.item = 'lightball'
+
+        engine_pokemon = self.pokemon.to_engine_pokemon()
+        self.assertEqual(self.pokemon.max_hp - 10, engine_pokemon.hp)
+        self.assertEqual(2, engine_pokemon.attack_boost)
+        self.assertTrue(engine_pokemon.moves[1][constants.DISABLED])
+        self.assertEqual(set(), engine_pokemon.volatile_status)
+        self.assertEqual('lightball', engine_pokemon.item)
+
+    def test_deep_copy_of_the_pokemon_is_converted_on_its_own(self):
+        self.pokemon.to_engine_pokemon()
+        pokemon_copy = deepcopy(self.pokemon)
+        pokemon_copy.moves[0].current_pp -= 1
+        self.assertEqual(self.pokemon.moves[0].current_pp - 1, pokemon_copy.to_engine_pokemon().moves[0][constants.CURRENT_PP])
+        self.assertEqual(self.pokemon.moves[0].current_pp, self.pokemon.to_engine_pokemon().moves[0][constants.CURRENT_PP])
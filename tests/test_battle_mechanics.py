@@ -16,6 +16,7 @@ from showdown.engine.find_state_instructions import get_all_state_instructions
 from showdown.engine.find_state_instructions import remove_duplicate_instructions
 from showdown.engine.find_state_instructions import lookup_move
 from showdown.engine.find_state_instructions import user_moves_first
+from showdown.engine.find_state_instructions import NodeContext
 from showdown.engine.objects import State
 from showdown.engine.objects import Pokemon
 from showdown.engine.objects import Side
@@ -923,7 +924,7 @@ class TestBattleMechanics(unittest.TestCase):
         bot_move = "boomburst"
         opponent_move = "splash"
         self.state.opponent.active.hp = 1
-        self.state.opponent.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.opponent.active.volatile_status |= {constants.SUBSTITUTE}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -942,7 +943,7 @@ class TestBattleMechanics(unittest.TestCase):
         opponent_move = "splash"
         self.state.self.active.ability = 'infiltrator'
         self.state.opponent.active.hp = 1
-        self.state.opponent.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.opponent.active.volatile_status |= {constants.SUBSTITUTE}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -961,7 +962,7 @@ class TestBattleMechanics(unittest.TestCase):
         opponent_move = "splash"
         self.state.opponent.active.types = ['ground', 'rock']
         self.state.opponent.active.hp = 1
-        self.state.opponent.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.opponent.active.volatile_status |= {constants.SUBSTITUTE}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -2552,7 +2553,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_whirlwind_removes_volatile_statuses(self):
         bot_move = "whirlwind"
         opponent_move = "splash"
-        self.state.opponent.active.volatile_status.add('confusion')
+        self.state.opponent.active.volatile_status |= {'confusion'}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -3032,7 +3033,7 @@ class TestBattleMechanics(unittest.TestCase):
         self.state.opponent.active.types = ['normal']
         bot_move = "dynamaxcannon"
         opponent_move = "splash"
-        self.state.opponent.active.volatile_status.add(constants.DYNAMAX)
+        self.state.opponent.active.volatile_status |= {constants.DYNAMAX}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -3087,7 +3088,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_noretreat_fails_when_user_has_volatile_status(self):
         bot_move = "noretreat"
         opponent_move = "splash"
-        self.state.self.active.volatile_status.add("noretreat")
+        self.state.self.active.volatile_status |= {"noretreat"}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -3119,7 +3120,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_tarshot_increases_fire_damage(self):
         bot_move = "eruption"
         opponent_move = "splash"
-        self.state.opponent.active.volatile_status.add('tarshot')
+        self.state.opponent.active.volatile_status |= {'tarshot'}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -4089,7 +4090,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_charged_solarbeam_executes_normally(self):
         bot_move = "solarbeam"
         opponent_move = "splash"
-        self.state.self.active.volatile_status.add("solarbeam")
+        self.state.self.active.volatile_status |= {"solarbeam"}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -4142,7 +4143,7 @@ class TestBattleMechanics(unittest.TestCase):
         bot_move = "toxic"
         opponent_move = "splash"
         self.state.self.active.ability = 'infiltrator'
-        self.state.opponent.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.opponent.active.volatile_status |= {constants.SUBSTITUTE}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -5268,7 +5269,7 @@ class TestBattleMechanics(unittest.TestCase):
         self.state.opponent.active.types = ['normal']
         self.state.opponent.active.hp = 40
         self.state.opponent.active.item = 'leftovers'
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -5291,7 +5292,7 @@ class TestBattleMechanics(unittest.TestCase):
         self.state.self.active.types = ['normal']
         self.state.self.active.item = 'leftovers'
         self.state.self.active.status = constants.POISON
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 50
         self.state.opponent.active.maxhp = 100
@@ -5708,7 +5709,7 @@ class TestBattleMechanics(unittest.TestCase):
         self.state.opponent.active.hp = 40
         self.state.opponent.active.status = constants.TOXIC
         self.state.opponent.active.ability = 'poisonheal'
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -5728,7 +5729,7 @@ class TestBattleMechanics(unittest.TestCase):
         self.state.opponent.active.types = ['normal']
         self.state.opponent.active.hp = 40
         self.state.opponent.active.status = constants.POISON
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -8362,7 +8363,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_trick_fails_on_opponent_with_substitute(self):
         self.state.self.active.item = 'leftovers'
         self.state.opponent.active.item = 'lifeorb'
-        self.state.opponent.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.opponent.active.volatile_status |= {constants.SUBSTITUTE}
         bot_move = "trick"
         opponent_move = "splash"
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
@@ -8379,7 +8380,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_trick_succeeds_when_user_is_behind_substitute(self):
         self.state.self.active.item = 'leftovers'
         self.state.opponent.active.item = 'lifeorb'
-        self.state.self.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.self.active.volatile_status |= {constants.SUBSTITUTE}
         bot_move = "trick"
         opponent_move = "splash"
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
@@ -9073,7 +9074,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_meteorbeam_executes_when_volatile_status_is_active(self):
         bot_move = "meteorbeam"
         opponent_move = "splash"
-        self.state.self.active.volatile_status.add('meteorbeam')
+        self.state.self.active.volatile_status |= {'meteorbeam'}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -9433,7 +9434,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_protect_behind_a_sub_works(self):
         bot_move = "protect"
         opponent_move = "splash"
-        self.state.self.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.self.active.volatile_status |= {constants.SUBSTITUTE}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -9452,7 +9453,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_protect_does_not_stop_leechseed_damage(self):
         bot_move = "protect"
         opponent_move = "splash"
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -9592,7 +9593,7 @@ class TestBattleMechanics(unittest.TestCase):
         bot_move = "splash"
         opponent_move = "splash"
         self.state.opponent.active.ability = 'magicguard'
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         instructions = get_all_state_instructions(self.mutator, bot_move, opponent_move)
         expected_instructions = [
             TransposeInstruction(
@@ -9737,7 +9738,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_leechseed_does_not_sap_when_dead(self):
         bot_move = "splash"
         opponent_move = "tackle"
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.opponent.active.maxhp = 100
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 1
@@ -10272,7 +10273,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_pre_existing_leechseed_produces_sap_instruction(self):
         bot_move = "tackle"
         opponent_move = "splash"
-        self.state.opponent.active.volatile_status.add("leechseed")
+        self.state.opponent.active.volatile_status |= {"leechseed"}
         self.state.opponent.active.maxhp = 100
         self.state.opponent.active.hp = 100
         self.state.self.active.maxhp = 100
@@ -10295,7 +10296,7 @@ class TestBattleMechanics(unittest.TestCase):
     def test_pre_existing_leechseed_produces_sap_instruction_with_one_health_after_damage(self):
         bot_move = "tackle"
         opponent_move = "splash"
-        self.state.opponent.active.volatile_status.add("leechseed")
+        self.state.opponent.active.volatile_status |= {"leechseed"}
         self.state.opponent.active.hp = 26
         self.state.opponent.active.maxhp = 100
         self.state.self.active.maxhp = 100
@@ -11658,3 +11659,99 @@ class TestUserMovesFirst(unittest.TestCase):
         opponent.active.speed = 2
 
         self.assertTrue(user_moves_first(self.state, user_move, opponent_move))
+
+
+class TestNodeContext(unittest.TestCase):
+    def setUp(self):
+        config.damage_calc_type = "average"
+        self.state = State(
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("bisharp", 81).to_dict()),
+                {
+                    "xatu": Pokemon.from_state_pokemon_dict(StatePokemon("xatu", 81).to_dict()),
+                    "starmie": Pokemon.from_state_pokemon_dict(StatePokemon("starmie", 81).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon("aromatisse", 81).to_dict()),
+                {
+                    "yveltal": Pokemon.from_state_pokemon_dict(StatePokemon("yveltal", 73).to_dict()),
+                    "toxapex": Pokemon.from_state_pokemon_dict(StatePokemon("toxapex", 73).to_dict()),
+                },
+                (0, 0),
+                defaultdict(lambda: 0)
+            ),
+            None,
+            None,
+            False
+        )
+        # u-turn picks the best switch and ties between reserves depend on their order, which switching changes
+        self.state.self.reserve['starmie'].hp = 0
+        self.mutator = StateMutator(self.state)
+        self.user_options = ['suckerpunch', 'tackle', 'protect', 'uturn', 'swordsdance', 'switch xatu']
+        self.opponent_options = ['moonblast', 'calmmind', 'protect', 'quickattack', 'switch toxapex']
+
+    def assert_context_gives_the_same_instructions(self):
+        context = NodeContext(self.state)
+        for user_move in self.user_options:
+            for opponent_move in self.opponent_options:
+                expected = get_all_state_instructions(self.mutator, user_move, opponent_move)
+                actual = get_all_state_instructions(self.mutator, user_move, opponent_move, context=context)
+                self.assertEqual(
+                    [(i.percentage, i.instructions) for i in expected],
+                    [(i.percentage, i.instructions) for i in actual],
+                    "{} {}".format(user_move, opponent_move)
+                )
+
+    def test_shared_context_gives_the_same_instructions_as_none(self):
+        self.assert_context_gives_the_same_instructions()
+
+    def test_shared_context_gives_the_same_instructions_with_screens_and_weather(self):
+        self.state.opponent.side_conditions[constants.REFLECT] = 2
+        self.state.weather = constants.RAIN
+        self.state.field = constants.PSYCHIC_TERRAIN
+        self.assert_context_gives_the_same_instructions()
+
+    def test_shared_context_gives_the_same_instructions_in_trickroom_with_prankster(self):
+        self.state.trick_room = True
+        self.state.opponent.active.ability = 'prankster'
+        self.state.self.active.item = 'choicescarf'
+        self.assert_context_gives_the_same_instructions()
+
+    def test_shared_context_gives_the_same_instructions_against_a_protected_pokemon(self):
+        self.state.opponent.active.volatile_status |= {constants.PROTECT}
+        self.assert_context_gives_the_same_instructions()
+
+    def test_first_move_is_resolved_once_for_each_kind_of_defending_move(self):
+        context = NodeContext(self.state)
+        damaging = context.first_move(constants.SELF, self.state.self.active, self.state.opponent.active, lookup_move('suckerpunch'), lookup_move('moonblast'))
+        self.assertIs(damaging, context.first_move(constants.SELF, self.state.self.active, self.state.opponent.active, lookup_move('suckerpunch'), lookup_move('tackle')))
+        status = context.first_move(constants.SELF, self.state.self.active, self.state.opponent.active, lookup_move('suckerpunch'), lookup_move('calmmind'))
+        self.assertEqual(0, status[constants.ACCURACY])
+        self.assertNotEqual(0, damaging[constants.ACCURACY])
+
+    def test_shared_context_gives_the_same_instructions_after_moves_that_change_the_damage(self):
+        self.state.opponent.active.item = 'airballoon'
+        self.user_options = ['swordsdance', 'willowisp', 'knockoff', 'earthquake', 'tackle', 'superfang', 'switch xatu']
+        self.opponent_options = ['roost', 'nastyplot', 'moonblast', 'tackle', 'magnetrise', 'superfang', 'reflect']
+        self.assert_context_gives_the_same_instructions()
+
+    def test_shared_context_gives_the_same_instructions_with_every_damage_roll(self):
+        config.damage_calc_type = "all"
+        self.assert_context_gives_the_same_instructions()
+
+    def test_damage_is_calculated_once_while_the_instructions_do_not_change_it(self):
+        context = NodeContext(self.state)
+        move = lookup_move('tackle')
+        conditions = context.conditions(self.state.opponent)
+        damage = context.damage(constants.SELF, self.state.self.active, self.state.opponent.active, move, conditions, [], 'average')
+        self.assertIs(
+            damage,
+            context.damage(constants.SELF, self.state.self.active, self.state.opponent.active, move, conditions, [(constants.MUTATOR_DAMAGE, constants.SELF, 10)], 'average')
+        )
+        self.assertIsNot(
+            damage,
+            context.damage(constants.SELF, self.state.self.active, self.state.opponent.active, move, conditions, [(constants.MUTATOR_BOOST, constants.SELF, constants.ATTACK, 2)], 'average')
+        )
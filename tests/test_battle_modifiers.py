@@ -3,6 +3,13 @@ import json
 from collections import defaultdict
 
 import constants
+from data.parse_smogon_stats import MOVES_STRING
+from data.parse_smogon_stats import SPREADS_STRING
+from data.parse_smogon_stats import ABILITY_STRING
+from data.parse_smogon_stats import ITEM_STRING
+from data.ruleset import get_ruleset
+from data.ruleset import set_ruleset
+from data.ruleset import reset_ruleset
 from showdown.engine.helpers import calculate_stats
 
 from showdown.battle import Battle
@@ -36,6 +43,9 @@ from showdown.battle_modifier import singleturn
 from showdown.battle_modifier import transform
 from showdown.battle_modifier import update_battle
 from showdown.battle_modifier import upkeep
+from showdown.battle_modifier import update_set_belief_from_move_order
+from showdown.battle_modifier import update_set_belief_from_damage_dealt
+from showdown.protocol import ProtocolMessage
 
 
 # so we can instantiate a Battle object for testing
@@ -1911,7 +1921,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual('choicescarf', self.battle.opponent.active.item)
 
@@ -1966,7 +1976,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -1979,7 +1989,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -1992,7 +2002,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2005,7 +2015,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2018,7 +2028,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2031,7 +2041,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual('choicescarf', self.battle.opponent.active.item)
 
@@ -2043,7 +2053,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|unknown-move|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual('choicescarf', self.battle.opponent.active.item)
 
@@ -2055,7 +2065,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|unknown-move|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2067,7 +2077,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p2a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2079,7 +2089,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2091,7 +2101,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2105,7 +2115,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2116,7 +2126,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p2a: Caterpie|Stealth Rock|',
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(constants.UNKNOWN_ITEM, self.battle.opponent.active.item)
 
@@ -2129,7 +2139,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual(None, self.battle.opponent.active.item)
 
@@ -2142,7 +2152,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual('leftovers', self.battle.opponent.active.item)
 
@@ -2161,7 +2171,7 @@ class TestGuessChoiceScarf(unittest.TestCase):
             '|move|p1a: Caterpie|Stealth Rock|'
         ]
 
-        check_choicescarf(self.battle, messages)
+        check_choicescarf(self.battle, ProtocolMessage(messages))
 
         self.assertEqual('choicescarf', self.battle.opponent.active.item)
 
@@ -2250,7 +2260,7 @@ class TestCheckHeavyDutyBoots(unittest.TestCase):
             '|-damage|p2a: Weedle|90/100'
         ]
 
-        check_heavydutyboots(self.battle, messages)
+        check_heavydutyboots(self.battle, ProtocolMessage(messages), 0)
 
         self.assertEqual(None, self.battle.opponent.active.item)
 
@@ -2505,9 +2515,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.20, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2524,9 +2532,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.20, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2544,9 +2550,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.60, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2564,9 +2568,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.60, crit=True)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2583,9 +2585,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.20, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2599,9 +2599,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-heal|p2a: Pikachu|200/250'
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
         self.assertIsNone(damage_dealt)
 
     def test_does_not_catch_second_moves_damage_after_a_heal(self):
@@ -2615,9 +2613,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
         self.assertIsNone(damage_dealt)
 
     def test_does_not_set_damage_when_status_move_occurs(self):
@@ -2629,9 +2625,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-status|p1a: Caterpie|par',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
         self.assertIsNone(damage_dealt)
 
     def test_assigns_damage_from_move_that_causes_status_as_secondary(self):
@@ -2644,9 +2638,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-status|p1a: Caterpie|par',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='thunderbolt', percent_damage=0.20, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2663,9 +2655,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|faint|p1a: Caterpie',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=1/250, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2680,9 +2670,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|faint|p2a: Pikachu',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='caterpie', defender='pikachu', move='tackle', percent_damage=0.01, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2699,9 +2687,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|faint|p1a: Pikachu',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_amount_dealt = DamageDealt(attacker='caterpie', defender='pikachu', move='tackle', percent_damage=1/250, crit=False)
         self.assertEqual(expected_damage_amount_dealt, damage_dealt)
@@ -2719,9 +2705,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|75/100',  # damage from sub should not be caught
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
         self.assertIsNone(damage_dealt)
 
     def test_lifeorb_does_not_assign_damage(self):
@@ -2734,9 +2718,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|90/100|[from] item: Life Orb',
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_dealt = DamageDealt(attacker='pikachu', defender='caterpie', move='tackle', percent_damage=0.20, crit=False)
         self.assertEqual(damage_dealt, expected_damage_dealt)
@@ -2751,9 +2733,7 @@ class TestGetDamageDealt(unittest.TestCase):
             '|-damage|p2a: Pikachu|85/100',  # 0.15 of total health
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         expected_damage_dealt = DamageDealt(attacker='caterpie', defender='pikachu', move='tackle', percent_damage=0.15, crit=False)
         self.assertEqual(expected_damage_dealt, damage_dealt)
@@ -2770,9 +2750,7 @@ class TestGetDamageDealt(unittest.TestCase):
             ''
         ]
 
-        split_msg = messages[0].split('|')
-
-        damage_dealt = get_damage_dealt(self.battle, split_msg, messages[1:])
+        damage_dealt = get_damage_dealt(self.battle, ProtocolMessage(messages), 0)
 
         self.assertIsNone(damage_dealt)
 
@@ -3126,3 +3104,92 @@ class TestCheckChoiceItem(unittest.TestCase):
         update_battle(self.battle, msg)
 
         self.assertEqual(None, self.battle.opponent.active.item)
+
+
+class TestUpdateSetBelief(unittest.TestCase):
+    def setUp(self):
+        self.ruleset = get_ruleset('gen8setbelieftest')
+        self.ruleset.load_pokemon_sets({
+            'caterpie': {
+                SPREADS_STRING: [
+                    ('adamant', '0,252,0,0,4,252', 30),
+                    ('modest', '0,0,0,252,4,252', 30),
+                    ('bold', '252,0,252,0,4,0', 40)
+                ],
+                ITEM_STRING: [('eviolite', 60), ('choicescarf', 40)],
+                ABILITY_STRING: [('shielddust', 100)],
+                MOVES_STRING: [('tackle', 100)],
+            }
+        })
+        self.token = set_ruleset(self.ruleset)
+
+        self.battle = Battle(None)
+        self.battle.user.name = 'p1'
+        self.battle.opponent.name = 'p2'
+        self.battle.user.active = Pokemon('caterpie', 100)
+        self.battle.opponent.active = Pokemon('caterpie', 100)
+
+    def tearDown(self):
+        reset_ruleset(self.token)
+
+    def possible_sets(self):
+        return set(self.battle.opponent.active.get_set_belief().sets)
+
+    def test_moving_first_rules_out_the_sets_that_are_too_slow(self):
+        # bold caterpie has 126 speed, 189 with a choicescarf
+        self.battle.user.active.stats[constants.SPEED] = 150
+        messages = [
+            '|move|p2a: Caterpie|Tackle|',
+            '|move|p1a: Caterpie|Tackle|'
+        ]
+
+        update_set_belief_from_move_order(self.battle, ProtocolMessage(messages))
+
+        self.assertNotIn((('bold', '252,0,252,0,4,0'), 'eviolite', 'shielddust'), self.possible_sets())
+        self.assertIn((('bold', '252,0,252,0,4,0'), 'choicescarf', 'shielddust'), self.possible_sets())
+        self.assertEqual(5, len(self.possible_sets()))
+
+    def test_moving_second_rules_out_the_sets_that_are_too_fast(self):
+        self.battle.user.active.stats[constants.SPEED] = 150
+        messages = [
+            '|move|p1a: Caterpie|Tackle|',
+            '|move|p2a: Caterpie|Tackle|'
+        ]
+
+        update_set_belief_from_move_order(self.battle, ProtocolMessage(messages))
+
+        self.assertEqual(
+            {(('bold', '252,0,252,0,4,0'), 'eviolite', 'shielddust')},
+            self.possible_sets()
+        )
+
+    def test_different_priorities_rule_out_nothing(self):
+        messages = [
+            '|move|p1a: Caterpie|Quick Attack|',
+            '|move|p2a: Caterpie|Tackle|'
+        ]
+
+        update_set_belief_from_move_order(self.battle, ProtocolMessage(messages))
+
+        self.assertEqual(6, len(self.possible_sets()))
+
+    def test_damage_taken_rules_out_the_sets_that_could_not_do_that_much(self):
+        # modest caterpie's tackle does at most 25 damage
+        damage_dealt = DamageDealt(attacker='caterpie', defender='caterpie', move='tackle', percent_damage=45 / 252, crit=False)
+
+        update_set_belief_from_damage_dealt(self.battle, damage_dealt, constants.OPPONENT)
+
+        self.assertEqual({'adamant'}, {spread[0] for spread, _, _ in self.possible_sets()})
+
+    def test_damage_dealt_rules_out_the_sets_that_are_too_bulky(self):
+        # bold caterpie takes at most 8% from a tackle
+        damage_dealt = DamageDealt(attacker='caterpie', defender='caterpie', move='tackle', percent_damage=0.15, crit=False)
+
+        update_set_belief_from_damage_dealt(self.battle, damage_dealt, constants.SELF)
+
+        self.assertNotIn('bold', {spread[0] for spread, _, _ in self.possible_sets()})
+
+    def test_a_critical_hit_rules_out_nothing(self):
+        damage_dealt = DamageDealt(attacker='caterpie', defender='caterpie', move='tackle', percent_damage=0.9, crit=True)
+        update_set_belief_from_damage_dealt(self.battle, damage_dealt, constants.OPPONENT)
+        self.assertEqual(6, len(self.possible_sets()))
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+import constants
+import config
+from benchmarks.corpus import load_corpus
+from benchmarks.corpus import battle_to_snapshot
+from benchmarks.corpus import battle_from_snapshot
+from benchmarks.run import compare
+from benchmarks.run import summarize
+from benchmarks.suites import bot_suite
+
+
+class TestBenchmarkCorpus(unittest.TestCase):
+    def setUp(self):
+        self.corpus = load_corpus()
+
+    def test_corpus_is_not_empty(self):
+        self.assertTrue(self.corpus)
+
+    def test_every_snapshot_round_trips_through_a_battle(self):
+        for snapshot in self.corpus:
+            battle = battle_from_snapshot(snapshot)
+            self.assertEqual(
+                snapshot,
+                battle_to_snapshot(battle, snapshot['name'], snapshot['pokemon_mode'], snapshot['pokemon_sets'])
+            )
+
+    def test_standard_battle_snapshots_have_sets_for_every_opponent_pokemon(self):
+        for snapshot in self.corpus:
+            if snapshot['battle_type'] == constants.STANDARD_BATTLE:
+                opponent = snapshot['opponent']
+                for pkmn in [opponent['active']] + opponent['reserve']:
+                    self.assertIn(pkmn['name'], snapshot['pokemon_sets'])
+
+
+class TestBenchmarkCompare(unittest.TestCase):
+    def test_compare_reports_the_speedup_of_matching_cases(self):
+        before = {'results': [summarize('s', 'case', 1, [2.0]), summarize('s', 'only_before', 1, [1.0])]}
+        after = {'results': [summarize('s', 'case', 1, [0.5]), summarize('s', 'only_after', 1, [1.0])]}
+
+        self.assertEqual([('s', 'case', 2.0, 0.5, 4.0)], compare(before, after))
+
+
+class TestBenchmarkBotSuite(unittest.TestCase):
+    def setUp(self):
+        self.gambit_exe_path = config.gambit_exe_path
+        config.gambit_exe_path = ""
+
+    def tearDown(self):
+        config.gambit_exe_path = self.gambit_exe_path
+
+    def test_nash_equilibrium_is_skipped_with_a_warning_without_gambit(self):
+        snapshot = load_corpus()[0]
+        with mock.patch('benchmarks.suites.logger') as logger_mock:
+            cases = bot_suite(snapshot, bots=('nash_equilibrium',))
+
+        self.assertEqual({}, cases)
+        self.assertIn('gambit_exe_path', logger_mock.warning.call_args[0][0])
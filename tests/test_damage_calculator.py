@@ -4,6 +4,10 @@ from collections import defaultdict
 import constants
 from showdown.engine.damage_calculator import _calculate_damage
 from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.damage_calculator import type_combination
+from showdown.engine.damage_calculator import type_effectiveness_modifier
+from showdown.engine.damage_calculator import pokemon_type_indicies
+from showdown.engine.damage_calculator import damage_multipication_array
 from showdown.engine.objects import State
 from showdown.engine.objects import Side
 from showdown.engine.objects import Pokemon
@@ -24,7 +28,7 @@ class TestCalculateDamageAmount(unittest.TestCase):
 
     def test_flashfire_increases_fire_move_damage(self):
         move = 'fireblast'
-        self.charizard.volatile_status.add('flashfire')
+        self.charizard.volatile_status |= {'flashfire'}
 
         dmg = _calculate_damage(self.charizard, self.venusaur, move, calc_type='max')
         self.assertEqual([450], dmg)
@@ -331,3 +335,44 @@ class TestCalculateDamage(unittest.TestCase):
         )
 
         self.assertNotEqual(0, damage_amounts[0])
+
+
+class TestTypeEffectiveness(unittest.TestCase):
+    def setUp(self):
+        self.charizard = Pokemon.from_state_pokemon_dict(StatePokemon("charizard", 100).to_dict())
+
+    def test_every_pair_of_types_is_the_product_of_their_multipliers(self):
+        for attacking_type, attacking_index in pokemon_type_indicies.items():
+            for first_type, first_index in pokemon_type_indicies.items():
+                for second_type, second_index in pokemon_type_indicies.items():
+                    expected = damage_multipication_array[attacking_index][first_index] * damage_multipication_array[attacking_index][second_index]
+                    self.assertEqual(expected, type_effectiveness_modifier(attacking_type, [first_type, second_type]))
+
+    def test_the_order_of_the_types_does_not_matter(self):
+        self.assertEqual(type_combination(['fire', 'flying']), type_combination(('flying', 'fire')))
+
+    def test_no_types_is_neutral_to_everything(self):
+        self.assertEqual(1, type_effectiveness_modifier('fighting', []))
+
+    def test_three_types_are_added_when_they_are_seen(self):
+        self.assertEqual(4, type_effectiveness_modifier('water', ['fire', 'rock', 'ghost']))
+        self.assertEqual(0, type_effectiveness_modifier('normal', ['fire', 'rock', 'ghost']))
+
+    def test_an_unknown_type_raises_a_keyerror(self):
+        with self.assertRaises(KeyError):
+            type_effectiveness_modifier('water', ['bird'])
+
+    def test_pokemon_resolves_its_types_when_they_change(self):
+        self.assertEqual(type_combination(['fire', 'flying']), self.charizard.type_combination)
+        self.charizard.types = ['water']
+        self.assertEqual(type_combination(['water']), self.charizard.type_combination)
+        self.assertEqual(type_combination(['water']), self.charizard.copy().type_combination)
+
+    def test_pokemon_with_an_unknown_type_has_no_combination(self):
+        self.charizard.types = ['bird']
+        self.assertIsNone(self.charizard.type_combination)
+
+    def test_damage_uses_the_changed_types(self):
+        venusaur = Pokemon.from_state_pokemon_dict(StatePokemon("venusaur", 100).to_dict())
+        venusaur.types = ['water']
+        self.assertEqual([75], _calculate_damage(self.charizard, venusaur, 'fireblast', calc_type='max'))
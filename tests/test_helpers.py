@@ -3,6 +3,7 @@ import unittest
 from showdown.battle import Move
 from showdown.engine.helpers import get_pokemon_info_from_condition
 from showdown.engine.helpers import normalize_name
+from showdown.engine.helpers import calculate_stats
 from showdown.engine.helpers import set_makes_sense
 from showdown.engine.helpers import spreads_are_alike
 from showdown.engine.helpers import remove_duplicate_spreads
@@ -172,6 +173,23 @@ class TestSetMakesSense(unittest.TestCase):
         self.assertTrue(set_makes_sense(nature, spread, item, ability, moves))
 
 
+class TestCalculateStats(unittest.TestCase):
+    def setUp(self):
+        self.base_stats = {'hp': 89, 'attack': 145, 'defense': 90, 'special-attack': 105, 'special-defense': 80, 'speed': 91}
+
+    def test_stats_with_a_nature_and_evs(self):
+        expected_stats = {'hp': 319, 'attack': 389, 'defense': 216, 'special-attack': 223, 'special-defense': 197, 'speed': 309}
+        self.assertEqual(expected_stats, calculate_stats(self.base_stats, 100, evs=[0, 252, 0, 0, 4, 252], nature='jolly'))
+
+    def test_changing_the_returned_stats_does_not_change_later_results(self):
+        stats = calculate_stats(self.base_stats, 100)
+        stats.pop('hp')
+        stats['attack'] = 1
+
+        expected_stats = {'hp': 340, 'attack': 347, 'defense': 237, 'special-attack': 267, 'special-defense': 217, 'speed': 239}
+        self.assertEqual(expected_stats, calculate_stats(self.base_stats, 100))
+
+
 class TestNormalizeName(unittest.TestCase):
     def test_removes_nonascii_characters(self):
         n = 'Flabébé'
@@ -180,6 +198,15 @@ class TestNormalizeName(unittest.TestCase):
 
         self.assertEqual(expected_result, result)
 
+    def test_removes_punctuation_and_spaces(self):
+        self.assertEqual('mrmimegalar', normalize_name("Mr. Mime-Galar"))
+        self.assertEqual('farfetchd', normalize_name("Farfetch\u2019d"))
+        self.assertEqual('zygarde10', normalize_name("Zygarde-10%"))
+        self.assertEqual('kingsshield', normalize_name("King's Shield"))
+
+    def test_strips_whitespace_that_is_not_a_space(self):
+        self.assertEqual('pikachu', normalize_name("\tPikachu\n"))
+
 
 class TestGetPokemonInfoFromCondition(unittest.TestCase):
     def setUp(self):
@@ -46,7 +46,7 @@ class TestGetInstructionsFromFlinched(unittest.TestCase):
     def test_flinch_sets_state_to_frozen_and_returns_one_state(self):
         defender = constants.SELF
 
-        self.state.self.active.volatile_status.add(constants.FLINCH)
+        self.state.self.active.volatile_status |= {constants.FLINCH}
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_instructions_from_flinched(mutator, defender, self.previous_instructions)
 
@@ -877,7 +877,7 @@ class TestGetInstructionsFromDirectStatusEffects(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_status_cannot_be_inflicted_on_pkmn_in_substitute(self):
-        self.state.self.active.volatile_status.add(constants.SUBSTITUTE)
+        self.state.self.active.volatile_status |= {constants.SUBSTITUTE}
         status = constants.BURN
         accuracy = 100
         defender = constants.SELF
@@ -2523,7 +2523,7 @@ class TestGetStateFromVolatileStatus(unittest.TestCase):
         volatile_status = 'leechseed'
         attacker = constants.OPPONENT
         target = constants.NORMAL
-        self.state.self.active.volatile_status.add('confusion')
+        self.state.self.active.volatile_status |= {'confusion'}
 
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_state_from_volatile_status(mutator, volatile_status, attacker, target, True, self.previous_instruction)
@@ -2544,7 +2544,7 @@ class TestGetStateFromVolatileStatus(unittest.TestCase):
         volatile_status = 'leechseed'
         attacker = constants.OPPONENT
         target = constants.NORMAL
-        self.state.self.active.volatile_status.add(volatile_status)
+        self.state.self.active.volatile_status |= {volatile_status}
 
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_state_from_volatile_status(mutator, volatile_status, attacker, target, True, self.previous_instruction)
@@ -2559,7 +2559,7 @@ class TestGetStateFromVolatileStatus(unittest.TestCase):
         volatile_status = 'leechseed'
         attacker = constants.OPPONENT
         target = constants.NORMAL
-        self.state.self.active.volatile_status.add('substitute')
+        self.state.self.active.volatile_status |= {'substitute'}
 
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_state_from_volatile_status(mutator, volatile_status, attacker, target, True, self.previous_instruction)
@@ -2723,7 +2723,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_leech_seed_saps_health(self):
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 100
         self.state.opponent.active.maxhp = 100
@@ -2749,7 +2749,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_leech_seed_only_saps_1_when_pokemon_has_1_hp(self):
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 1
         self.state.opponent.active.maxhp = 100
@@ -2775,7 +2775,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_leech_seed_does_not_overheal(self):
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 100
         self.state.opponent.active.maxhp = 100
@@ -2802,7 +2802,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
 
     def test_dying_from_poison_causes_leechseed_not_to_sap(self):
         self.state.self.active.status = constants.POISON
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 1
         self.state.opponent.active.maxhp = 100
@@ -2990,7 +2990,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_poison_killing_into_leechseed(self):
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.status = constants.POISON
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 5
@@ -3010,7 +3010,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.assertEqual(expected_instructions, instructions)
 
     def test_burn_killing_into_leechseed(self):
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.status = constants.BURN
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 1
@@ -3065,7 +3065,7 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
 
     def test_faster_pokemon_dying_from_poison_into_leech_seed_from_other_side(self):
         self.state.self.active.status = constants.POISON
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.maxhp = 100
         self.state.self.active.hp = 6
         mutator = StateMutator(self.state)
@@ -3210,14 +3210,14 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.state.self.active.hp = 30
         self.state.self.active.status = constants.POISON
         self.state.self.active.item = 'leftovers'
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.types = ['normal']
 
         self.state.opponent.active.maxhp = 100
         self.state.opponent.active.hp = 30
         self.state.opponent.active.status = constants.POISON
         self.state.opponent.active.item = 'leftovers'
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.opponent.active.types = ['normal']
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_end_of_turn_instructions(mutator, self.previous_instruction, self.dummy_move, self.dummy_move, True)
@@ -3300,14 +3300,14 @@ class TestGetStateFromStatusDamage(unittest.TestCase):
         self.state.self.active.hp = 10
         self.state.self.active.status = constants.POISON
         self.state.self.active.item = 'leftovers'
-        self.state.self.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.self.active.volatile_status |= {constants.LEECH_SEED}
         self.state.self.active.types = ['normal']
 
         self.state.opponent.active.maxhp = 100
         self.state.opponent.active.hp = 30
         self.state.opponent.active.status = constants.POISON
         self.state.opponent.active.item = 'leftovers'
-        self.state.opponent.active.volatile_status.add(constants.LEECH_SEED)
+        self.state.opponent.active.volatile_status |= {constants.LEECH_SEED}
         self.state.opponent.active.types = ['normal']
         mutator = StateMutator(self.state)
         instructions = instruction_generator.get_end_of_turn_instructions(mutator, self.previous_instruction, self.dummy_move, self.dummy_move, True)
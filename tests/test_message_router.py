@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+
+from showdown.message_router import MessageRouter
+from showdown.message_router import get_battle_tag
+
+
+class FakeWebsocketClient:
+    def __init__(self, messages=()):
+        self.username = 'bot'
+        self.messages = list(messages)
+        self.sent = []
+        self.last_message = None
+
+    async def receive_message(self):
+        if not self.messages:
+            raise EOFError()
+        return self.messages.pop(0)
+
+    async def send_message(self, room, message_list):
+        self.last_message = room + "|" + "|".join(message_list)
+        self.sent.append(self.last_message)
+
+
+class TestGetBattleTag(unittest.TestCase):
+    def test_battle_room_message(self):
+        self.assertEqual('battle-gen8randombattle-1', get_battle_tag('>battle-gen8randombattle-1\n|init|battle'))
+
+    def test_global_message(self):
+        self.assertIsNone(get_battle_tag('|updatesearch|{"searching":[],"games":null}'))
+
+    def test_save_replay_response_is_routed_by_its_id(self):
+        msg = '|queryresponse|savereplay|{"log":"","id":"gen8randombattle-1"}'
+        self.assertEqual('battle-gen8randombattle-1', get_battle_tag(msg))
+
+    def test_unparsable_save_replay_response_is_global(self):
+        self.assertIsNone(get_battle_tag('|queryresponse|savereplay|not-json'))
+
+
+class TestMessageRouter(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = FakeWebsocketClient()
+        self.router = MessageRouter(self.client, global_queue_size=2)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_coroutine(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_messages_are_split_by_battle(self):
+        self.router.route('>battle-a\n|init|battle')
+        self.router.route('>battle-b\n|init|battle')
+        self.router.route('>battle-a\n|turn|1')
+
+        first = self.run_coroutine(self.router.next_battle())
+        second = self.run_coroutine(self.router.next_battle())
+
+        self.assertEqual('>battle-a\n|init|battle', self.run_coroutine(first.receive_message()))
+        self.assertEqual('>battle-a\n|turn|1', self.run_coroutine(first.receive_message()))
+        self.assertEqual('>battle-b\n|init|battle', self.run_coroutine(second.receive_message()))
+
+    def test_global_messages_go_to_the_lobby(self):
+        self.router.route('|updatesearch|{}')
+
+        self.assertEqual('|updatesearch|{}', self.run_coroutine(self.router.lobby().receive_message()))
+        self.assertTrue(self.router.new_battles.empty())
+
+    def test_global_queue_keeps_the_most_recent_messages(self):
+        for i in range(3):
+            self.router.route('|pm|{}'.format(i))
+
+        lobby = self.router.lobby()
+        self.assertEqual('|pm|1', self.run_coroutine(lobby.receive_message()))
+        self.assertEqual('|pm|2', self.run_coroutine(lobby.receive_message()))
+
+    def test_messages_for_a_finished_battle_are_dropped(self):
+        self.router.route('>battle-a\n|init|battle')
+        self.router.finish_battle('battle-a')
+
+        self.router.route('>battle-a\n|deinit')
+
+        self.assertNotIn('battle-a', self.router.battle_queues)
+        self.assertEqual(1, self.router.new_battles.qsize())
+
+    def test_routed_client_sends_through_the_shared_connection(self):
+        self.router.route('>battle-a\n|init|battle')
+        battle_client = self.run_coroutine(self.router.next_battle())
+
+        self.run_coroutine(battle_client.send_message('battle-a', ['/choose move tackle', '2']))
+
+        self.assertEqual(['battle-a|/choose move tackle|2'], self.client.sent)
+        self.assertEqual('battle-a|/choose move tackle|2', battle_client.last_message)
+
+    def test_leaving_a_battle_finishes_it_in_the_router(self):
+        self.router.route('>battle-a\n|init|battle')
+        battle_client = self.run_coroutine(self.router.next_battle())
+        self.run_coroutine(battle_client.receive_message())
+        self.router.route('>battle-a\n|deinit')
+
+        self.run_coroutine(battle_client.leave_battle('battle-a'))
+
+        self.assertIn('battle-a', self.router.finished_battles)
+        self.assertEqual(['|/leave battle-a'], self.client.sent)
+
+    def test_run_routes_every_message_until_the_connection_ends(self):
+        self.client.messages = ['>battle-a\n|init|battle', '|updatesearch|{}']
+
+        with self.assertRaises(EOFError):
+            self.run_coroutine(self.router.run())
+
+        self.assertEqual(1, self.router.new_battles.qsize())
+        self.assertEqual(1, self.router.global_queue.qsize())
@@ -0,0 +1,61 @@
+import unittest
+
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
+from data.helpers import get_pokemon_sets
+from data.name_index import PrefixIndex
+from showdown.battle import Pokemon
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex(['pikachu', 'pika', 'gengar', 'gengarmega'])
+
+    def test_name_in_the_index_is_its_own_prefix(self):
+        self.assertEqual('gengar', self.index.first_prefix_of('gengar'))
+
+    def test_first_name_in_the_original_order_is_used(self):
+        self.assertEqual('pikachu', self.index.first_prefix_of('pikachuoriginal'))
+
+    def test_later_shorter_name_is_used_when_the_first_does_not_match(self):
+        self.assertEqual('pika', self.index.first_prefix_of('pikablu'))
+
+    def test_no_prefix_gives_none(self):
+        self.assertIsNone(self.index.first_prefix_of('weedle'))
+
+    def test_name_shorter_than_every_prefix_gives_none(self):
+        self.assertIsNone(self.index.first_prefix_of('pik'))
+
+    def test_gives_the_same_name_as_checking_every_pokedex_entry(self):
+        ruleset = get_ruleset('gen8ou')
+        for name in ['pikachuoriginal', 'gastrodoneast', 'vivillonfancy', 'alcremierubycream', 'notapokemon', 'mrmimegalar']:
+            matching = [k for k in ruleset.pokedex if name.startswith(k)]
+            self.assertEqual(matching[0] if matching else None, ruleset.pokedex_index.first_prefix_of(name), name)
+
+
+class TestNameResolution(unittest.TestCase):
+    def test_pokemon_forme_not_in_the_pokedex_uses_the_base_forme(self):
+        pkmn = Pokemon('gastrodoneast', 100)
+        self.assertEqual('gastrodon', pkmn.name)
+
+    def test_pokemon_with_no_pokedex_entry_raises_keyerror(self):
+        with self.assertRaises(KeyError):
+            Pokemon('notapokemon', 100)
+
+    def test_pokemon_sets_of_a_forme_are_the_sets_of_the_base_forme(self):
+        sets = {'gastrodon': {'spreads': []}, 'pikachu': {'spreads': []}}
+        ruleset = get_ruleset('gen8testnameresolution')
+        ruleset.load_pokemon_sets(sets)
+        with use_ruleset(ruleset):
+            self.assertEqual(sets['gastrodon'], get_pokemon_sets('gastrodoneast'))
+            with self.assertRaises(KeyError):
+                get_pokemon_sets('weedle')
+
+    def test_index_of_the_pokemon_sets_is_remade_when_they_are_loaded_again(self):
+        ruleset = get_ruleset('gen8testnameresolution')
+        ruleset.load_pokemon_sets({'pikachu': {}})
+        with use_ruleset(ruleset):
+            self.assertEqual({}, get_pokemon_sets('pikachuoriginal'))
+        ruleset.load_pokemon_sets({'gastrodon': {}})
+        with use_ruleset(ruleset):
+            self.assertEqual({}, get_pokemon_sets('gastrodoneast'))
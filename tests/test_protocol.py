@@ -0,0 +1,55 @@
+import unittest
+
+import constants
+from showdown.protocol import parse_line
+from showdown.protocol import ProtocolMessage
+
+
+class TestParseLine(unittest.TestCase):
+    def test_move_line_has_the_normalized_move_and_the_side(self):
+        event = parse_line('|move|p2a: Weedle|Poison Sting|p1a: Caterpie')
+        self.assertEqual('move', event.action)
+        self.assertEqual('p2', event.side)
+        self.assertEqual('poisonsting', event.move)
+
+    def test_line_without_an_action_has_an_empty_action(self):
+        self.assertEqual('', parse_line('').action)
+
+    def test_line_is_split_on_the_separator(self):
+        self.assertEqual(['', '-damage', 'p1a: Caterpie', '50/100'], parse_line('|-damage|p1a: Caterpie|50/100').split_msg)
+
+
+class TestProtocolMessage(unittest.TestCase):
+    def setUp(self):
+        self.message = ProtocolMessage.from_message('\n'.join([
+            '|move|p1a: Caterpie|U-turn|p2a: Weedle',
+            '|-damage|p2a: Weedle|50/100',
+            '|',
+            '|switch|p1a: Pikachu|Pikachu, M|100/100',
+            '|-damage|p1a: Pikachu|88/100|[from] Stealth Rock',
+            '|move|p2a: Weedle|Poison Sting|p1a: Pikachu',
+            '|-crit|p1a: Pikachu',
+            '|-damage|p1a: Pikachu|70/100',
+            '|upkeep',
+            '|-activate|p2a: Weedle|move: Sticky Web',
+        ]))
+
+    def test_moves_are_the_move_events_in_order(self):
+        self.assertEqual(['uturn', 'poisonsting'], [e.move for e in self.message.moves()])
+
+    def test_events_until_move_end_stop_at_the_next_move_end(self):
+        self.assertEqual(['-damage'], [e.action for e in self.message.until_move_end(0)])
+        self.assertEqual(['-crit', '-damage'], [e.action for e in self.message.until_move_end(5)])
+
+    def test_events_until_move_end_of_the_last_event_is_empty(self):
+        self.assertEqual([], self.message.until_move_end(9))
+
+    def test_has_action_after(self):
+        self.assertTrue(self.message.has_action_after(0, 'switch'))
+        self.assertFalse(self.message.has_action_after(3, 'switch'))
+
+    def test_hazards_are_indexed_by_side(self):
+        self.assertTrue(self.message.hazard_affected_after(3, 'p1', constants.STEALTH_ROCK))
+        self.assertFalse(self.message.hazard_affected_after(4, 'p1', constants.STEALTH_ROCK))
+        self.assertFalse(self.message.hazard_affected_after(0, 'p2', constants.STEALTH_ROCK))
+        self.assertTrue(self.message.hazard_affected_after(0, 'p2', constants.STICKY_WEB))
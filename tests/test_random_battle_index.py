@@ -0,0 +1,64 @@
+import random
+import unittest
+
+import constants
+from data.ruleset import get_ruleset
+from data.random_battle_index import RandomBattleSets
+
+
+def possible_moves_by_splitting_every_set(sets, known_moves):
+    new_moves = list()
+    for key in sets[constants.SETS]:
+        this_set_moves = key.split('|')
+        if all(m in this_set_moves for m in known_moves):
+            for m in filter(lambda x: x not in new_moves + known_moves, this_set_moves):
+                new_moves.append(m)
+
+    if not new_moves:
+        for m, _ in sets[constants.MOVES]:
+            if m not in known_moves:
+                new_moves.append(m)
+
+    return new_moves
+
+
+class TestRandomBattleSets(unittest.TestCase):
+    def setUp(self):
+        self.sets = {
+            constants.SETS: {
+                "irontail|knockoff|surf|volttackle": 13.043,
+                "irontail|knockoff|voltswitch|volttackle": 40.58,
+                "knockoff|surf|voltswitch|volttackle": 24.638
+            },
+            constants.MOVES: [["knockoff", 78.261], ["voltswitch", 86.957], ["volttackle", 100.0], ["irontail", 75.362], ["surf", 59.42]]
+        }
+        self.index = RandomBattleSets(self.sets)
+
+    def test_no_known_moves_gives_every_move(self):
+        self.assertEqual(('irontail', 'knockoff', 'surf', 'volttackle', 'voltswitch'), self.index.possible_moves([]))
+
+    def test_known_move_only_keeps_the_sets_that_have_it(self):
+        self.assertEqual(('irontail', 'knockoff', 'volttackle', 'surf'), self.index.possible_moves(['voltswitch']))
+
+    def test_consistent_sets_are_the_sets_with_every_known_move(self):
+        self.assertEqual([0, 2], self.index.consistent_sets(['surf']))
+
+    def test_unknown_move_uses_every_move_the_pokemon_can_have(self):
+        self.assertEqual(('knockoff', 'voltswitch', 'volttackle', 'irontail', 'surf'), self.index.possible_moves(['tackle']))
+
+    def test_possible_moves_are_remembered_for_the_same_known_moves(self):
+        self.assertIs(self.index.possible_moves(['surf', 'knockoff']), self.index.possible_moves(['knockoff', 'surf']))
+
+    def test_gives_the_same_moves_as_checking_every_set(self):
+        rng = random.Random(0)
+        for pokemon_mode in ['gen8randombattle', 'gen7randombattle']:
+            ruleset = get_ruleset(pokemon_mode)
+            for pkmn_name, sets in ruleset.random_battle_sets.items():
+                moves = sorted({m for key in sets[constants.SETS] for m in key.split('|')})
+                for known_move_count in range(4):
+                    known_moves = rng.sample(moves, min(known_move_count, len(moves)))
+                    self.assertEqual(
+                        possible_moves_by_splitting_every_set(sets, known_moves),
+                        list(ruleset.random_battle_index[pkmn_name].possible_moves(known_moves)),
+                        "{} {}".format(pkmn_name, known_moves)
+                    )
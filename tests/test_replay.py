@@ -0,0 +1,156 @@
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+import config
+from data.ruleset import current_ruleset
+from data.ruleset import DEFAULT_POKEMON_MODE
+from showdown.websocket_client import MessageRecorder
+from benchmarks.replay import load_recording
+from benchmarks.replay import split_battles
+from benchmarks.replay import pokemon_mode_of
+from benchmarks.replay import replay_battle
+from benchmarks.replay import summarize_battle
+from benchmarks.replay import ReplayWebsocketClient
+from showdown.run_battle import pokemon_battle
+
+
+TAG = 'battle-gen8randombattle-1'
+
+
+def request_json(rqid, hp):
+    return json.dumps({
+        "active": [{"moves": [
+            {"move": "Thunderbolt", "id": "thunderbolt", "pp": 24, "maxpp": 24, "target": "normal", "disabled": False},
+            {"move": "Tackle", "id": "tackle", "pp": 56, "maxpp": 56, "target": "normal", "disabled": False}
+        ]}],
+        "side": {"name": "bot", "id": "p1", "pokemon": [
+            {
+                "ident": "p1: Pikachu", "details": "Pikachu, L84, M", "condition": "{}/200".format(hp), "active": True,
+                "stats": {"atk": 150, "def": 110, "spa": 140, "spd": 130, "spe": 220},
+                "moves": ["thunderbolt", "tackle"], "baseAbility": "static", "item": "lightball", "ability": "static"
+            }
+        ]},
+        "rqid": rqid
+    })
+
+
+MESSAGES = [
+    (MessageRecorder.META, {'pokemon_mode': 'gen8randombattle', 'battle_bot': 'most_damage'}),
+    (MessageRecorder.IN, '|updatesearch|{"searching":[],"games":null}'),
+    (MessageRecorder.IN, '>{}\n|init|battle\n|title|bot vs. opp\n|j|☆bot'.format(TAG)),
+    (MessageRecorder.IN, '>{}\n|request|{}'.format(TAG, request_json(1, 200))),
+    (MessageRecorder.IN, '>{}\n|\n|player|p1|bot|1\n|start\n|switch|p1a: Pikachu|Pikachu, L84, M|200/200\n|switch|p2a: Magikarp|Magikarp, L90, M|100/100\n|turn|1'.format(TAG)),
+    (MessageRecorder.OUT, '{}|/choose move thunderbolt|1'.format(TAG)),
+    (MessageRecorder.IN, '>{}\n|request|{}'.format(TAG, request_json(2, 180))),
+    (MessageRecorder.IN, '>{}\n|\n|move|p1a: Pikachu|Thunderbolt|p2a: Magikarp\n|-damage|p2a: Magikarp|40/100\n|move|p2a: Magikarp|Tackle|p1a: Pikachu\n|-damage|p1a: Pikachu|180/200\n|upkeep\n|turn|2'.format(TAG)),
+    (MessageRecorder.OUT, '{}|/choose move tackle|2'.format(TAG)),
+    (MessageRecorder.IN, '>{}\n|\n|move|p1a: Pikachu|Thunderbolt|p2a: Magikarp\n|-damage|p2a: Magikarp|0 fnt\n|faint|p2a: Magikarp\n|win|bot'.format(TAG)),
+]
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.previous_bot = config.battle_bot_module
+        config.battle_bot_module = 'most_damage'
+
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        recorder = MessageRecorder(self.path, **MESSAGES[0][1])
+        for direction, message in MESSAGES[1:]:
+            recorder.write(direction, message)
+        recorder.close()
+
+    def tearDown(self):
+        config.battle_bot_module = self.previous_bot
+        os.remove(self.path)
+
+    def replay(self):
+        meta, battles = split_battles(load_recording(self.path))
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(replay_battle(battles[TAG], meta['pokemon_mode']))
+        finally:
+            loop.close()
+
+    def test_split_battles_ignores_messages_from_outside_of_the_battle(self):
+        meta, battles = split_battles(load_recording(self.path))
+
+        self.assertEqual('gen8randombattle', meta['pokemon_mode'])
+        self.assertEqual([TAG], list(battles))
+        self.assertEqual(len(MESSAGES) - 2, len(battles[TAG]))
+
+    def test_each_battle_is_replayed_in_the_format_in_its_tag(self):
+        self.assertEqual('gen7randombattle', pokemon_mode_of('battle-gen7randombattle-1', 'gen8randombattle'))
+        self.assertEqual('gen8randombattle', pokemon_mode_of('battle', 'gen8randombattle'))
+
+    def test_replay_reaches_the_recorded_winner(self):
+        winner, _ = self.replay()
+
+        self.assertEqual('bot', winner)
+
+    def test_replay_compares_each_decision_against_the_recording(self):
+        _, decisions = self.replay()
+
+        self.assertEqual([1, 2], [d.turn for d in decisions])
+        self.assertEqual('{}|/choose move thunderbolt|1'.format(TAG), decisions[0].replayed)
+        self.assertEqual([False, True], [d.changed for d in decisions])
+
+    def test_summary_counts_changed_decisions(self):
+        winner, decisions = self.replay()
+
+        summary = summarize_battle(TAG, winner, decisions)
+
+        self.assertEqual(2, summary['decisions'])
+        self.assertEqual(1, summary['changed'])
+        self.assertGreaterEqual(summary['latency_max'], summary['latency_median'])
+
+
+class RulesetRecordingClient(ReplayWebsocketClient):
+    """Records the format of the current ruleset every time the battle reads a message"""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.pokemon_modes = set()
+
+    async def receive_message(self):
+        self.pokemon_modes.add(current_ruleset().pokemon_mode)
+        return await super().receive_message()
+
+
+class TestConcurrentBattles(unittest.TestCase):
+    def setUp(self):
+        self.previous_bot = config.battle_bot_module
+        config.battle_bot_module = 'most_damage'
+
+    def tearDown(self):
+        config.battle_bot_module = self.previous_bot
+
+    @staticmethod
+    def records(tag):
+        return [
+            {'direction': direction, 'message': message.replace(TAG, tag)}
+            for direction, message in MESSAGES[1:]
+        ]
+
+    def test_battles_in_different_formats_each_keep_their_own_ruleset(self):
+        clients = {
+            'gen8randombattle': RulesetRecordingClient(self.records('battle-gen8randombattle-1')),
+            'gen7randombattle': RulesetRecordingClient(self.records('battle-gen7randombattle-1'))
+        }
+
+        async def play_both():
+            return await asyncio.gather(*(pokemon_battle(client, pokemon_mode) for pokemon_mode, client in clients.items()))
+
+        loop = asyncio.new_event_loop()
+        try:
+            winners = loop.run_until_complete(play_both())
+        finally:
+            loop.close()
+
+        self.assertEqual(['bot', 'bot'], winners)
+        for pokemon_mode, client in clients.items():
+            self.assertEqual({pokemon_mode}, client.pokemon_modes)
+        self.assertEqual(DEFAULT_POKEMON_MODE, current_ruleset().pokemon_mode)
@@ -0,0 +1,81 @@
+import pickle
+import asyncio
+import unittest
+
+import data
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
+from data.ruleset import current_ruleset
+from data.ruleset import DEFAULT_POKEMON_MODE
+from showdown.engine.evaluate import Scoring
+from showdown.engine import damage_calculator
+
+
+class TestRuleset(unittest.TestCase):
+    def test_older_generation_applies_mods_without_changing_the_current_generation(self):
+        self.assertEqual(35, get_ruleset('gen4ou').move_json['tackle']['basePower'])
+        self.assertEqual(40, get_ruleset('gen8ou').move_json['tackle']['basePower'])
+        self.assertEqual(40, data.base_move_json['tackle']['basePower'])
+
+    def test_generation_without_mods_uses_the_mods_of_the_oldest_generation_that_has_them(self):
+        for pokemon_mode in ('gen1randombattle', 'gen3ou'):
+            ruleset = get_ruleset(pokemon_mode)
+            self.assertEqual(35, ruleset.move_json['tackle']['basePower'])
+            self.assertEqual(damage_calculator.PRE_GEN_8_TERRAIN_DAMAGE_BOOST, ruleset.terrain_damage_boost)
+            self.assertEqual(dict(get_ruleset('gen7randombattle').random_battle_sets), dict(ruleset.random_battle_sets))
+
+    def test_ruleset_cannot_be_modified(self):
+        ruleset = get_ruleset('gen8ou')
+        with self.assertRaises(AttributeError):
+            ruleset.gen_number = 4
+        with self.assertRaises(TypeError):
+            ruleset.move_json['tackle'] = {}
+
+    def test_ruleset_is_built_once_per_pokemon_mode(self):
+        self.assertIs(get_ruleset('gen7ou'), get_ruleset('gen7ou'))
+
+    def test_unpickled_ruleset_is_the_cached_ruleset(self):
+        ruleset = get_ruleset('gen5ou')
+        self.assertIs(ruleset, pickle.loads(pickle.dumps(ruleset)))
+
+    def test_random_battle_has_a_lower_score_for_an_alive_pokemon(self):
+        self.assertEqual(Scoring.RANDOM_BATTLE_POKEMON_ALIVE_STATIC, get_ruleset('gen8randombattle').pokemon_alive_static)
+        self.assertEqual(Scoring.POKEMON_ALIVE_STATIC, get_ruleset('gen8ou').pokemon_alive_static)
+
+    def test_terrain_boost_is_higher_before_gen8(self):
+        self.assertEqual(damage_calculator.PRE_GEN_8_TERRAIN_DAMAGE_BOOST, get_ruleset('gen7ou').terrain_damage_boost)
+        self.assertEqual(damage_calculator.TERRAIN_DAMAGE_BOOST, get_ruleset('gen8ou').terrain_damage_boost)
+
+    def test_random_battle_uses_random_battle_sets(self):
+        ruleset = get_ruleset('gen8randombattle')
+        self.assertIs(ruleset.random_battle_sets, ruleset.pokemon_sets)
+
+    def test_given_pokemon_sets_are_used_for_a_standard_battle(self):
+        ruleset = get_ruleset('gen8testformat')
+        ruleset.load_pokemon_sets({'pikachu': {}})
+        self.assertIn('pikachu', ruleset.pokemon_sets)
+
+
+class TestCurrentRuleset(unittest.TestCase):
+    def test_default_ruleset_is_used_outside_of_a_battle(self):
+        self.assertIs(get_ruleset(DEFAULT_POKEMON_MODE), current_ruleset())
+
+    def test_use_ruleset_only_applies_inside_the_block(self):
+        with use_ruleset(get_ruleset('gen4ou')):
+            self.assertEqual(35, data.all_move_json['tackle']['basePower'])
+        self.assertEqual(40, data.all_move_json['tackle']['basePower'])
+
+    def test_concurrent_tasks_use_their_own_ruleset(self):
+        async def tackle_base_power(pokemon_mode):
+            with use_ruleset(get_ruleset(pokemon_mode)):
+                await asyncio.sleep(0)
+                return data.all_move_json['tackle']['basePower']
+
+        async def play_both():
+            return await asyncio.gather(tackle_base_power('gen4ou'), tackle_base_power('gen8ou'))
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual([35, 40], loop.run_until_complete(play_both()))
+        finally:
+            loop.close()
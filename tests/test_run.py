@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import constants
+import config
+from run import next_pokemon_mode
+from run import request_battle
+from showdown.websocket_client import PSWebsocketClient
+
+
+class FakeWebsocket:
+    def __init__(self, messages=()):
+        self.messages = list(messages)
+        self.sent = []
+
+    async def recv(self):
+        return self.messages.pop(0)
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+class TestPokemonModes(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        patcher = mock.patch.multiple(
+            config,
+            pokemon_modes=['gen8randombattle', 'gen7randombattle'],
+            team_name=None,
+            user_to_challenge='opponent'
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def client(self, messages=()):
+        client = PSWebsocketClient()
+        client.websocket = FakeWebsocket(messages)
+        return client
+
+    def request_battle(self, bot_mode, client, pokemon_mode):
+        with mock.patch.object(config, 'bot_mode', bot_mode):
+            return self.loop.run_until_complete(request_battle(client, pokemon_mode))
+
+    def test_formats_are_played_in_turn(self):
+        self.assertEqual(
+            ['gen8randombattle', 'gen7randombattle', 'gen8randombattle'],
+            [next_pokemon_mode(i) for i in range(3)]
+        )
+
+    def test_challenge_is_in_the_requested_format(self):
+        client = self.client()
+        pokemon_mode = self.request_battle(constants.CHALLENGE_USER, client, 'gen7randombattle')
+        self.assertEqual('gen7randombattle', pokemon_mode)
+        self.assertEqual('|/challenge opponent,gen7randombattle', client.websocket.sent[-1])
+
+    def test_search_is_in_the_requested_format(self):
+        client = self.client()
+        pokemon_mode = self.request_battle(constants.SEARCH_LADDER, client, 'gen7randombattle')
+        self.assertEqual('gen7randombattle', pokemon_mode)
+        self.assertEqual('|/search gen7randombattle', client.websocket.sent[-1])
+
+    def test_accepted_challenge_gives_its_own_format(self):
+        client = self.client([
+            '|updatechallenges|{"challengesFrom":{"someone":"gen6ou"}}',
+            '|updatechallenges|{"challengesFrom":{"opponent":"gen7randombattle"}}',
+        ])
+        pokemon_mode = self.request_battle(constants.ACCEPT_CHALLENGE, client, 'gen8randombattle')
+        self.assertEqual('gen7randombattle', pokemon_mode)
+        self.assertEqual('|/accept opponent', client.websocket.sent[-1])
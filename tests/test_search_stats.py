@@ -0,0 +1,195 @@
+import unittest
+import threading
+from collections import defaultdict
+
+import constants
+from showdown.engine.objects import State
+from showdown.engine.objects import Side
+from showdown.engine.objects import Pokemon
+from showdown.engine.objects import StateMutator
+from showdown.engine.search_stats import SearchStats
+from showdown.engine.select_best_move import get_payoff_matrix
+from showdown.engine.select_best_move import pick_safest
+from showdown.battle import Pokemon as StatePokemon
+from showdown.engine.helpers import calculate_stats
+
+
+class TestSearchStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = SearchStats()
+
+    def test_record_branches_tracks_average_and_maximum(self):
+        self.stats.record_branches(2)
+        self.stats.record_branches(4)
+
+        self.assertEqual(2, self.stats.move_pairs)
+        self.assertEqual(3, self.stats.branches_per_move_pair)
+        self.assertEqual(4, self.stats.max_branches)
+
+    def test_branches_per_move_pair_is_zero_when_nothing_was_searched(self):
+        self.assertEqual(0, self.stats.branches_per_move_pair)
+
+    def test_cache_hit_rate(self):
+        self.stats.record_cache('damage', True)
+        self.stats.record_cache('damage', True)
+        self.stats.record_cache('damage', False)
+        self.stats.record_cache('damage', True)
+
+        self.assertEqual(0.75, self.stats.cache_hit_rate('damage'))
+
+    def test_unknown_cache_has_a_hit_rate_of_zero(self):
+        self.assertEqual(0, self.stats.cache_hit_rate('not_a_cache'))
+
+    def test_phase_accumulates_wall_time(self):
+        with self.stats.phase('search'):
+            pass
+        with self.stats.phase('search'):
+            pass
+
+        self.assertIn('search', self.stats.phase_times)
+        self.assertGreaterEqual(self.stats.phase_times['search'], 0)
+
+    def test_merge_adds_counters_together(self):
+        other = SearchStats()
+        other.nodes = 3
+        other.record_branches(5)
+        other.record_cache('damage', True)
+        self.stats.nodes = 2
+        self.stats.record_branches(1)
+
+        self.stats.merge(other)
+
+        self.assertEqual(5, self.stats.nodes)
+        self.assertEqual(2, self.stats.move_pairs)
+        self.assertEqual(5, self.stats.max_branches)
+        self.assertEqual(1, self.stats.cache_hits['damage'])
+
+
+class TestSearchStatsOfProcessCaches(unittest.TestCase):
+    def test_phase_records_the_hits_and_misses_of_the_stats_cache(self):
+        stats = SearchStats()
+        base_stats = {constants.HITPOINTS: 91, constants.ATTACK: 145, constants.DEFENSE: 90, constants.SPECIAL_ATTACK: 105, constants.SPECIAL_DEFENSE: 80, constants.SPEED: 91}
+        with stats.phase('prepare_battles'):
+            calculate_stats(base_stats, 77, nature='lonely')
+            calculate_stats(base_stats, 77, nature='lonely')
+
+        self.assertEqual(2, stats.cache_hits['calculated_stats'] + stats.cache_misses['calculated_stats'])
+        self.assertGreaterEqual(stats.cache_hits['calculated_stats'], 1)
+
+    def test_phase_records_the_hits_of_the_species_cache(self):
+        stats = SearchStats()
+        with stats.phase('prepare_battles'):
+            StatePokemon('pikachu', 100)
+            StatePokemon('pikachu', 100)
+
+        self.assertGreaterEqual(stats.cache_hits['species'], 1)
+
+    def test_lookups_outside_of_the_phase_are_not_counted(self):
+        stats = SearchStats()
+        StatePokemon('pikachu', 100)
+        with stats.phase('prepare_battles'):
+            pass
+
+        self.assertEqual(0, stats.cache_hits['species'] + stats.cache_misses['species'])
+
+    def test_lookups_of_another_battle_during_the_phase_are_not_counted(self):
+        stats = SearchStats()
+        # a new thread starts with a context of its own, like another battle's search
+        other_battle = threading.Thread(target=lambda: [StatePokemon('pikachu', 100) for _ in range(10)])
+        with stats.phase('prepare_battles'):
+            StatePokemon('pikachu', 100)
+            other_battle.start()
+            other_battle.join()
+
+        self.assertEqual(1, stats.cache_hits['species'] + stats.cache_misses['species'])
+        self.assertEqual(1, stats.cache_hits['calculated_stats'] + stats.cache_misses['calculated_stats'])
+
+
+class TestSearchStatsThroughPayoffMatrix(unittest.TestCase):
+    def setUp(self):
+        self.state = State(
+                        Side(
+                            Pokemon.from_state_pokemon_dict(StatePokemon("raichu", 73).to_dict()),
+                            {
+                                "xatu": Pokemon.from_state_pokemon_dict(StatePokemon("xatu", 81).to_dict()),
+                                "starmie": Pokemon.from_state_pokemon_dict(StatePokemon("starmie", 81).to_dict()),
+                            },
+                            (0, 0),
+                            defaultdict(lambda: 0)
+                        ),
+                        Side(
+                            Pokemon.from_state_pokemon_dict(StatePokemon("aromatisse", 81).to_dict()),
+                            {
+                                "yveltal": Pokemon.from_state_pokemon_dict(StatePokemon("yveltal", 73).to_dict()),
+                                "slurpuff": Pokemon.from_state_pokemon_dict(StatePokemon("slurpuff", 73).to_dict()),
+                            },
+                            (0, 0),
+                            defaultdict(lambda: 0)
+                        ),
+                        None,
+                        None,
+                        False
+                    )
+        self.state.self.active.moves = [
+            {constants.ID: 'tackle', constants.DISABLED: False},
+            {constants.ID: 'thunderbolt', constants.DISABLED: False},
+        ]
+        self.state.opponent.active.moves = [
+            {constants.ID: 'tackle', constants.DISABLED: False},
+            {constants.ID: 'moonblast', constants.DISABLED: False},
+        ]
+        self.mutator = StateMutator(self.state)
+
+    def test_stats_do_not_change_the_search_result(self):
+        user_options, opponent_options = self.state.get_all_options()
+        stats = SearchStats()
+
+        without_stats = get_payoff_matrix(self.mutator, user_options, opponent_options, depth=1, prune=False)
+        with_stats = get_payoff_matrix(self.mutator, user_options, opponent_options, depth=1, prune=False, stats=stats)
+
+        self.assertEqual(without_stats, with_stats)
+
+    def test_depth_one_search_counts_nodes_move_pairs_and_evaluations(self):
+        user_options, opponent_options = self.state.get_all_options()
+        stats = SearchStats()
+
+        get_payoff_matrix(self.mutator, user_options, opponent_options, depth=1, prune=False, stats=stats)
+
+        self.assertEqual(1, stats.nodes)
+        self.assertEqual(len(user_options) * len(opponent_options), stats.move_pairs)
+        self.assertEqual(stats.branches, stats.evaluations)
+        self.assertGreater(stats.damage_calculations, 0)
+
+    def test_depth_two_search_counts_every_node(self):
+        user_options, opponent_options = self.state.get_all_options()
+        stats = SearchStats()
+
+        get_payoff_matrix(self.mutator, user_options, opponent_options, depth=2, prune=False, stats=stats)
+
+        # every branch of a move-pair at the root is searched as its own node
+        root_move_pairs = len(user_options) * len(opponent_options)
+        self.assertGreater(stats.nodes, root_move_pairs)
+        self.assertGreater(stats.move_pairs, root_move_pairs)
+
+    def test_pruning_is_recorded(self):
+        user_options, opponent_options = self.state.get_all_options()
+        stats = SearchStats()
+
+        scores = get_payoff_matrix(self.mutator, user_options, opponent_options, depth=1, prune=True, stats=stats)
+        pick_safest(scores)
+
+        number_of_nan_scores = len([s for s in scores.values() if s != s])
+        self.assertEqual(number_of_nan_scores, stats.pruned_cells)
+        self.assertLessEqual(stats.pruned_rows, len(user_options))
+
+    def test_search_records_the_hit_rates_of_its_caches(self):
+        user_options, opponent_options = self.state.get_all_options()
+        stats = SearchStats()
+
+        get_payoff_matrix(self.mutator, user_options, opponent_options, depth=2, prune=False, stats=stats)
+
+        cache_hit_rates = stats.to_dict()['cache_hit_rates']
+        for cache_name in ['updated_moves', 'first_moves', 'node_damage']:
+            self.assertIn(cache_name, cache_hit_rates)
+        self.assertGreater(stats.cache_hits['first_moves'] + stats.cache_misses['first_moves'], 0)
+        self.assertGreater(stats.cache_hits['node_damage'], 0)
@@ -83,7 +83,7 @@ class TestGetAllOptions(unittest.TestCase):
         self.assertEqual(expected_options, options)
 
     def test_partiallytrapped_removes_switch_options_for_bot(self):
-        self.state.self.active.volatile_status.add(constants.PARTIALLY_TRAPPED)
+        self.state.self.active.volatile_status |= {constants.PARTIALLY_TRAPPED}
         expected_options = (
             [
                 'tackle',
@@ -108,7 +108,7 @@ class TestGetAllOptions(unittest.TestCase):
         self.assertEqual(expected_options, options)
 
     def test_partiallytrapped_removes_switch_options_for_opponent(self):
-        self.state.opponent.active.volatile_status.add(constants.PARTIALLY_TRAPPED)
+        self.state.opponent.active.volatile_status |= {constants.PARTIALLY_TRAPPED}
         expected_options = (
             [
                 'tackle',
@@ -0,0 +1,88 @@
+import random
+import unittest
+
+import constants
+from data.ruleset import get_ruleset
+from data.ruleset import set_ruleset
+from data.ruleset import reset_ruleset
+from showdown.battle import LastUsedMove
+from showdown.engine.objects import State
+from benchmarks.self_play import Observations
+from benchmarks.self_play import create_side
+from benchmarks.self_play import create_view
+from benchmarks.self_play import flipped
+from benchmarks.self_play import generate_team
+from benchmarks.self_play import legal_options
+from benchmarks.self_play import parse_decision
+from benchmarks.self_play import play_game
+from showdown.battle_bots.most_damage import main as most_damage
+
+
+class TestSelfPlay(unittest.TestCase):
+    def setUp(self):
+        self.ruleset_token = set_ruleset(get_ruleset('gen8randombattle'))
+
+        rng = random.Random(0)
+        self.state = State(create_side(generate_team(rng)), create_side(generate_team(rng)), None, None, False)
+
+    def tearDown(self):
+        reset_ruleset(self.ruleset_token)
+
+    def test_generated_teams_have_six_pokemon_with_moves(self):
+        for side in [self.state.self, self.state.opponent]:
+            self.assertEqual(5, len(side.reserve))
+            self.assertTrue(side.active.moves)
+
+    def test_view_only_shows_revealed_opponent_pokemon_and_moves(self):
+        observations = Observations()
+        observations.see(self.state.opponent.active)
+        observations.see_move(self.state.opponent.active, self.state.opponent.active.moves[0][constants.ID])
+        options = legal_options(self.state, LastUsedMove('', '', 0))
+
+        battle = create_view(most_damage, self.state, observations, Observations(), options, 1)
+
+        self.assertEqual([], battle.opponent.reserve)
+        self.assertEqual(constants.UNKNOWN_ITEM, battle.opponent.active.item)
+        self.assertEqual([self.state.opponent.active.moves[0][constants.ID]], [m.name for m in battle.opponent.active.moves])
+        self.assertEqual(5, len(battle.user.reserve))
+
+    def test_flipped_state_gives_the_options_of_the_other_side(self):
+        options = legal_options(flipped(self.state), LastUsedMove('', '', 0))
+
+        self.assertIn("{} {}".format(constants.SWITCH_STRING, next(iter(self.state.opponent.reserve))), options)
+
+    def test_choice_item_locks_the_last_used_move(self):
+        active = self.state.self.active
+        active.item = 'choicescarf'
+        locked_move = active.moves[0][constants.ID]
+
+        options = legal_options(self.state, LastUsedMove(active.id, locked_move, 1))
+
+        self.assertEqual([locked_move], [o for o in options if not o.startswith(constants.SWITCH_STRING)])
+
+    def test_moves_without_pp_cannot_be_used(self):
+        active = self.state.self.active
+        active.moves[0][constants.CURRENT_PP] = 0
+
+        options = legal_options(self.state, LastUsedMove('', '', 0))
+
+        self.assertNotIn(active.moves[0][constants.ID], options)
+
+    def test_parse_decision_maps_a_switch_back_to_the_pokemon_name(self):
+        options = legal_options(self.state, LastUsedMove('', '', 0))
+        battle = create_view(most_damage, self.state, Observations(), Observations(), options, 1)
+        switch_target = battle.user.reserve[2]
+
+        decision = parse_decision(battle, ["/switch {}".format(switch_target.index), "1"])
+
+        self.assertEqual("{} {}".format(constants.SWITCH_STRING, switch_target.name), decision)
+
+    def test_parse_decision_removes_mega_and_dynamax_from_a_move(self):
+        self.assertEqual('tackle', parse_decision(None, ["/choose move tackle dynamax", "1"]))
+
+    def test_game_between_two_bots_finishes_with_a_result(self):
+        result = play_game(('most_damage', 'most_damage'), 0)
+
+        self.assertIn(result.winner, [0, 1, None])
+        self.assertGreater(result.turns, 0)
+        self.assertTrue(result.decision_times[0])
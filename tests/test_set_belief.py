@@ -0,0 +1,94 @@
+import unittest
+from copy import deepcopy
+
+import constants
+from data import pokedex
+from showdown.battle import Pokemon
+from showdown.set_belief import SetBelief
+
+
+TIMID = ('timid', '0,0,0,252,4,252')
+MODEST = ('modest', '0,0,0,252,4,252')
+
+
+class TestSetBelief(unittest.TestCase):
+    def setUp(self):
+        self.belief = SetBelief.from_usage(
+            'pikachu',
+            [(TIMID, 60), (MODEST, 40)],
+            [('lightball', 50), ('choicespecs', 50)],
+            [('static', 100)]
+        )
+        self.pikachu = Pokemon('pikachu', 100)
+
+    def test_sets_are_every_combination_of_the_usage_stats(self):
+        self.assertEqual(4, len(self.belief.sets))
+
+    def test_weighted_sets_add_up_to_one_hundred_percent(self):
+        self.assertAlmostEqual(100, sum(w for _, w in self.belief.weighted_sets(self.pikachu)))
+
+    def test_update_forgets_the_sets_that_are_ruled_out(self):
+        self.belief.update(lambda spread, item, ability: int(spread == TIMID))
+        self.assertEqual(
+            [((TIMID, 'lightball', 'static'), 50), ((TIMID, 'choicespecs', 'static'), 50)],
+            self.belief.weighted_sets(self.pikachu)
+        )
+
+    def test_update_spreads_gives_the_stats_of_each_spread_with_the_item_and_ability(self):
+        seen = list()
+
+        def likelihoods(item, ability, stats):
+            seen.append((item, ability, stats[constants.SPEED].tolist()))
+            return (stats[constants.SPEED] > 300) & (item == 'lightball')
+
+        self.belief.update_spreads(pokedex['pikachu'][constants.BASESTATS], 100, likelihoods)
+        self.assertEqual([('lightball', 'static', [306, 279]), ('choicespecs', 'static', [306, 279])], seen)
+        self.assertEqual([(TIMID, 'lightball', 'static')], list(self.belief.sets))
+
+    def test_update_spreads_after_ruling_out_sets_only_sees_the_sets_that_are_left(self):
+        base_stats = pokedex['pikachu'][constants.BASESTATS]
+        self.belief.update_spreads(base_stats, 100, lambda item, ability, stats: stats[constants.SPEED] > 300)
+        self.belief.update(lambda spread, item, ability: item == 'lightball')
+
+        seen = list()
+
+        def likelihoods(item, ability, stats):
+            seen.append((item, ability, stats[constants.SPEED].tolist()))
+            return stats[constants.SPEED] > 0
+
+        self.belief.update_spreads(base_stats, 100, likelihoods)
+        self.assertEqual([('lightball', 'static', [306])], seen)
+
+    def test_update_that_rules_out_every_set_is_ignored(self):
+        self.assertFalse(self.belief.update(lambda spread, item, ability: 0))
+        self.assertEqual(4, len(self.belief.sets))
+
+    def test_flags_of_the_pokemon_rule_out_items(self):
+        self.pikachu.can_have_choice_item = False
+        self.assertEqual({'lightball'}, {item for (_, item, _), _ in self.belief.weighted_sets(self.pikachu)})
+
+    def test_revealed_item_keeps_the_sets_with_that_item(self):
+        self.belief.update(lambda spread, item, ability: 1 if item == 'choicespecs' else int(spread == TIMID))
+        self.pikachu.item = 'lightball'
+        self.assertEqual([((TIMID, 'lightball', 'static'), 100)], self.belief.weighted_sets(self.pikachu))
+
+    def test_revealed_item_that_no_set_has_replaces_every_item(self):
+        self.pikachu.item = 'lifeorb'
+        self.assertEqual(
+            [((TIMID, 'lifeorb', 'static'), 60), ((MODEST, 'lifeorb', 'static'), 40)],
+            [(s, round(w, 6)) for s, w in self.belief.weighted_sets(self.pikachu)]
+        )
+
+    def test_revealed_ability_replaces_every_ability(self):
+        self.pikachu.ability = 'lightningrod'
+        self.assertEqual({'lightningrod'}, {ability for (_, _, ability), _ in self.belief.weighted_sets(self.pikachu)})
+
+    def test_deep_copy_is_not_changed_by_updating_the_belief(self):
+        belief_copy = deepcopy(self.belief)
+        self.belief.update(lambda spread, item, ability: int(spread == TIMID))
+        self.assertEqual(4, len(belief_copy.sets))
+
+    def test_nothing_left_gives_no_sets(self):
+        self.pikachu.can_have_choice_item = False
+        self.belief.update(lambda spread, item, ability: int(item == 'choicespecs'))
+        self.assertEqual([], self.belief.weighted_sets(self.pikachu))
@@ -0,0 +1,154 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from data import smogon_stats_cache
+from data.parse_smogon_stats import get_smogon_stats_month
+from data.parse_smogon_stats import parse_pokemon_information
+from data.parse_smogon_stats import iter_pokemon_information
+from data.smogon_stats_cache import get_usage_stats
+from data.smogon_stats_cache import get_cache_path
+from data.smogon_stats_cache import seed_from_file
+
+
+BORDER = " +----------------------------------------+ "
+
+
+def moveset_section(title, lines):
+    return [BORDER, " | {} | ".format(title)] + [" | {} | ".format(line) for line in lines]
+
+
+def moveset_file(*pokemon):
+    lines = []
+    for name, abilities, items, spreads, moves in pokemon:
+        lines += [BORDER, " | {} | ".format(name)]
+        lines += moveset_section("Abilities", abilities)
+        lines += moveset_section("Items", items)
+        lines += moveset_section("Spreads", spreads)
+        lines += moveset_section("Moves", moves)
+        lines += moveset_section("Teammates", ["Raichu +1.000%"])
+        lines += [BORDER]
+    return "\n".join(lines)
+
+
+MOVESET_FILE = moveset_file(
+    ("Pikachu", ["Static 90.000%", "Other 10.000%"], ["Light Ball 80.000%"], ["Timid:0/0/0/252/4/252 50.000%"], ["Thunderbolt 99.000%", "Hidden Power Ice 40.000%"]),
+    ("Raichu", ["Lightning Rod 100.000%"], ["Choice Specs 60.000%"], ["Modest:0/0/0/252/4/252 70.000%"], ["Volt Switch 90.000%"]),
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=''):
+        self.status_code = status_code
+        self.content = content
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.content.splitlines())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class TestParsePokemonInformation(unittest.TestCase):
+    def test_parses_every_pokemon_in_the_file(self):
+        pokemon_information = parse_pokemon_information(MOVESET_FILE.splitlines())
+        self.assertEqual(['pikachu', 'raichu'], sorted(pokemon_information))
+
+    def test_parses_the_sections_of_a_pokemon(self):
+        pikachu = parse_pokemon_information(MOVESET_FILE.splitlines())['pikachu']
+        self.assertEqual([('static', 90.0)], pikachu['abilities'])
+        self.assertEqual([('lightball', 80.0)], pikachu['items'])
+        self.assertEqual([('timid', '0,0,0,252,4,252', 50.0)], pikachu['spreads'])
+        self.assertEqual([('thunderbolt', 99.0), ('hiddenpowerice60', 40.0)], pikachu['moves'])
+
+    def test_bytes_lines_are_parsed_like_text(self):
+        lines = MOVESET_FILE.splitlines()
+        self.assertEqual(parse_pokemon_information(lines), parse_pokemon_information([line.encode() for line in lines]))
+
+    def test_top_k_keeps_the_most_likely_entries(self):
+        pikachu = parse_pokemon_information(MOVESET_FILE.splitlines(), top_k=1)['pikachu']
+        self.assertEqual([('thunderbolt', 99.0)], pikachu['moves'])
+
+    def test_a_pokemon_is_yielded_before_the_rest_of_the_file_is_read(self):
+        lines = iter(MOVESET_FILE.splitlines())
+        name, _ = next(iter_pokemon_information(lines))
+        self.assertEqual('pikachu', name)
+        self.assertIn('Raichu', " ".join(lines))
+
+
+class TestSmogonStatsCache(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temporary_directory.name
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.addCleanup(smogon_stats_cache._memory_cache.clear)
+
+        self.requests_patch = mock.patch('data.smogon_stats_cache.requests.get')
+        self.requests_get = self.requests_patch.start()
+        self.addCleanup(self.requests_patch.stop)
+
+    def write_moveset_file(self, name):
+        path = os.path.join(self.cache_dir, name)
+        with open(path, 'w') as f:
+            f.write(MOVESET_FILE)
+        return path
+
+    def test_seeded_stats_are_used_without_downloading(self):
+        seed_from_file(self.write_moveset_file('gen8ou-0.txt'), cache_dir=self.cache_dir)
+
+        stats = get_usage_stats('gen8ou', cache_dir=self.cache_dir)
+
+        self.assertIn('pikachu', stats)
+        self.requests_get.assert_not_called()
+
+    def test_game_mode_is_taken_from_the_file_name(self):
+        game_mode, month = seed_from_file(self.write_moveset_file('gen8uu-0.txt'), month='2020-05', cache_dir=self.cache_dir)
+        self.assertEqual(('gen8uu', '2020-05'), (game_mode, month))
+        self.assertTrue(os.path.exists(get_cache_path('gen8uu', '2020-05', self.cache_dir)))
+
+    def test_downloaded_stats_are_only_downloaded_once(self):
+        self.requests_get.return_value = FakeResponse(200, MOVESET_FILE)
+
+        get_usage_stats('gen8ou', cache_dir=self.cache_dir)
+        smogon_stats_cache._memory_cache.clear()
+        stats = get_usage_stats('gen8ou', cache_dir=self.cache_dir)
+
+        self.assertIn('raichu', stats)
+        self.assertEqual(1, self.requests_get.call_count)
+
+    def test_stats_are_kept_in_memory(self):
+        self.requests_get.return_value = FakeResponse(200, MOVESET_FILE)
+        self.assertIs(get_usage_stats('gen8ou', cache_dir=self.cache_dir), get_usage_stats('gen8ou', cache_dir=self.cache_dir))
+
+    def test_previous_month_is_used_when_last_month_is_not_published(self):
+        self.requests_get.side_effect = [FakeResponse(404), FakeResponse(200, MOVESET_FILE)]
+
+        stats = get_usage_stats('gen8ou', cache_dir=self.cache_dir)
+
+        self.assertIn('pikachu', stats)
+        self.assertTrue(os.path.exists(get_cache_path('gen8ou', get_smogon_stats_month(2), self.cache_dir)))
+
+    def test_blitz_uses_the_stats_of_the_non_blitz_mode(self):
+        seed_from_file(self.write_moveset_file('gen8ou-0.txt'), cache_dir=self.cache_dir)
+        self.assertIn('pikachu', get_usage_stats('gen8oublitz', cache_dir=self.cache_dir))
+
+    def test_no_stats_anywhere_gives_no_sets(self):
+        self.requests_get.return_value = FakeResponse(404)
+        self.assertEqual(dict(), get_usage_stats('gen8ou', cache_dir=self.cache_dir))
+
+    def test_stats_cached_by_an_older_version_are_downloaded_again(self):
+        path = get_cache_path('gen8ou', get_smogon_stats_month(), self.cache_dir)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            json.dump({'version': 0, 'pokemon': {'magikarp': {}}}, f)
+        self.requests_get.return_value = FakeResponse(200, MOVESET_FILE)
+
+        stats = get_usage_stats('gen8ou', cache_dir=self.cache_dir)
+
+        self.assertNotIn('magikarp', stats)
+        self.assertEqual(1, self.requests_get.call_count)
@@ -0,0 +1,32 @@
+import unittest
+
+import constants
+from data import pokedex
+from data.ruleset import get_ruleset
+from data.ruleset import use_ruleset
+from data.species import get_species
+
+
+class TestGetSpecies(unittest.TestCase):
+    def test_species_is_read_from_the_pokedex(self):
+        species = get_species('gastrodon')
+        self.assertEqual('gastrodon', species.name)
+        self.assertIs(pokedex['gastrodon'][constants.BASESTATS], species.base_stats)
+        self.assertEqual(['water', 'ground'], species.types)
+        self.assertEqual(('stickyhold', 'stormdrain', 'sandforce'), species.abilities)
+
+    def test_forme_not_in_the_pokedex_uses_the_first_entry_it_starts_with(self):
+        self.assertEqual('gastrodon', get_species('gastrodoneast').name)
+
+    def test_species_is_remembered(self):
+        self.assertIs(get_species('pikachu'), get_species('pikachu'))
+
+    def test_unknown_species_raises_keyerror(self):
+        with self.assertRaises(KeyError):
+            get_species('notapokemon')
+
+    def test_species_is_read_from_the_pokedex_of_the_current_ruleset(self):
+        with use_ruleset(get_ruleset('gen4ou')):
+            gen4_species = get_species('clefable')
+        self.assertEqual(['normal'], gen4_species.types)
+        self.assertEqual(['fairy'], get_species('clefable').types)
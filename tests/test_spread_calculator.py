@@ -0,0 +1,116 @@
+import random
+import unittest
+from collections import defaultdict
+
+import constants
+from data import pokedex
+from showdown.engine.helpers import natures
+from showdown.engine.helpers import calculate_stats
+from showdown.engine.objects import State
+from showdown.engine.objects import Side
+from showdown.engine.objects import Pokemon
+from showdown.engine.damage_calculator import calculate_damage
+from showdown.engine.find_state_instructions import get_effective_speed
+from showdown.engine.spread_calculator import STATS
+from showdown.engine.spread_calculator import get_effective_speeds
+from showdown.engine.spread_calculator import calculate_stats_of_spreads
+from showdown.engine.spread_calculator import calculate_max_damage_of_spreads
+from showdown.set_belief import apply_set
+
+from showdown.battle import Pokemon as StatePokemon
+
+
+ITEMS = ['unknownitem', 'choicescarf', 'choiceband', 'choicespecs', 'lifeorb', 'eviolite', 'assaultvest', 'expertbelt']
+ABILITIES = ['none', 'hugepower', 'intimidate', 'unaware', 'multiscale', 'swiftswim', 'technician', 'sheerforce', 'levitate']
+MOVES = ['tackle', 'earthquake', 'flamethrower', 'knockoff', 'uturn', 'hydropump', 'bodypress', 'psyshock', 'foulplay', 'gyroball', 'machpunch', 'acrobatics']
+POKEMON = ['dragonite', 'garchomp', 'toxapex', 'chansey', 'ferrothorn', 'tyranitar', 'pikachu', 'gyarados']
+
+
+def random_spread(rng):
+    evs = [0] * len(STATS)
+    for i in rng.sample(range(len(STATS)), 2):
+        evs[i] = rng.choice([4, 84, 128, 252])
+    return rng.choice(list(natures)), ','.join(str(e) for e in evs)
+
+
+class TestCalculateStatsOfSpreads(unittest.TestCase):
+    def test_gives_the_same_stats_as_calculate_stats(self):
+        rng = random.Random(0)
+        for pkmn in POKEMON:
+            base_stats = pokedex[pkmn][constants.BASESTATS]
+            level = rng.choice([50, 80, 100])
+            spreads = [random_spread(rng) for _ in range(50)]
+            stats = calculate_stats_of_spreads(base_stats, level, spreads)
+            for i, (nature, evs) in enumerate(spreads):
+                expected = calculate_stats(base_stats, level, nature=nature, evs=[int(e) for e in evs.split(',')])
+                self.assertEqual(expected, {stat: stats[stat][i] for stat in STATS})
+
+
+class TestSpreadsAgreeWithTheEngine(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def random_state(self):
+        user_name, opponent_name = self.rng.sample(POKEMON, 2)
+        user = Pokemon.from_state_pokemon_dict(StatePokemon(user_name, 100).to_dict())
+        opponent = Pokemon.from_state_pokemon_dict(StatePokemon(opponent_name, self.rng.choice([80, 100])).to_dict())
+        for pkmn in (user, opponent):
+            pkmn.attack_boost = self.rng.randint(-2, 2)
+            pkmn.defense_boost = self.rng.randint(-2, 2)
+            pkmn.special_attack_boost = self.rng.randint(-2, 2)
+            pkmn.special_defense_boost = self.rng.randint(-2, 2)
+            pkmn.speed_boost = self.rng.randint(-2, 2)
+            pkmn.hp = self.rng.choice([pkmn.maxhp, pkmn.maxhp // 2])
+        user.ability = self.rng.choice(ABILITIES)
+        user.item = self.rng.choice(ITEMS)
+        state = State(
+            Side(user, dict(), (0, 0), defaultdict(int)),
+            Side(opponent, dict(), (0, 0), defaultdict(int, {constants.REFLECT: self.rng.choice([0, 1])})),
+            self.rng.choice([None, constants.RAIN, constants.SAND, constants.SUN]),
+            None,
+            self.rng.choice([False, True])
+        )
+        return state
+
+    def test_speeds_are_the_same_as_the_engine(self):
+        for _ in range(100):
+            state = self.random_state()
+            opponent = state.opponent.active
+            opponent.item = self.rng.choice(ITEMS)
+            opponent.ability = self.rng.choice(ABILITIES)
+            spreads = [random_spread(self.rng) for _ in range(10)]
+            stats = calculate_stats_of_spreads(pokedex[opponent.id][constants.BASESTATS], opponent.level, spreads)
+            speeds = get_effective_speeds(state, state.opponent, stats[constants.SPEED])
+
+            for spread, speed in zip(spreads, speeds):
+                apply_set(opponent, pokedex[opponent.id][constants.BASESTATS], spread, opponent.item, opponent.ability)
+                self.assertEqual(get_effective_speed(state, state.opponent), speed)
+
+    def test_max_damage_is_the_same_as_the_engine(self):
+        for _ in range(300):
+            state = self.random_state()
+            opponent = state.opponent.active
+            opponent.item = self.rng.choice(ITEMS)
+            opponent.ability = self.rng.choice(ABILITIES)
+            attacking_side = self.rng.choice([constants.SELF, constants.OPPONENT])
+            attacking_move = self.rng.choice(MOVES)
+            defending_move = self.rng.choice(MOVES + ['splash', 'switch {}'.format(self.rng.choice(POKEMON))])
+            spreads = [random_spread(self.rng) for _ in range(10)]
+            base_stats = pokedex[opponent.id][constants.BASESTATS]
+            stats = calculate_stats_of_spreads(base_stats, opponent.level, spreads)
+            max_damage = calculate_max_damage_of_spreads(state, attacking_side, attacking_move, defending_move, constants.OPPONENT, stats)
+
+            for i, spread in enumerate(spreads):
+                apply_set(opponent, base_stats, spread, opponent.item, opponent.ability)
+                expected = calculate_damage(state, attacking_side, attacking_move, defending_move, calc_type='max')
+                message = "{} {} {} {}".format(attacking_side, attacking_move, defending_move, spread)
+                if expected is None:
+                    self.assertIsNone(max_damage, message)
+                else:
+                    self.assertEqual(expected[0], max_damage[i], message)
+
+    def test_non_damaging_move_gives_none(self):
+        state = self.random_state()
+        opponent = state.opponent.active
+        stats = calculate_stats_of_spreads(pokedex[opponent.id][constants.BASESTATS], opponent.level, [random_spread(self.rng)])
+        self.assertIsNone(calculate_max_damage_of_spreads(state, constants.OPPONENT, 'swordsdance', 'tackle', constants.OPPONENT, stats))
@@ -1,7 +1,10 @@
 import unittest
+from collections import defaultdict
 
 import constants
 from showdown.engine.objects import State
+from showdown.engine.objects import Side
+from showdown.engine.objects import StateMutator
 from showdown.battle import Pokemon as StatePokemon
 from showdown.engine.objects import Pokemon
 
@@ -58,7 +61,7 @@ class TestPokemon(unittest.TestCase):
         self.assertTrue(self.pokemon.item_can_be_removed())
 
     def test_item_can_be_removed_returns_false_if_pokemon_has_substitute(self):
-        self.pokemon.volatile_status.add('substitute')
+        self.pokemon.volatile_status |= {'substitute'}
         self.assertFalse(self.pokemon.item_can_be_removed())
 
     def test_item_can_be_removed_returns_false_if_pokemon_is_holding_zcrystal(self):
@@ -68,3 +71,128 @@ class TestPokemon(unittest.TestCase):
     def test_item_can_be_removed_returns_false_if_target_is_kyogreprimal(self):
         self.pokemon.id = 'kyogreprimal'
         self.assertFalse(self.pokemon.item_can_be_removed())
+
+    def test_copy_has_every_attribute_of_the_pokemon(self):
+        pokemon_copy = self.pokemon.copy()
+        for attribute in Pokemon.__slots__:
+            self.assertEqual(getattr(self.pokemon, attribute), getattr(pokemon_copy, attribute), attribute)
+
+    def test_changing_the_moves_of_a_copy_does_not_change_the_pokemon(self):
+        self.pokemon.moves.append({constants.ID: 'thunderbolt', constants.DISABLED: False, constants.CURRENT_PP: 24})
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.moves[0][constants.DISABLED] = True
+        pokemon_copy.volatile_status |= {'substitute'}
+        self.assertFalse(self.pokemon.moves[0][constants.DISABLED])
+        self.assertNotIn('substitute', self.pokemon.volatile_status)
+
+    def test_state_key_is_the_same_for_spreads_that_give_the_same_stats(self):
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.nature = 'hardy'
+        self.assertEqual(self.pokemon.state_key(), pokemon_copy.state_key())
+
+    def test_state_key_is_different_for_a_different_item(self):
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.item = 'lightball'
+        self.assertNotEqual(self.pokemon.state_key(), pokemon_copy.state_key())
+
+    def test_state_key_keeps_the_spread_of_a_pokemon_whose_stats_are_calculated_again(self):
+        self.pokemon.id = 'aegislash'
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.nature = 'hardy'
+        self.assertNotEqual(self.pokemon.state_key(), pokemon_copy.state_key())
+
+    def test_state_key_is_different_for_a_disabled_move(self):
+        self.pokemon.moves = [{constants.ID: 'thunderbolt', constants.DISABLED: False, constants.CURRENT_PP: 24}]
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.moves[0][constants.DISABLED] = True
+        self.assertNotEqual(self.pokemon.state_key(), pokemon_copy.state_key())
+
+
+class TestSideCopy(unittest.TestCase):
+    def setUp(self):
+        def side():
+            return Side(
+                Pokemon.from_state_pokemon_dict(StatePokemon('raichu', 100).to_dict()),
+                {'pikachu': Pokemon.from_state_pokemon_dict(StatePokemon('pikachu', 100).to_dict())},
+                (0, 0),
+                defaultdict(int)
+            )
+        self.state = State(side(), side(), None, None, False)
+        self.state_copy = State(self.state.self.copy(), self.state.opponent.copy(), None, None, False)
+
+    def test_copy_shares_the_reserve_and_side_conditions(self):
+        self.assertIs(self.state.self.reserve['pikachu'], self.state_copy.self.reserve['pikachu'])
+        self.assertIs(self.state.self.side_conditions, self.state_copy.self.side_conditions)
+        self.assertIsNot(self.state.self.active, self.state_copy.self.active)
+
+    def test_instructions_applied_to_the_copy_do_not_change_the_side(self):
+        StateMutator(self.state_copy).apply([
+            (constants.MUTATOR_SWITCH, constants.SELF, 'raichu', 'pikachu'),
+            (constants.MUTATOR_DAMAGE, constants.SELF, 50),
+            (constants.MUTATOR_APPLY_VOLATILE_STATUS, constants.SELF, constants.SUBSTITUTE),
+            (constants.MUTATOR_SIDE_START, constants.SELF, constants.STEALTH_ROCK, 1),
+        ])
+
+        pikachu = self.state.self.reserve['pikachu']
+        self.assertEqual(pikachu.maxhp, pikachu.hp)
+        self.assertEqual(frozenset(), pikachu.volatile_status)
+        self.assertEqual(0, self.state.self.side_conditions[constants.STEALTH_ROCK])
+        self.assertEqual(1, self.state_copy.self.side_conditions[constants.STEALTH_ROCK])
+        self.assertEqual('raichu', self.state.self.active.id)
+
+
+class TestMoveSlots(unittest.TestCase):
+    def setUp(self):
+        self.pokemon = Pokemon.from_state_pokemon_dict(StatePokemon('pikachu', 100).to_dict())
+        self.moves = [
+            {constants.ID: 'thunderbolt', constants.DISABLED: False, constants.CURRENT_PP: 24},
+            {constants.ID: 'voltswitch', constants.DISABLED: True, constants.CURRENT_PP: 32},
+            {constants.ID: 'surf', constants.DISABLED: False, constants.CURRENT_PP: 0},
+        ]
+        self.pokemon.moves = self.moves
+
+    def test_moves_read_back_as_the_dicts_they_were_made_from(self):
+        self.assertEqual(self.moves, self.pokemon.moves)
+        self.assertEqual(self.moves[1], self.pokemon.moves[1])
+        self.assertEqual('surf', self.pokemon.moves[-1][constants.ID])
+
+    def test_a_missing_disabled_flag_is_not_disabled(self):
+        self.pokemon.moves = [{constants.ID: 'thunderbolt'}]
+        self.assertFalse(self.pokemon.moves[0][constants.DISABLED])
+
+    def test_enabled_moves_leaves_out_the_disabled_moves(self):
+        self.assertEqual(['thunderbolt', 'surf'], self.pokemon.enabled_moves())
+
+    def test_changing_a_move_changes_the_pokemon(self):
+        self.pokemon.moves[0][constants.DISABLED] = True
+        self.pokemon.moves[2][constants.CURRENT_PP] = 10
+        self.assertEqual(['surf'], self.pokemon.enabled_moves())
+        self.assertEqual((24, 32, 10), self.pokemon.move_pp)
+
+    def test_append_adds_a_move(self):
+        self.pokemon.moves.append({constants.ID: 'irontail', constants.DISABLED: False, constants.CURRENT_PP: 24})
+        self.assertEqual(('thunderbolt', 'voltswitch', 'surf', 'irontail'), self.pokemon.move_ids)
+
+    def test_copy_shares_the_moves_until_one_is_changed(self):
+        pokemon_copy = self.pokemon.copy()
+        self.assertIs(self.pokemon.move_ids, pokemon_copy.move_ids)
+        pokemon_copy.moves[2][constants.CURRENT_PP] = 10
+        self.assertEqual(0, self.pokemon.moves[2][constants.CURRENT_PP])
+
+    def test_move_index_raises_a_valueerror_for_a_move_the_pokemon_does_not_have(self):
+        with self.assertRaises(ValueError):
+            self.pokemon.move_index('tackle')
+
+    def test_move_index_is_the_slot_of_the_move(self):
+        self.assertEqual(2, self.pokemon.move_index('surf'))
+
+    def test_move_index_follows_a_changed_move(self):
+        self.pokemon.moves[2][constants.ID] = 'irontail'
+        self.assertEqual(2, self.pokemon.move_index('irontail'))
+        with self.assertRaises(ValueError):
+            self.pokemon.move_index('surf')
+
+    def test_changing_a_move_of_a_copy_does_not_change_the_slots_of_the_pokemon(self):
+        pokemon_copy = self.pokemon.copy()
+        pokemon_copy.moves[2][constants.ID] = 'irontail'
+        self.assertEqual(2, self.pokemon.move_index('surf'))
@@ -111,7 +111,7 @@ class TestStatemutator(unittest.TestCase):
         self.assertIn("leechseed", self.state.self.active.volatile_status)
 
     def test_reverse_volatile_status_properly_removes_status(self):
-        self.state.self.active.volatile_status.add("leechseed")
+        self.state.self.active.volatile_status |= {"leechseed"}
         instruction = (
             constants.MUTATOR_APPLY_VOLATILE_STATUS,
             constants.SELF,
@@ -362,6 +362,7 @@ class TestStatemutator(unittest.TestCase):
                 'current_pp': 16
             }
         self.state.self.active.moves = [move]
+        move = self.state.self.active.moves[0]
         instruction = (
             constants.MUTATOR_DISABLE_MOVE,
             constants.SELF,
@@ -380,6 +381,7 @@ class TestStatemutator(unittest.TestCase):
                 'current_pp': 16
             }
         self.state.self.active.moves = [move]
+        move = self.state.self.active.moves[0]
         instruction = (
             constants.MUTATOR_DISABLE_MOVE,
             constants.SELF,
@@ -398,6 +400,7 @@ class TestStatemutator(unittest.TestCase):
             'current_pp': 16
         }
         self.state.self.active.moves = [move]
+        move = self.state.self.active.moves[0]
         instruction = (
             constants.MUTATOR_ENABLE_MOVE,
             constants.SELF,
@@ -416,6 +419,7 @@ class TestStatemutator(unittest.TestCase):
             'current_pp': 16
         }
         self.state.self.active.moves = [move]
+        move = self.state.self.active.moves[0]
         instruction = (
             constants.MUTATOR_ENABLE_MOVE,
             constants.SELF,
@@ -0,0 +1,105 @@
+import unittest
+from copy import deepcopy
+
+import constants
+from data import all_move_json
+from showdown.battle import Pokemon as StatePokemon
+from showdown.engine.objects import Pokemon
+from showdown.engine.find_state_instructions import update_attacking_move
+from showdown.engine.find_state_instructions import _update_attacking_move
+from showdown.engine.special_effects.abilities import modify_attack_against as ability_attack_against
+from showdown.engine.special_effects.abilities import modify_attack_being_used as ability_attack_being_used
+from showdown.engine.special_effects.items import modify_attack_against as item_attack_against
+from showdown.engine.special_effects.items import modify_attack_being_used as item_attack_being_used
+from showdown.engine.special_effects.moves import move_special_effect
+
+
+class TestEffectDependencies(unittest.TestCase):
+    def test_every_move_effect_is_declared(self):
+        self.assertEqual(set(), set(move_special_effect.move_lookup.values()) - set(move_special_effect.move_dependencies))
+
+    def test_every_ability_effect_on_the_attacker_is_declared(self):
+        self.assertEqual(set(), set(ability_attack_being_used.ability_lookup.values()) - set(ability_attack_being_used.ability_dependencies))
+
+    def test_every_ability_effect_on_the_defender_is_declared(self):
+        self.assertEqual(set(), set(ability_attack_against.ability_lookup.values()) - set(ability_attack_against.ability_dependencies))
+
+    def test_every_item_effect_on_the_attacker_is_declared(self):
+        effects = {
+            f for name, f in vars(item_attack_being_used).items()
+            if callable(f) and getattr(f, '__module__', None) == item_attack_being_used.__name__ and name != 'item_modify_attack_being_used'
+        }
+        self.assertEqual(set(), effects - set(item_attack_being_used.item_dependencies))
+
+    def test_every_item_effect_on_the_defender_is_declared(self):
+        self.assertEqual(set(), set(item_attack_against.item_lookup.values()) - set(item_attack_against.item_dependencies))
+
+
+class TestUpdateAttackingMove(unittest.TestCase):
+    def setUp(self):
+        self.attacker = Pokemon.from_state_pokemon_dict(StatePokemon("pikachu", 100).to_dict())
+        self.defender = Pokemon.from_state_pokemon_dict(StatePokemon("gyarados", 100).to_dict())
+        self.moves = [
+            'tackle', 'thunderbolt', 'facade', 'hex', 'knockoff', 'acrobatics', 'solarbeam', 'weatherball',
+            'risingvoltage', 'expandingforce', 'suckerpunch', 'pursuit', 'payback', 'boltbeak', 'eruption',
+            'hurricane', 'thunder', 'brine', 'grassyglide', 'foulplay', 'lowkick'
+        ]
+        self.defending_moves = [all_move_json['tackle'], all_move_json['calmmind'], {constants.SWITCH_STRING: 'xatu'}]
+
+    def assert_same_as_uncached(self, weather=None, terrain=None):
+        for move in self.moves:
+            for defending_move in self.defending_moves:
+                for first_move in (True, False):
+                    args = (self.attacker, self.defender, all_move_json[move], defending_move, first_move, weather, terrain)
+                    expected = _update_attacking_move(*args)
+                    self.assertEqual(expected, update_attacking_move(*args), move)
+                    self.assertEqual(expected, update_attacking_move(*args), move)
+
+    def test_same_as_uncached(self):
+        self.assert_same_as_uncached()
+
+    def test_same_as_uncached_in_weather_and_terrain(self):
+        for weather in (constants.SUN, constants.RAIN, constants.SAND):
+            for terrain in (constants.ELECTRIC_TERRAIN, constants.PSYCHIC_TERRAIN, constants.GRASSY_TERRAIN):
+                self.assert_same_as_uncached(weather, terrain)
+
+    def test_same_as_uncached_after_the_pokemon_change(self):
+        self.assert_same_as_uncached()
+        self.attacker.status = constants.BURN
+        self.attacker.hp = 1
+        self.defender.status = constants.POISON
+        self.defender.hp = 1
+        self.assert_same_as_uncached()
+
+    def test_same_as_uncached_with_abilities_and_items(self):
+        for ability, item in [('technician', 'lifeorb'), ('sheerforce', 'choiceband'), ('guts', 'flameorb'), ('adaptability', None)]:
+            self.attacker.ability = ability
+            self.attacker.item = item
+            for defending_ability, defending_item in [('levitate', 'airballoon'), ('thickfat', 'leftovers'), ('multiscale', None)]:
+                self.defender.ability = defending_ability
+                self.defender.item = defending_item
+                self.assert_same_as_uncached()
+
+    def test_same_as_uncached_against_protect(self):
+        self.defender.volatile_status |= {constants.PROTECT}
+        self.assert_same_as_uncached()
+        self.attacker.ability = 'unseenfist'
+        self.assert_same_as_uncached()
+
+    def test_same_as_uncached_with_a_volatile_status(self):
+        self.attacker.volatile_status |= {'solarbeam'}
+        self.defender.volatile_status |= {constants.ROOST}
+        self.assert_same_as_uncached()
+
+    def test_different_moves_with_the_same_id_are_not_mixed_up(self):
+        move = all_move_json['solarbeam']
+        without_charge = deepcopy(move)
+        without_charge[constants.FLAGS].pop(constants.CHARGE)
+        self.assertEqual(
+            _update_attacking_move(self.attacker, self.defender, without_charge, self.defending_moves[0], True, None, None),
+            update_attacking_move(self.attacker, self.defender, without_charge, self.defending_moves[0], True, None, None)
+        )
+        self.assertEqual(
+            _update_attacking_move(self.attacker, self.defender, move, self.defending_moves[0], True, None, None),
+            update_attacking_move(self.attacker, self.defender, move, self.defending_moves[0], True, None, None)
+        )